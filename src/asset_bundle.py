@@ -0,0 +1,157 @@
+# src/asset_bundle.py
+
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from src.constants import ASSET_PATH, ASSET_BUNDLE_PATH, ASSET_BUNDLE_EXCLUDE
+
+BUNDLE_MAGIC = b"UCAB"
+BUNDLE_VERSION = 1
+# Magic, version, index offset and length; the data follows, then the JSON index ({name: [offset, size]})
+_HEADER = struct.Struct("<4sIQI")
+
+# The bundle opened by read_asset(), and text assets already decoded
+_default_bundle = None
+_text_cache = {}
+
+
+class AssetBundleError(Exception):
+    pass
+
+
+class AssetBundle:
+    """
+    Read-only view of a bundle file. The file is memory-mapped, so opening it reads only
+    the index and each asset is paged in when first read.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, index_offset, index_size = _HEADER.unpack_from(self._map, 0)
+            if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+                raise AssetBundleError(f"{path} is not a version {BUNDLE_VERSION} asset bundle.")
+            self.index = json.loads(bytes(self._map[index_offset:index_offset + index_size]).decode("utf-8"))
+        except (ValueError, struct.error) as e:
+            self._file.close()
+            raise AssetBundleError(f"{path} is not a readable asset bundle: {e}")
+        except AssetBundleError:
+            self._file.close()
+            raise
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def names(self):
+        return sorted(self.index)
+
+    def read(self, name):
+        """The asset's bytes as a memoryview into the mapping (no copy)."""
+        offset, size = self.index[name]
+        return memoryview(self._map)[offset:offset + size]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _bundle_names(asset_dir):
+    """Asset names (relative paths with '/') of every file under asset_dir, minus ASSET_BUNDLE_EXCLUDE."""
+    names = []
+    for directory, _, filenames in os.walk(asset_dir):
+        for filename in filenames:
+            name = os.path.relpath(os.path.join(directory, filename), asset_dir).replace(os.sep, "/")
+            if name not in ASSET_BUNDLE_EXCLUDE:
+                names.append(name)
+    return sorted(names)
+
+
+def build_bundle(asset_dir=ASSET_PATH, path=ASSET_BUNDLE_PATH):
+    """Packs the asset folder into one bundle file (written to a temp file, then renamed). Returns the asset count."""
+    index = {}
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, 0, 0)) # Rewritten once the index is placed
+        for name in _bundle_names(asset_dir):
+            with open(os.path.join(asset_dir, name), "rb") as asset:
+                data = asset.read()
+            index[name] = [f.tell(), len(data)]
+            f.write(data)
+        index_offset = f.tell()
+        index_bytes = json.dumps(index, sort_keys=True).encode("utf-8")
+        f.write(index_bytes)
+        f.seek(0)
+        f.write(_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, index_offset, len(index_bytes)))
+    os.replace(temp_path, path)
+    return len(index)
+
+
+def default_bundle():
+    """The game's bundle, opened on first use; None when it has not been built (assets are then read from files)."""
+    global _default_bundle
+    if _default_bundle is None and os.path.exists(ASSET_BUNDLE_PATH):
+        try:
+            _default_bundle = AssetBundle(ASSET_BUNDLE_PATH)
+        except (AssetBundleError, OSError) as e:
+            print(f"Ignoring asset bundle: {e}")
+            _default_bundle = False
+    return _default_bundle or None
+
+
+def read_asset(name):
+    """
+    An asset's bytes by name relative to the assets folder (e.g. 'sounds/move.wav'),
+    from the bundle when there is one, otherwise from the file. Raises FileNotFoundError.
+    """
+    bundle = default_bundle()
+    if bundle is not None and name in bundle:
+        return bundle.read(name)
+    with open(os.path.join(ASSET_PATH, name), "rb") as f:
+        return f.read()
+
+
+def open_asset(name):
+    """The asset as a file object, for loaders such as pygame.image.load and pygame.mixer.Sound."""
+    return io.BytesIO(read_asset(name))
+
+
+def read_text_asset(name):
+    """A UTF-8 text asset, decoded once and cached."""
+    text = _text_cache.get(name)
+    if text is None:
+        text = _text_cache[name] = bytes(read_asset(name)).decode("utf-8")
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the packed asset bundle")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="pack the assets folder into one file")
+    build_parser.add_argument("--assets", default=ASSET_PATH)
+    build_parser.add_argument("--out", default=ASSET_BUNDLE_PATH)
+    list_parser = subparsers.add_parser("list", help="list the assets in a bundle")
+    list_parser.add_argument("bundle", nargs="?", default=ASSET_BUNDLE_PATH)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "build":
+            count = build_bundle(args.assets, args.out)
+            print(f"Packed {count} assets into {args.out} ({os.path.getsize(args.out) / 1024:.0f} KiB)")
+        else:
+            bundle = AssetBundle(args.bundle)
+            for name in bundle.names():
+                print(f"{bundle.index[name][1]:>10}  {name}")
+            bundle.close()
+    except (AssetBundleError, OSError) as e:
+        print(f"Asset bundle {args.command} failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# src/audio.py
+
+import collections
+import os
+import threading
+import time
+import pygame
+from src.constants import (SOUND_FILES, SOUND_PATH, SOUND_ASSET_DIR, SOUND_CATEGORIES, AUDIO_CATEGORY_CHANNELS,
+                           AUDIO_FREQUENCY, AUDIO_BUFFER_SIZE, AUDIO_MIXER_CHANNELS, AUDIO_LATENCY_SAMPLES)
+from src.asset_bundle import default_bundle, open_asset
+
+# Dictionary to hold the loaded sound objects (filled by the loader thread)
+LOADED_SOUNDS = {}
+# Reserved mixer channels per sound category, and the next one to reuse when all are busy
+_category_channels = {}
+_next_channel = {}
+# When the input event being handled arrived, and the click-to-sound timings measured so far
+_input_started = None
+LATENCY_SAMPLES = collections.deque(maxlen=AUDIO_LATENCY_SAMPLES)
+
+
+def pre_init_mixer():
+    """
+    Sets the mixer's buffer size and format. Must run before pygame.init(), which
+    otherwise opens the mixer with SDL's default (larger, slower) buffer.
+    """
+    pygame.mixer.pre_init(frequency=AUDIO_FREQUENCY, size=-16, channels=2, buffer=AUDIO_BUFFER_SIZE)
+
+
+def _init_mixer():
+    if not pygame.mixer.get_init():
+        try:
+            pygame.mixer.init(frequency=AUDIO_FREQUENCY, size=-16, channels=2, buffer=AUDIO_BUFFER_SIZE)
+            print("Pygame mixer initialized by the audio module.")
+        except pygame.error as e:
+            print(f"Error initializing pygame.mixer: {e}. Sounds may not play.")
+            return False
+    _reserve_channels()
+    return True
+
+
+def _reserve_channels():
+    """Gives each sound category its own channels and keeps Sound.play() off them."""
+    reserved = sum(AUDIO_CATEGORY_CHANNELS.values())
+    pygame.mixer.set_num_channels(max(AUDIO_MIXER_CHANNELS, reserved + 1))
+    pygame.mixer.set_reserved(reserved)
+    first = 0
+    for category, count in AUDIO_CATEGORY_CHANNELS.items():
+        _category_channels[category] = [pygame.mixer.Channel(index) for index in range(first, first + count)]
+        _next_channel[category] = 0
+        first += count
+
+
+def _load_all():
+    started = time.perf_counter()
+    for sound_name, filename in SOUND_FILES.items():
+        try:
+            LOADED_SOUNDS[sound_name] = pygame.mixer.Sound(file=open_asset(f"{SOUND_ASSET_DIR}/{filename}"))
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Error loading sound {filename}: {e}")
+            LOADED_SOUNDS[sound_name] = None
+    loaded = sum(1 for sound in LOADED_SOUNDS.values() if sound is not None)
+    print(f"Sound loading complete in {(time.perf_counter() - started) * 1000:.0f}ms. "
+          f"Successfully loaded {loaded}/{len(SOUND_FILES)} sounds.")
+
+
+def load_sounds(background=True):
+    """
+    Opens the mixer if needed, reserves the category channels and loads the sound
+    effects, by default on a background thread so startup does not wait for decoding.
+    Sounds requested before they are loaded are skipped. Returns the loader thread, if any.
+    """
+    bundle = default_bundle()
+    print(f"Attempting to load sounds from: {bundle.path if bundle else SOUND_PATH}")
+    if bundle is None and not os.path.exists(SOUND_PATH):
+        print(f"ERROR: Sound path does not exist: {SOUND_PATH}")
+        return None
+    if not _init_mixer():
+        return None
+    if not background:
+        _load_all()
+        return None
+    loader = threading.Thread(target=_load_all, name="sound-loader", daemon=True)
+    loader.start()
+    return loader
+
+
+def _channel_for(category):
+    """A free reserved channel of the category, or else the one whose sound started longest ago."""
+    channels = _category_channels.get(category)
+    if not channels:
+        return None
+    for channel in channels:
+        if not channel.get_busy():
+            return channel
+    index = _next_channel[category]
+    _next_channel[category] = (index + 1) % len(channels)
+    return channels[index]
+
+
+def mark_input():
+    """Call when an input event starts being handled; the next sound it triggers is timed from here."""
+    global _input_started
+    _input_started = time.perf_counter()
+
+
+def end_input():
+    global _input_started
+    _input_started = None
+
+
+def play_sound(sound_name):
+    """Plays the loaded sound effect on its category's reserved channels."""
+    global _input_started
+    if not pygame.mixer.get_init():
+        return
+    sound = LOADED_SOUNDS.get(sound_name)
+    if sound is None:
+        return
+    try:
+        channel = _channel_for(SOUND_CATEGORIES.get(sound_name))
+        if channel is not None:
+            channel.play(sound)
+        else:
+            sound.play()
+    except pygame.error as e:
+        print(f"Error playing sound '{sound_name}': {e}")
+        return
+    if _input_started is not None:
+        LATENCY_SAMPLES.append((time.perf_counter() - _input_started) * 1000)
+        _input_started = None
+
+
+def buffer_latency_ms():
+    """Output latency added by one mixer buffer at the mixer's actual frequency."""
+    settings = pygame.mixer.get_init()
+    return AUDIO_BUFFER_SIZE / (settings[0] if settings else AUDIO_FREQUENCY) * 1000
+
+
+def latency_summary():
+    """
+    Click-to-sound timings in ms: from the input event being handled to the sound being
+    queued (p50/p95/max), plus the buffer's output latency. None if nothing was timed.
+    """
+    if not LATENCY_SAMPLES:
+        return None
+    ordered = sorted(LATENCY_SAMPLES)
+    return {
+        "sounds": len(ordered),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+        "buffer": round(buffer_latency_ms(), 3),
+    }
@@ -0,0 +1,304 @@
+# src/benchmark.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+import chess
+import chess.engine
+from src.constants import (AI_DIFFICULTIES, EVALUATOR_DIFFICULTIES, PERFT_DEFAULT_DEPTH, EPD_POSITIONS_PER_TASK,
+                           STOCKFISH_PATH)
+from src.game_logic import TerminationTracker
+from src.engine_tuning import load_or_calibrate, resolve_profile, apply_profile, build_limit, pick_candidate
+from src import evaluator
+
+# Standard perft positions with their known node counts for depths 1, 2, 3, ...
+PERFT_POSITIONS = [
+    ("startpos", chess.STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("promotions", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("talkchess", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+]
+
+# Move generators under test. A factory takes a FEN and returns an object with an iterable
+# `legal_moves` and push(move)/pop() -- chess.Board and TerminationTracker both qualify.
+MOVE_GENERATORS = {
+    "python-chess": chess.Board,
+    "tracker": lambda fen: TerminationTracker(chess.Board(fen)), # What the Board class uses
+}
+
+
+def register_move_generator(name, factory):
+    """Adds a move generator (e.g. an in-process engine) to the perft runs."""
+    MOVE_GENERATORS[name] = factory
+
+
+# --- Perft ---
+
+def perft(position, depth):
+    """Counts the leaf nodes of the legal move tree (bulk-counted at depth 1)."""
+    if depth == 0:
+        return 1
+    moves = list(position.legal_moves)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.push(move)
+        nodes += perft(position, depth - 1)
+        position.pop()
+    return nodes
+
+
+def perft_divide(position, depth):
+    """Node counts below each root move, for tracking down a mismatch."""
+    counts = {}
+    for move in list(position.legal_moves):
+        position.push(move)
+        counts[move.uci()] = perft(position, depth - 1)
+        position.pop()
+    return counts
+
+
+def run_perft(depth=PERFT_DEFAULT_DEPTH, generators=None, positions=PERFT_POSITIONS):
+    """Runs every generator over every position; returns one result dict per run."""
+    results = []
+    for generator_name in generators or list(MOVE_GENERATORS):
+        factory = MOVE_GENERATORS[generator_name]
+        for name, fen, expected_counts in positions:
+            position = factory(fen)
+            started = time.perf_counter()
+            nodes = perft(position, depth)
+            seconds = time.perf_counter() - started
+            expected = expected_counts[depth - 1] if depth <= len(expected_counts) else None
+            results.append({"generator": generator_name, "position": name, "depth": depth, "nodes": nodes,
+                            "expected": expected, "ok": expected is None or nodes == expected,
+                            "seconds": seconds, "nps": nodes / max(seconds, 1e-9)})
+    return results
+
+
+def print_perft(results):
+    for result in results:
+        status = "ok" if result["ok"] else f"MISMATCH (expected {result['expected']})"
+        print(f"{result['generator']:<14} {result['position']:<12} depth {result['depth']} "
+              f"{result['nodes']:>10,} nodes {result['seconds']:>8.2f}s {result['nps']:>12,.0f} nps  {status}")
+    for generator_name in dict.fromkeys(result["generator"] for result in results):
+        runs = [result for result in results if result["generator"] == generator_name]
+        nodes = sum(result["nodes"] for result in runs)
+        seconds = sum(result["seconds"] for result in runs)
+        print(f"{generator_name}: {nodes:,} nodes in {seconds:.2f}s ({nodes / max(seconds, 1e-9):,.0f} nps)")
+
+
+# --- EPD suites ---
+
+def load_epd(path):
+    """Returns (id, FEN, operations) for every line with a bm or am operation."""
+    positions = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                board, operations = chess.Board.from_epd(line)
+            except ValueError as e:
+                print(f"Skipping {path}:{line_number}: {e}")
+                continue
+            if "bm" not in operations and "am" not in operations:
+                continue
+            positions.append((str(operations.get("id", f"{os.path.basename(path)}:{line_number}")), board.fen(),
+                              {key: [move.uci() for move in operations[key]]
+                               for key in ("bm", "am") if key in operations}))
+    return positions
+
+
+def _solves(move, operations):
+    uci = move.uci()
+    if "bm" in operations and uci not in operations["bm"]:
+        return False
+    return uci not in operations.get("am", [])
+
+
+_worker_engine = None
+_worker_options = {}
+
+
+def _init_epd_worker(engine_path):
+    global _worker_engine
+    if engine_path and os.path.exists(engine_path):
+        try:
+            _worker_engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+        except Exception as e:
+            print(f"EPD worker could not start Stockfish ({e}); engine difficulties will use the NumPy evaluator.")
+
+
+def _solve_with_engine(board, operations, profile, rng):
+    """
+    Searches like the game does (MultiPV pick for the weak profiles) and records when the
+    line the engine would play last switched to a solving move.
+    """
+    apply_profile(_worker_engine, profile, _worker_options)
+    started = time.perf_counter()
+    solved_at = None
+    lines = {}
+    with _worker_engine.analysis(board, build_limit(profile), multipv=max(1, profile["multipv"]),
+                                 game=object()) as analysis: # A new game per position clears the hash
+        for info in analysis:
+            pv = info.get("pv")
+            if not pv:
+                continue
+            lines[info.get("multipv", 1)] = pv[0]
+            if info.get("multipv", 1) != 1:
+                continue
+            if not _solves(pv[0], operations):
+                solved_at = None
+            elif solved_at is None:
+                solved_at = time.perf_counter() - started
+        best = analysis.wait().move
+    if profile["multipv"] > 1 and lines:
+        best = pick_candidate([lines[index] for index in sorted(lines)], rng)
+    return best, solved_at, time.perf_counter() - started
+
+
+def _solve_with_evaluator(board, rng):
+    started = time.perf_counter()
+    move = evaluator.choose_move(board, rng=rng)
+    elapsed = time.perf_counter() - started
+    return move, elapsed, elapsed
+
+
+def _epd_task(task):
+    """Solves a slice of an EPD suite at one difficulty; returns (index, solved, time to solve, move)."""
+    difficulty, profile, seed, positions = task
+    use_engine = _worker_engine is not None and difficulty not in EVALUATOR_DIFFICULTIES
+    results = []
+    for index, fen, operations in positions:
+        board = chess.Board(fen)
+        rng = random.Random(seed + index)
+        if use_engine:
+            move, solved_at, elapsed = _solve_with_engine(board, operations, profile, rng)
+        else:
+            move, solved_at, elapsed = _solve_with_evaluator(board, rng)
+        solved = move is not None and _solves(move, operations)
+        results.append((index, solved, (solved_at if solved_at is not None else elapsed) if solved else None,
+                        move.uci() if move else None))
+    return difficulty, results
+
+
+def run_epd(epd_paths, difficulties=AI_DIFFICULTIES, workers=None, engine_path=STOCKFISH_PATH,
+            seconds=None, seed=0):
+    """
+    Runs the EPD suites at each difficulty across worker processes.
+    The engine threads of each difficulty's profile are capped so the workers share the cores.
+    """
+    positions = [position for path in epd_paths for position in load_epd(path)]
+    if not positions:
+        raise ValueError("No EPD positions with bm/am operations found.")
+    engine_available = bool(engine_path) and os.path.exists(engine_path)
+    if not engine_available and not evaluator.NUMPY_AVAILABLE:
+        raise evaluator.EvaluatorUnavailable("Neither Stockfish nor the NumPy evaluator is available.")
+    if not engine_available:
+        print("Stockfish not found; every difficulty is played by the NumPy evaluator, as in the game.")
+    indexed = [(index, fen, operations) for index, (_, fen, operations) in enumerate(positions)]
+    chunks = [indexed[start:start + EPD_POSITIONS_PER_TASK] for start in range(0, len(indexed), EPD_POSITIONS_PER_TASK)]
+    workers = workers or min(os.cpu_count() or 1, len(chunks) * len(difficulties))
+    calibration = load_or_calibrate(engine_path) if engine_available else None
+    threads_cap = max(1, (os.cpu_count() or 1) // workers)
+
+    tasks = []
+    for difficulty in difficulties:
+        profile = resolve_profile(difficulty, calibration, threads_cap)
+        if seconds is not None:
+            profile.update(time=seconds, depth=None, nodes=None)
+        tasks.extend((difficulty, profile, seed, chunk) for chunk in chunks)
+
+    outcomes = {difficulty: [None] * len(positions) for difficulty in difficulties}
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_epd_worker, initargs=(engine_path,)) as pool:
+        for difficulty, results in pool.imap_unordered(_epd_task, tasks):
+            for index, solved, time_to_solve, move in results:
+                outcomes[difficulty][index] = {"id": positions[index][0], "solved": solved,
+                                               "time_to_solve": time_to_solve, "move": move}
+
+    summary = {}
+    for difficulty in difficulties:
+        results = outcomes[difficulty]
+        times = [result["time_to_solve"] for result in results if result["solved"]]
+        summary[difficulty] = {
+            "positions": len(results),
+            "solved": len(times),
+            "solve_rate": len(times) / len(results),
+            "mean_time_to_solve": statistics.fmean(times) if times else None,
+            "median_time_to_solve": statistics.median(times) if times else None,
+            "results": results,
+        }
+    print(f"EPD run finished in {time.perf_counter() - started:.1f}s with {workers} worker(s).")
+    return summary
+
+
+def print_epd(summary, verbose=False):
+    for difficulty, stats in summary.items():
+        mean = f"{stats['mean_time_to_solve']:.3f}s" if stats["mean_time_to_solve"] is not None else "-"
+        median = f"{stats['median_time_to_solve']:.3f}s" if stats["median_time_to_solve"] is not None else "-"
+        print(f"{difficulty:<11} {stats['solved']:>4}/{stats['positions']:<4} solved ({stats['solve_rate']:6.1%})  "
+              f"time to solve: mean {mean}, median {median}")
+        if verbose:
+            for result in stats["results"]:
+                if not result["solved"]:
+                    print(f"    failed {result['id']}: played {result['move']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft and EPD test-suite runner")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    perft_parser = subparsers.add_parser("perft", help="count move-tree nodes and measure nodes/sec")
+    perft_parser.add_argument("--depth", type=int, default=PERFT_DEFAULT_DEPTH)
+    perft_parser.add_argument("--generator", action="append", choices=sorted(MOVE_GENERATORS),
+                              help="generator to test (repeatable; default: all)")
+    perft_parser.add_argument("--fen", help="run a divide on this position instead of the standard set")
+    epd_parser = subparsers.add_parser("epd", help="run bm/am test suites at each difficulty")
+    epd_parser.add_argument("files", nargs="+")
+    epd_parser.add_argument("--difficulty", action="append", choices=AI_DIFFICULTIES,
+                            help="difficulty to test (repeatable; default: all)")
+    epd_parser.add_argument("--seconds", type=float, help="search time per position instead of each profile's limits")
+    epd_parser.add_argument("--workers", type=int, default=None)
+    epd_parser.add_argument("--seed", type=int, default=0)
+    epd_parser.add_argument("--verbose", action="store_true", help="list the failed positions")
+    for subparser in (perft_parser, epd_parser):
+        subparser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+    if args.command == "perft" and args.depth < 1:
+        parser.error("--depth must be at least 1")
+
+    if args.command == "perft":
+        if args.fen:
+            for generator_name in args.generator or list(MOVE_GENERATORS):
+                counts = perft_divide(MOVE_GENERATORS[generator_name](args.fen), args.depth)
+                print(f"{generator_name}:")
+                for uci, nodes in sorted(counts.items()):
+                    print(f"  {uci}: {nodes}")
+                print(f"  total: {sum(counts.values())}")
+            return 0
+        results = run_perft(args.depth, args.generator)
+        print_perft(results)
+        exit_code = 0 if all(result["ok"] for result in results) else 1
+    else:
+        results = run_epd(args.files, args.difficulty or AI_DIFFICULTIES, args.workers,
+                          seconds=args.seconds, seed=args.seed)
+        print_epd(results, args.verbose)
+        exit_code = 0
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
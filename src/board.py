@@ -5,9 +5,9 @@ import sys
 import math 
 import time 
 import os 
-from src.constants import (ROWS, COLS, SQUARE_SIZE, BOARD_WIDTH, BOARD_HEIGHT, SIDE_PANEL_WIDTH,
-                           WIDTH, HEIGHT,
-                           LIGHT_SQUARE, DARK_SQUARE, SELECTED_SQUARE_HIGHLIGHT_COLOR, 
+import collections
+from src.constants import (ROWS, COLS, SQUARE_SIZE, WIDTH, HEIGHT, WINDOW_RESIZE_DEBOUNCE_MS,
+                           SELECTED_SQUARE_HIGHLIGHT_COLOR, 
                            VALID_MOVE_DOT_COLOR, 
                            BLACK, CHECK_HIGHLIGHT_COLOR, 
                            SIDE_PANEL_BG_COLOR, TEXT_COLOR, OVERLAY_TEXT_COLOR, GAME_OVER_BG_COLOR, TEXT_OVERLAY_BG_COLOR,
@@ -19,13 +19,30 @@ from src.constants import (ROWS, COLS, SQUARE_SIZE, BOARD_WIDTH, BOARD_HEIGHT, S
                            FONT_NAME, STATUS_FONT_SIZE, BUTTON_FONT_SIZE, GAME_OVER_FONT_SIZE, CONFIRM_MSG_FONT_SIZE,
                            OVERLAY_TITLE_FONT_SIZE, OVERLAY_BODY_FONT_SIZE, OVERLAY_LINE_SPACING,
                            PROMOTION_CHOICE_FONT_SIZE, PROMOTION_BUTTON_WIDTH, PROMOTION_BUTTON_HEIGHT, 
-                           MODE_PVP, MODE_PVA, AI_DIFFICULTIES, STOCKFISH_SKILL_LEVELS,
+                           MOVE_LIST_FONT_SIZE, MOVE_LIST_ROW_HEIGHT, MOVE_LIST_HIGHLIGHT_COLOR,
+                           MOVE_LIST_ROW_CACHE_SIZE, MOVE_LIST_SCROLL_ROWS, 
+                           MODE_PVP, MODE_PVA, MODE_ONLINE, MODE_PUZZLE, AI_DIFFICULTIES,
                            DEFAULT_GAME_MODE, DEFAULT_AI_DIFFICULTY, PLAYER_PLAYS_AS_WHITE,
-                           ANIMATION_SPEED, STOCKFISH_PATH,
-                           RULES_FILENAME, ABOUT_FILENAME, TEXT_FILE_PATH, 
+                           ANIMATION_SPEED, DRAG_START_DISTANCE, STOCKFISH_PATH, ENGINE_CLEAR_HASH_ON_RESTART,
+                           RULES_FILENAME, ABOUT_FILENAME, SAVE_GAME_PATH,
+                           EXPLORER_INDEX_PATH, EXPLORER_PANEL_ROWS,
+                           PUZZLE_DATABASE_PATH, PUZZLE_RATINGS, PUZZLE_REPLY_DELAY_MS, EVALUATOR_DIFFICULTIES,
                            OVERLAY_NONE, OVERLAY_RULES, OVERLAY_ABOUT, OVERLAY_AI_CONFIRM) 
-from src.assets_manager import get_piece_image, play_sound
+from src.assets_manager import get_piece_images
+from src.audio import play_sound, mark_input, end_input
+from src.asset_bundle import read_text_asset
+from src.board_render import board_layer, draw_square_overlay, draw_pieces, advance_animation
 from src.ui_elements import Button
+from src.window import board_layout, clamp_window_size
+from src.game_logic import TerminationTracker
+from src.game_record import GameRecord, GameRecordError, save_game, load_game
+from src.history import MoveHistory
+from src.net_client import NetClient
+from src.engine_service import PRIORITY_HIGH, EngineQueueFull, EngineServiceError
+from src.engine_tuning import load_or_calibrate, resolve_profile, apply_profile, choose_move
+from src.opening_explorer import OpeningExplorer
+from src.puzzles import PuzzleStore, PuzzleTrainer
+from src import evaluator
 import chess
 import chess.engine
 
@@ -33,14 +50,28 @@ AI_MOVE_EVENT = pygame.USEREVENT + 1
 
 
 class Board:
-    def __init__(self):
+    def __init__(self, engine_service=None, game_database=None, scripted_ai_moves=None):
         # ... (most __init__ variables remain the same) ...
         self.chess_board = chess.Board()
+        self.termination = TerminationTracker(self.chess_board)
+        self.history = MoveHistory(self.termination)
         self.visual_board = [[None for _ in range(COLS)] for _ in range(ROWS)]
         self._sync_visual_board()
 
         self.selected_square_coords = None
         self.valid_moves_coords = []
+        self.move_table = {} # (row, col) -> legal target coords, for the legal-move list below
+        self.move_table_source = None
+
+        # Drag-and-drop: a pressed piece becomes a drag once the mouse moves DRAG_START_DISTANCE
+        self.drag_coords = None
+        self.drag_press_pos = None
+        self.drag_pos = None
+        self.drag_deselect_on_release = False
+        self.is_dragging = False
+        self.drag_snapshot = None # The frame without the dragged piece, redrawn only when the scene changes
+        self.drag_snapshot_key = None
+        self.drag_sprite_rect = None
 
         self.game_over = False
         self.game_over_message = ""
@@ -69,7 +100,30 @@ class Board:
         self.promoting_pawn_color_is_white = True
 
         self.stockfish_engine = None
+        self.engine_service = engine_service # Shared EngineScheduler; replaces the per-Board engine
+        self.engine_future = None
+        self.engine_future_generation = 0
+        self.engine_calibration = None
+        self.engine_applied_options = {} # Options already sent to self.stockfish_engine
+        self.engine_game_token = object() # A new token makes python-chess send ucinewgame
         self.ai_is_thinking = False 
+        self.engine_generation = 0 # Bumped whenever pending engine work is cancelled
+        self.scripted_ai_moves = scripted_ai_moves # Deque of recorded AI moves played instead of searching (event replays)
+        self.ai_move_recorder = None # Called with every PvA AI move (event recordings)
+
+        self.game_database = game_database # GameDatabase that finished games are stored in
+        self.game_needs_recording = False
+
+        self.puzzle_store = PuzzleStore.open_if_exists(PUZZLE_DATABASE_PATH) # Puzzle mode needs imported puzzles
+        self.puzzle_trainer = None
+        self.current_puzzle = None
+        self.puzzle_feedback = ""
+
+        self.net_client = None
+        self.net_game_id = None
+        self.net_color = None # None while connecting, or when only watching
+        self.net_inbox = []
+        self.pending_move_from_network = False
         self._init_stockfish_engine() 
 
         try:
@@ -81,6 +135,7 @@ class Board:
             self.overlay_title_font = pygame.font.SysFont(FONT_NAME, OVERLAY_TITLE_FONT_SIZE, bold=True)
             self.overlay_body_font = pygame.font.SysFont(FONT_NAME, OVERLAY_BODY_FONT_SIZE)
             self.promotion_font = pygame.font.SysFont(FONT_NAME, PROMOTION_CHOICE_FONT_SIZE, bold=True)
+            self.move_list_font = pygame.font.SysFont(FONT_NAME, MOVE_LIST_FONT_SIZE)
         except Exception as e:
             print(f"Error initializing fonts: {e}. Using default font.")
             self.status_font = pygame.font.Font(None, STATUS_FONT_SIZE)
@@ -89,6 +144,7 @@ class Board:
             self.overlay_title_font = pygame.font.Font(None, OVERLAY_TITLE_FONT_SIZE)
             self.overlay_body_font = pygame.font.Font(None, OVERLAY_BODY_FONT_SIZE)
             self.promotion_font = pygame.font.Font(None, PROMOTION_CHOICE_FONT_SIZE)
+            self.move_list_font = pygame.font.Font(None, MOVE_LIST_FONT_SIZE)
 
 
         self.buttons = []
@@ -98,18 +154,41 @@ class Board:
         self.overlay_close_button = None 
         self.ai_confirm_start_button = None 
 
-        self._setup_buttons() 
         self.show_restart_confirmation = False 
+        self.opening_explorer = OpeningExplorer.open_if_exists(EXPLORER_INDEX_PATH)
+        self.explorer_position_key = None
+        self.explorer_rows = [] # (SAN, games, white score) for the current position
+        self.move_list_first_row = None # Set by the mouse wheel; None follows the current ply
+        self.move_list_scroll_cursor = None # The ply the list was scrolled at; moving on follows again
+        self.move_list_row_surfaces = collections.OrderedDict() # Rendered rows, least recently drawn first
+        self.pointer_pos = (0, 0) # From mouse motion events, so replays see the same position
+
+        # Layout follows the window (see set_window_size); piece sprites lag behind during a live resize
+        surface = pygame.display.get_surface()
+        self.window_size = clamp_window_size(*(surface.get_size() if surface else (WIDTH, HEIGHT)))
+        self.board_size, self.square_size = board_layout(*self.window_size)
+        self.piece_sprite_size = self.square_size
+        self.pending_sprite_size = None
+        self.sprite_rebuild_at = 0
+        self._setup_buttons() 
         self._update_status_message()
 
     def _init_stockfish_engine(self):
+        if self.engine_service:
+            print("Using the shared engine service for AI moves.")
+            return
+        if self.scripted_ai_moves is not None:
+            print("Replaying recorded AI moves; no engine needed.")
+            return
         if STOCKFISH_PATH and os.path.exists(STOCKFISH_PATH):
             try:
                 self.stockfish_engine = chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH)
                 print(f"Stockfish engine initialized successfully from: {STOCKFISH_PATH}")
-                skill = STOCKFISH_SKILL_LEVELS.get(self.current_ai_difficulty, STOCKFISH_SKILL_LEVELS["Medium"]) 
-                self.stockfish_engine.configure({"Skill Level": skill})
-                print(f"Stockfish initial skill level set to: {skill} ({self.current_ai_difficulty})")
+                if self.engine_calibration is None:
+                    self.engine_calibration = load_or_calibrate(STOCKFISH_PATH)
+                self.engine_applied_options = {}
+                profile = self._apply_engine_profile()
+                print(f"Stockfish initial profile set to: {profile['options']} ({self.current_ai_difficulty})")
             except Exception as e:
                 print(f"Error initializing Stockfish engine: {e}")
                 self.stockfish_engine = None
@@ -120,67 +199,43 @@ class Board:
                  print("STOCKFISH_PATH not configured. AI will not be available.")
             self.stockfish_engine = None
 
+    def _apply_engine_profile(self):
+        """Sends the current difficulty's Threads/Hash/Skill settings, skipping unchanged ones."""
+        profile = resolve_profile(self.current_ai_difficulty, self.engine_calibration)
+        apply_profile(self.stockfish_engine, profile, self.engine_applied_options)
+        return profile
+
     def _setup_buttons(self):
-        self.buttons = []
-        panel_x = BOARD_WIDTH + 20
-        button_width = SIDE_PANEL_WIDTH - 40
+        """Creates the buttons; _layout_buttons places them for the current window size."""
         button_height = 40
-        spacing = 15
-        
-        current_y = 30 
-        current_y += 30 
-
-        self.restart_button = Button(panel_x, current_y, button_width, button_height,
-                                     text="Restart Game", action=self._handle_restart_click)
-        self.buttons.append(self.restart_button)
-        current_y += button_height + spacing
-
-        self.game_mode_button = Button(panel_x, current_y, button_width, button_height,
-                                       text=f"Mode: {self.game_mode}", action=self._toggle_game_mode)
-        self.buttons.append(self.game_mode_button)
-        current_y += button_height + spacing
-
+        self.restart_button = Button(0, 0, 0, button_height, text="Restart Game", action=self._handle_restart_click)
+        self.game_mode_button = Button(0, 0, 0, button_height, text=f"Mode: {self.game_mode}",
+                                       action=self._toggle_game_mode)
         player_color_text = "Play as: White" if self.player_is_white else "Play as: Black"
-        self.player_color_button = Button(panel_x, current_y, button_width, button_height,
-                                           text=player_color_text, action=self._toggle_player_color)
-        self.buttons.append(self.player_color_button)
-        current_y += button_height + spacing
-        
-        self.ai_difficulty_button = Button(panel_x, current_y, button_width, button_height,
-                                           text="AI Difficulty", action=self._cycle_ai_difficulty)
-        self.buttons.append(self.ai_difficulty_button)
-        current_y += button_height + spacing
-
-        # ADDED _handle_undo_click as action
-        self.undo_button = Button(panel_x, current_y, button_width, button_height,
-                                  text="Undo", action=self._handle_undo_click)
-        self.buttons.append(self.undo_button)
-        
-        exit_button_y = HEIGHT - button_height - 30 
-        about_button_y = exit_button_y - button_height - spacing
-        rules_button_y = about_button_y - button_height - spacing
-
-        self.rules_button = Button(panel_x, rules_button_y, button_width, button_height,
-                                   text="Game Rules", action=self._show_rules_overlay)
-        self.buttons.append(self.rules_button)
-        
-        self.about_button = Button(panel_x, about_button_y, button_width, button_height,
-                                   text="About Game", action=self._show_about_overlay)
-        self.buttons.append(self.about_button)
-
-        self.exit_button = Button(panel_x, exit_button_y, button_width, button_height,
-                                  text="Exit Game", action=self._handle_exit_click)
-        self.buttons.append(self.exit_button) 
+        self.player_color_button = Button(0, 0, 0, button_height, text=player_color_text,
+                                          action=self._toggle_player_color)
+        self.ai_difficulty_button = Button(0, 0, 0, button_height, text="AI Difficulty",
+                                           action=self._cycle_ai_difficulty)
+        self.undo_button = Button(0, 0, 0, button_height, text="Undo", action=self._handle_undo_click)
+        self.redo_button = Button(0, 0, 0, button_height, text="Redo", action=self._handle_redo_click)
+        self.save_button = Button(0, 0, 0, button_height, text="Save", action=self._handle_save_click)
+        self.load_button = Button(0, 0, 0, button_height, text="Load", action=self._handle_load_click)
+        self.rules_button = Button(0, 0, 0, button_height, text="Game Rules", action=self._show_rules_overlay)
+        self.about_button = Button(0, 0, 0, button_height, text="About Game", action=self._show_about_overlay)
+        self.exit_button = Button(0, 0, 0, button_height, text="Exit Game", action=self._handle_exit_click)
+        self.buttons = [self.restart_button, self.game_mode_button, self.player_color_button, self.ai_difficulty_button,
+                        self.undo_button, self.redo_button, self.save_button, self.load_button,
+                        self.rules_button, self.about_button, self.exit_button]
+        self.move_list_click_targets = [] # (rect, ply) pairs from the last draw
 
         self._update_player_color_button_state() 
         self._update_ai_difficulty_button_state()
         self._update_undo_button_state() 
 
-        confirm_btn_y = BOARD_HEIGHT // 2 + 20 
-        self.confirm_yes_button = Button(BOARD_WIDTH // 2 - 110, confirm_btn_y, 100, 40, "Yes",
+        self.confirm_yes_button = Button(0, 0, 100, 40, "Yes",
                                          color=BUTTON_WARN_COLOR, hover_color=BUTTON_WARN_HOVER_COLOR,
                                          text_color=BUTTON_TEXT_COLOR, action=self.restart_game)
-        self.confirm_no_button = Button(BOARD_WIDTH // 2 + 10, confirm_btn_y, 100, 40, "No",
+        self.confirm_no_button = Button(0, 0, 100, 40, "No",
                                         color=BUTTON_COLOR, hover_color=BUTTON_HOVER_COLOR,
                                         text_color=BUTTON_TEXT_COLOR, action=self._cancel_restart_confirmation)
         
@@ -194,18 +249,51 @@ class Board:
         ]
 
         self.ai_confirm_start_button = Button(
-            BOARD_WIDTH // 2 - 75, BOARD_HEIGHT // 2 + 60, 150, 50, "Start Game",
+            0, 0, 150, 50, "Start Game",
             color=BUTTON_PLAY_COLOR, hover_color=BUTTON_PLAY_HOVER_COLOR,
             action=self._handle_ai_confirm_start_click
         )
+        self._layout_buttons()
+
+    def _layout_buttons(self):
+        """Positions the side panel (buttons, move list, explorer) and the dialog buttons for the window size."""
+        panel_x = self.board_size + 20
+        button_width = self.window_size[0] - self.board_size - 40
+        button_height = 40
+        spacing = 15
+        half_button_width = (button_width - 10) // 2
+        
+        current_y = 30 
+        current_y += 30 
+        for button in (self.restart_button, self.game_mode_button, self.player_color_button, self.ai_difficulty_button):
+            button.rect = pygame.Rect(panel_x, current_y, button_width, button_height)
+            current_y += button_height + spacing
+        for left, right in ((self.undo_button, self.redo_button), (self.save_button, self.load_button)):
+            left.rect = pygame.Rect(panel_x, current_y, half_button_width, button_height)
+            right.rect = pygame.Rect(panel_x + half_button_width + 10, current_y, half_button_width, button_height)
+            current_y += button_height + spacing
+        
+        exit_button_y = self.window_size[1] - button_height - 30 
+        about_button_y = exit_button_y - button_height - spacing
+        rules_button_y = about_button_y - button_height - spacing
+        self.rules_button.rect = pygame.Rect(panel_x, rules_button_y, button_width, button_height)
+        self.about_button.rect = pygame.Rect(panel_x, about_button_y, button_width, button_height)
+        self.exit_button.rect = pygame.Rect(panel_x, exit_button_y, button_width, button_height)
+
+        explorer_height = (EXPLORER_PANEL_ROWS + 1) * MOVE_LIST_ROW_HEIGHT if self.opening_explorer else 0
+        self.explorer_rect = pygame.Rect(panel_x, rules_button_y - spacing - explorer_height, button_width, explorer_height)
+        self.move_list_rect = pygame.Rect(panel_x, current_y, button_width, max(0, self.explorer_rect.top - current_y))
+
+        confirm_btn_y = self.board_size // 2 + 20 
+        self.confirm_yes_button.rect.topleft = (self.board_size // 2 - 110, confirm_btn_y)
+        self.confirm_no_button.rect.topleft = (self.board_size // 2 + 10, confirm_btn_y)
+        self.ai_confirm_start_button.rect.topleft = (self.board_size // 2 - 75, self.board_size // 2 + 60)
 
     def _load_text_file_content(self, filename):
         title = "Error"
         paragraphs = ["Could not load content."]
         try:
-            filepath = os.path.join(TEXT_FILE_PATH, filename)
-            with open(filepath, 'r', encoding='utf-8') as f:
-                lines = [line.strip() for line in f.readlines()]
+            lines = [line.strip() for line in read_text_asset(filename).splitlines()]
             if lines:
                 title = lines[0]
                 paragraphs = []
@@ -224,7 +312,7 @@ class Board:
                 elif not paragraphs and len(lines) == 1: 
                      paragraphs.append("(No additional content)")
         except FileNotFoundError:
-            print(f"Error: Text file not found: {filepath}") 
+            print(f"Error: Text file not found: {filename}") 
             title = f"File Not Found: {filename}"
         except Exception as e:
             print(f"Error reading text file {filename}: {e}")
@@ -256,12 +344,13 @@ class Board:
 
     def _toggle_game_mode(self):
         play_sound('button_click') 
+        self.record_current_game() # Before the mode changes, so the game is stored under its own mode
         if self.game_mode == MODE_PVP:
             self.game_mode = MODE_PVA
             if not self.stockfish_engine: 
                 self._init_stockfish_engine()
         else: 
-            self.game_mode = MODE_PVP
+            self.game_mode = MODE_PUZZLE if self.game_mode == MODE_PVA and self.puzzle_store else MODE_PVP
             pygame.time.set_timer(AI_MOVE_EVENT, 0) 
             self.ai_is_thinking = False 
 
@@ -274,6 +363,7 @@ class Board:
     def _toggle_player_color(self):
         if self.game_mode == MODE_PVA: 
             play_sound('button_click')
+            self.record_current_game()
             self.player_is_white = not self.player_is_white
             player_color_text = "Play as: White" if self.player_is_white else "Play as: Black"
             self.player_color_button.update_text(player_color_text)
@@ -292,32 +382,37 @@ class Board:
 
 
     def _cycle_ai_difficulty(self):
-        if self.game_mode == MODE_PVA:
+        if self.game_mode in (MODE_PVA, MODE_PUZZLE):
             play_sound('button_click') 
             self.ai_difficulty_index = (self.ai_difficulty_index + 1) % len(AI_DIFFICULTIES)
             self.current_ai_difficulty = AI_DIFFICULTIES[self.ai_difficulty_index]
             self.ai_difficulty_button.update_text(f"AI: {self.current_ai_difficulty}")
             
             if self.stockfish_engine: 
-                skill = STOCKFISH_SKILL_LEVELS.get(self.current_ai_difficulty, STOCKFISH_SKILL_LEVELS["Medium"]) 
                 try:
-                    self.stockfish_engine.configure({"Skill Level": skill})
-                    print(f"Stockfish skill level updated to: {skill} ({self.current_ai_difficulty})")
+                    profile = self._apply_engine_profile()
+                    print(f"Stockfish profile updated to: {profile['options']} ({self.current_ai_difficulty})")
                 except Exception as e:
-                    print(f"Error configuring Stockfish skill level: {e}")
+                    print(f"Error configuring Stockfish profile: {e}")
+            if self.game_mode == MODE_PUZZLE:
+                self.ai_difficulty_button.update_text(f"Puzzles: {self.current_ai_difficulty}")
+                self.puzzle_trainer.set_rating(PUZZLE_RATINGS[self.current_ai_difficulty])
             print(f"AI difficulty changed to: {self.current_ai_difficulty}")
 
     def _update_ai_difficulty_button_state(self):
         if self.game_mode == MODE_PVA:
             self.ai_difficulty_button.set_enabled(True)
             self.ai_difficulty_button.update_text(f"AI: {self.current_ai_difficulty}")
+        elif self.game_mode == MODE_PUZZLE:
+            self.ai_difficulty_button.set_enabled(True)
+            self.ai_difficulty_button.update_text(f"Puzzles: {self.current_ai_difficulty}")
         else:
             self.ai_difficulty_button.set_enabled(False)
             self.ai_difficulty_button.update_text("AI Difficulty (PvP)")
 
     def _handle_restart_click(self):
         play_sound('button_click') 
-        if not self.game_over and self.chess_board.move_stack:
+        if not self.game_over and self.chess_board.move_stack and self.game_mode != MODE_PUZZLE:
             self.show_restart_confirmation = True
         else:
             self.restart_game()
@@ -338,74 +433,202 @@ class Board:
         pygame.time.set_timer(AI_MOVE_EVENT, 100) 
         print("AI first move confirmed by player.")
 
-    # --- ADDED UNDO LOGIC ---
+    # --- UNDO / REDO / HISTORY NAVIGATION ---
+    def _can_navigate_history(self):
+        return self.game_mode not in (MODE_ONLINE, MODE_PUZZLE) and not self.is_animating and not self.is_awaiting_promotion and \
+               self.active_overlay_type == OVERLAY_NONE and not self.show_restart_confirmation
+
+    def _cancel_engine_work(self):
+        """Cancels a scheduled AI move so navigation starts from a clean state."""
+        pygame.time.set_timer(AI_MOVE_EVENT, 0)
+        self.ai_is_thinking = False
+        self.engine_generation += 1
+        if hasattr(self, 'pending_move_for_ai'):
+            del self.pending_move_for_ai
+        if self.engine_future is not None:
+            self.engine_future.cancel()
+            self.engine_future = None
+            self.engine_service.cancel_session(id(self))
+
+    def _is_human_turn_at_ply(self, ply):
+        human_player_color = chess.WHITE if self.player_is_white else chess.BLACK
+        return self.history.turn_at(ply) == human_player_color
+
     def _handle_undo_click(self):
         """Handles the undo move button click."""
-        if self.is_animating or self.ai_is_thinking or self.is_awaiting_promotion or self.game_over:
+        if not self._can_navigate_history() or not self.history.can_undo():
             print("Cannot undo at this time.")
             return
+        play_sound('button_click') 
 
-        if self.chess_board.move_stack:
-            play_sound('button_click') 
-            
-            moves_to_undo = 1
-            if self.game_mode == MODE_PVA:
-                ai_color = chess.BLACK if self.player_is_white else chess.WHITE
-                human_player_color = chess.WHITE if self.player_is_white else chess.BLACK
-                
-                # If it's human's turn now, it means AI made the last move.
-                # We want to undo both AI's move and player's preceding move.
-                if self.chess_board.turn == human_player_color and len(self.chess_board.move_stack) >= 2:
-                     moves_to_undo = 2
-                # If it's AI's turn now, it means human made the last move. Undo 1.
-                # (This is covered by moves_to_undo = 1 default)
-            
-            print(f"Attempting to undo {moves_to_undo} half-move(s).")
-            for _ in range(moves_to_undo):
-                if self.chess_board.move_stack:
-                    self.chess_board.pop()
-                else:
-                    break 
+        target_ply = self.history.cursor - 1
+        if self.game_mode == MODE_PVA:
+            # Step back past the AI's reply to the human's previous turn.
+            while target_ply > 0 and not self._is_human_turn_at_ply(target_ply):
+                target_ply -= 1
+        print(f"Undoing to ply {target_ply}.")
+        self.jump_to_ply(target_ply)
+
+    def _handle_redo_click(self):
+        """Handles the redo move button click."""
+        if not self._can_navigate_history() or not self.history.can_redo():
+            print("Cannot redo at this time.")
+            return
+        play_sound('button_click')
 
-            self._sync_visual_board()
-            self.selected_square_coords = None
-            self.valid_moves_coords = []
-            self.king_in_check_coords = None
-            self.game_over = False 
-            self.game_over_message = ""
-            self.ai_is_thinking = False 
-            pygame.time.set_timer(AI_MOVE_EVENT, 0) 
-            self._update_status_message() 
-            self._check_game_over() # Re-check game over state (unlikely to be over after undo)
-            self._update_undo_button_state() 
-            print("Move(s) undone.")
+        target_ply = self.history.cursor + 1
+        if self.game_mode == MODE_PVA:
+            while target_ply < len(self.history) and not self._is_human_turn_at_ply(target_ply):
+                target_ply += 1
+        print(f"Redoing to ply {target_ply}.")
+        self.jump_to_ply(target_ply)
+
+    def jump_to_ply(self, ply):
+        """Moves the game to any ply of the main line, restoring the stored snapshot for that ply."""
+        if not self._can_navigate_history():
+            return
+        self._cancel_engine_work()
+        if self.game_mode == MODE_PVA and ply < len(self.history) and not self._is_human_turn_at_ply(ply):
+            ply += 1 # Show the AI's stored reply rather than asking the engine again
+        snapshot = self.history.jump_to(ply)
 
-            # If after undo, it's AI's turn, trigger AI move
-            ai_color_after_undo = chess.BLACK if self.player_is_white else chess.WHITE
-            if self.game_mode == MODE_PVA and self.chess_board.turn == ai_color_after_undo and \
-               not self.is_animating and not self.game_over:
-                self.ai_is_thinking = True
-                self._update_status_message()
-                pygame.time.set_timer(AI_MOVE_EVENT, 500)
-        else:
-            print("No moves to undo.")
+        snapshot.fill_visual_board(self.visual_board)
+        self.selected_square_coords = None
+        self.valid_moves_coords = []
+        self.game_over = False 
+        self.game_over_message = ""
+        self._update_status_message() 
+        self._check_game_over()
+        self._update_undo_button_state() 
+
+        ai_color = chess.BLACK if self.player_is_white else chess.WHITE
+        if self.game_mode == MODE_PVA and self.chess_board.turn == ai_color and not self.game_over:
+            self.ai_is_thinking = True
+            self._update_status_message()
+            pygame.time.set_timer(AI_MOVE_EVENT, 500)
+
+    def _handle_move_list_click(self, pos):
+        if not self.move_list_rect.collidepoint(pos):
+            return False
+        for rect, ply in self.move_list_click_targets:
+            if rect.collidepoint(pos):
+                if ply != self.history.cursor and self._can_navigate_history():
+                    play_sound('button_click')
+                    self.jump_to_ply(ply)
+                    if self.move_list_first_row is not None:
+                        self.move_list_scroll_cursor = self.history.cursor # Keep the scrolled view
+                return True
+        return True
 
     def _update_undo_button_state(self):
-        """Enables or disables the undo button."""
+        """Enables or disables the history and game-management buttons."""
         if hasattr(self, 'undo_button'): 
-            can_undo = bool(self.chess_board.move_stack) and \
-                       not self.is_animating and \
-                       not self.ai_is_thinking and \
-                       not self.is_awaiting_promotion and \
-                       not self.game_over and \
-                       self.active_overlay_type == OVERLAY_NONE and \
-                       not self.show_restart_confirmation
-            self.undo_button.set_enabled(can_undo)
-    # --- END OF ADDED UNDO LOGIC ---
+            can_navigate = self._can_navigate_history()
+            self.undo_button.set_enabled(can_navigate and self.history.can_undo())
+            self.redo_button.set_enabled(can_navigate and self.history.can_redo())
+        if hasattr(self, 'save_button'):
+            is_idle = not self.is_animating and not self.is_awaiting_promotion and \
+                      self.active_overlay_type == OVERLAY_NONE and not self.show_restart_confirmation
+            self.save_button.set_enabled(bool(self.chess_board.move_stack) and is_idle)
+            self.load_button.set_enabled(is_idle and not self.ai_is_thinking and
+                                         self.game_mode not in (MODE_ONLINE, MODE_PUZZLE))
+        if hasattr(self, 'game_mode_button'):
+            self.game_mode_button.set_enabled(self.game_mode != MODE_ONLINE)
+            self.restart_button.set_enabled(self.game_mode != MODE_ONLINE)
+            self.restart_button.update_text("Next Puzzle" if self.game_mode == MODE_PUZZLE else "Restart Game")
+    # --- END OF UNDO / REDO / HISTORY NAVIGATION ---
+
+    # --- Save / Load ---
+    def _handle_save_click(self):
+        play_sound('button_click')
+        self.save_game()
+
+    def _handle_load_click(self):
+        play_sound('button_click')
+        self.load_game()
+
+    def _game_metadata(self):
+        human_color = "White" if self.player_is_white else "Black"
+        metadata = {"Event": "The Unbeatable Chess", "Mode": self.game_mode}
+        if self.game_mode == MODE_PVA:
+            ai_name = f"AI ({self.current_ai_difficulty})"
+            metadata.update({"AIDifficulty": self.current_ai_difficulty, "PlayerColor": human_color,
+                             "White": "Player" if self.player_is_white else ai_name,
+                             "Black": ai_name if self.player_is_white else "Player"})
+        return metadata
+
+    def record_current_game(self):
+        """Queues the current game for the game database (once per game, if it has moves)."""
+        if self.game_database and self.game_needs_recording and self.chess_board.move_stack and \
+                self.game_mode != MODE_PUZZLE:
+            self.game_database.record_game(self.chess_board, self._game_metadata())
+        self.game_needs_recording = False
+
+    def save_game(self, path=SAVE_GAME_PATH):
+        record = GameRecord.from_board(self.chess_board, metadata=self._game_metadata())
+        try:
+            save_game(path, record)
+            print(f"Game saved to {path} ({len(record)} plies, {record.size_in_bytes} bytes).")
+            return True
+        except OSError as e:
+            print(f"Error saving game to {path}: {e}")
+            return False
+
+    def load_game(self, path=SAVE_GAME_PATH):
+        try:
+            record = load_game(path)
+            moves = record.moves
+        except FileNotFoundError:
+            print(f"No saved game found at {path}.")
+            return False
+        except (OSError, GameRecordError, ValueError) as e:
+            print(f"Error loading saved game from {path}: {e}")
+            return False
+
+        self.record_current_game()
+        mode = record.metadata.get("Mode")
+        if mode in (MODE_PVP, MODE_PVA):
+            self.game_mode = mode
+        if self.game_mode == MODE_PVA:
+            difficulty = record.metadata.get("AIDifficulty")
+            if difficulty in AI_DIFFICULTIES:
+                self.ai_difficulty_index = AI_DIFFICULTIES.index(difficulty)
+                self.current_ai_difficulty = difficulty
+            self.player_is_white = record.metadata.get("PlayerColor", "White") == "White"
+            if not self.stockfish_engine:
+                self._init_stockfish_engine()
+        self.game_mode_button.update_text(f"Mode: {self.game_mode}")
+        self._update_ai_difficulty_button_state()
+        self._update_player_color_button_state()
+
+        self.restart_game()
+        self.active_overlay_type = OVERLAY_NONE
+        try:
+            self.history.reset(record.start_fen)
+            for move in moves:
+                self.history.push(move)
+        except (ValueError, AssertionError) as e:
+            print(f"Saved game contains an invalid position or move: {e}")
+            self.restart_game()
+            return False
+
+        self._sync_visual_board()
+        self._update_status_message()
+        self._check_game_over()
+        self._update_undo_button_state()
+        print(f"Game loaded from {path} ({len(moves)} plies).")
+
+        ai_color = chess.BLACK if self.player_is_white else chess.WHITE
+        if self.game_mode == MODE_PVA and self.chess_board.turn == ai_color and not self.game_over:
+            self.ai_is_thinking = True
+            self._update_status_message()
+            pygame.time.set_timer(AI_MOVE_EVENT, 500)
+        return True
 
 
     def restart_game(self):
-        self.chess_board.reset()
+        self.record_current_game()
+        self.history.reset()
         self._sync_visual_board()
         self.selected_square_coords = None
         self.valid_moves_coords = []
@@ -416,9 +639,13 @@ class Board:
         self.is_animating = False 
         self.animating_piece_surface = None
         self.king_in_check_coords = None 
-        self.ai_is_thinking = False 
         self.is_awaiting_promotion = False
-        pygame.time.set_timer(AI_MOVE_EVENT, 0) 
+        self._cancel_engine_work()
+        if ENGINE_CLEAR_HASH_ON_RESTART:
+            self.engine_game_token = object()
+        self.current_puzzle = None
+        if self.game_mode == MODE_PUZZLE:
+            self._start_next_puzzle()
         self._update_status_message()
         self._update_undo_button_state() 
         print("Game restarted.")
@@ -430,12 +657,7 @@ class Board:
                 self._update_status_message() 
         
     def _sync_visual_board(self):
-        for r in range(ROWS):
-            for c in range(COLS):
-                sq_index = self._coords_to_chess_sq(r, c)
-                piece = self.chess_board.piece_at(sq_index)
-                self.visual_board[r][c] = (f"{'w' if piece.color == chess.WHITE else 'b'}{piece.symbol().upper()}"
-                                           if piece else None)
+        self.history.current.fill_visual_board(self.visual_board)
     def _coords_to_chess_sq(self, row, col):
         return chess.square(col, ROWS - 1 - row)
 
@@ -445,12 +667,55 @@ class Board:
 
     def get_row_col_from_mouse(self, pos):
         x, y = pos
-        if 0 <= x < BOARD_WIDTH and 0 <= y < BOARD_HEIGHT:
-            row = y // SQUARE_SIZE
-            col = x // SQUARE_SIZE
+        if 0 <= x < self.board_size and 0 <= y < self.board_size:
+            row = y // self.square_size
+            col = x // self.square_size
             return row, col
         return None
 
+    def _board_rect(self):
+        return pygame.Rect(0, 0, self.board_size, self.board_size)
+
+    def _square_center(self, coords):
+        row, col = coords
+        return col * self.square_size + self.square_size // 2, row * self.square_size + self.square_size // 2
+
+    def _piece_image(self, piece_notation):
+        return get_piece_images(self.piece_sprite_size).get(piece_notation)
+
+    # --- Window Layout ---
+    def set_window_size(self, width, height, rebuild_delay_ms=0):
+        """
+        Lays the board, side panel and buttons out for a new window size. Piece sprites
+        are rescaled once no resize has arrived for rebuild_delay_ms (the old ones are
+        drawn centred on the new squares until then), so a live resize never stalls.
+        """
+        old_square_size = self.square_size
+        self.window_size = clamp_window_size(width, height)
+        self.board_size, self.square_size = board_layout(*self.window_size)
+        self._layout_buttons()
+        if self.square_size == old_square_size:
+            return
+        if self.is_animating and self.anim_current_pixel_pos:
+            scale = self.square_size / old_square_size
+            self.anim_current_pixel_pos = [self.anim_current_pixel_pos[0] * scale, self.anim_current_pixel_pos[1] * scale]
+            self.anim_end_pixel_pos = self._square_center(self.anim_target_coords)
+        if rebuild_delay_ms:
+            self.pending_sprite_size = self.square_size
+            self.sprite_rebuild_at = pygame.time.get_ticks() + rebuild_delay_ms
+        else:
+            self.piece_sprite_size = self.square_size
+            self.pending_sprite_size = None
+
+    def _update_sprite_size(self):
+        if self.pending_sprite_size and pygame.time.get_ticks() >= self.sprite_rebuild_at:
+            self.piece_sprite_size = self.pending_sprite_size
+            self.pending_sprite_size = None
+            if self.is_animating and self.anim_original_start_coords:
+                row, col = self.anim_original_start_coords
+                if self.visual_board[row][col]:
+                    self.animating_piece_surface = self._piece_image(self.visual_board[row][col])
+
 
     def handle_click_on_board_or_dialog(self, pos):
         if self.is_animating or (self.game_mode == MODE_PVA and self.ai_is_thinking and not self.active_overlay_type == OVERLAY_AI_CONFIRM): 
@@ -470,7 +735,7 @@ class Board:
                     chosen_piece_type = [chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT][i]
                     self._handle_promotion_choice(chosen_piece_type)
                     return True 
-            if pygame.Rect(0,0,BOARD_WIDTH, BOARD_HEIGHT).collidepoint(pos):
+            if self._board_rect().collidepoint(pos):
                  return True
 
 
@@ -493,16 +758,64 @@ class Board:
 
         board_coords = self.get_row_col_from_mouse(pos)
         if board_coords:
-            self.select_square(*board_coords)
+            if board_coords == self.selected_square_coords:
+                # Pressing the selected piece again drags it, or deselects it on a plain click
+                self._arm_drag(board_coords, pos, deselect_on_release=True)
+            else:
+                self.select_square(*board_coords)
+                if self.selected_square_coords == board_coords:
+                    self._arm_drag(board_coords, pos)
             return True 
         return False 
 
+    # --- Drag and Drop ---
+    def _arm_drag(self, coords, pos, deselect_on_release=False):
+        self.drag_coords = coords
+        self.drag_press_pos = pos
+        self.drag_pos = pos
+        self.drag_deselect_on_release = deselect_on_release
+        self.is_dragging = False
+
+    def _cancel_drag(self):
+        self.drag_coords = None
+        self.is_dragging = False
+        self.drag_snapshot = None
+        self.drag_snapshot_key = None
+        self.drag_sprite_rect = None
+
+    def _update_drag(self, event):
+        if not event.buttons[0]: # Released outside the window
+            self._cancel_drag()
+            return
+        self.drag_pos = event.pos
+        if not self.is_dragging and math.hypot(event.pos[0] - self.drag_press_pos[0],
+                                               event.pos[1] - self.drag_press_pos[1]) >= DRAG_START_DISTANCE:
+            self.is_dragging = True
+
+    def _end_drag(self, pos):
+        coords, dragged, deselect = self.drag_coords, self.is_dragging, self.drag_deselect_on_release
+        self._cancel_drag()
+        if not dragged:
+            if deselect:
+                self.select_square(*coords)
+            return
+        target = self.get_row_col_from_mouse(pos)
+        if target in self.valid_moves_coords:
+            self.move_piece(coords, target)
+            if self.is_animating: # A dropped piece lands where it was let go instead of sliding there
+                self.anim_current_pixel_pos = list(self.anim_end_pixel_pos)
+
     def select_square(self, row, col):
         if self.game_over or self.is_animating or self.ai_is_thinking or self.is_awaiting_promotion or self.active_overlay_type != OVERLAY_NONE: return
         
         human_player_chess_color = chess.WHITE if self.player_is_white else chess.BLACK
         if self.game_mode == MODE_PVA and self.chess_board.turn != human_player_chess_color:
             return 
+        if self.game_mode == MODE_ONLINE and (self.net_color is None or self.chess_board.turn != self.net_color):
+            return
+        if self.game_mode == MODE_PUZZLE and (self.current_puzzle is None or
+                                              self.chess_board.turn != self.current_puzzle.solver_color):
+            return
 
         clicked_chess_sq = self._coords_to_chess_sq(row, col)
         piece_at_clicked_sq = self.chess_board.piece_at(clicked_chess_sq)
@@ -540,12 +853,21 @@ class Board:
     def _calculate_valid_moves(self, row, col):
         self.valid_moves_coords = []
         if self.selected_square_coords is None: return
-        from_sq_chess = self._coords_to_chess_sq(row, col)
-        if self.chess_board.piece_at(from_sq_chess) is None: return
-        for move in self.chess_board.legal_moves:
-            if move.from_square == from_sq_chess:
+        self.valid_moves_coords = list(self._legal_move_table().get((row, col), ()))
+
+    def _legal_move_table(self):
+        """Legal target squares by origin square, built once per position (per legal-move list)."""
+        legal_moves = self.termination.legal_moves
+        if self.move_table_source is not legal_moves:
+            table = {}
+            for move in legal_moves:
+                targets = table.setdefault(self._chess_sq_to_coords(move.from_square), [])
                 to_coords = self._chess_sq_to_coords(move.to_square)
-                if to_coords: self.valid_moves_coords.append(to_coords)
+                if to_coords not in targets: # Promotions share a target square
+                    targets.append(to_coords)
+            self.move_table = table
+            self.move_table_source = legal_moves
+        return self.move_table
 
     def move_piece(self, from_coords, to_coords, is_ai_move=False): 
         if self.game_over or self.is_animating: return
@@ -560,7 +882,9 @@ class Board:
 
         is_player_promotion_opportunity = False
         is_human_turn_for_promo = (self.game_mode == MODE_PVP and piece_to_move.color == self.chess_board.turn) or \
-                                  (self.game_mode == MODE_PVA and piece_to_move.color == (chess.WHITE if self.player_is_white else chess.BLACK))
+                                  (self.game_mode == MODE_PVA and piece_to_move.color == (chess.WHITE if self.player_is_white else chess.BLACK)) or \
+                                  (self.game_mode == MODE_ONLINE and piece_to_move.color == self.net_color) or \
+                                  (self.game_mode == MODE_PUZZLE and piece_to_move.color == self.chess_board.turn)
 
         if not is_ai_move and is_human_turn_for_promo and piece_to_move.piece_type == chess.PAWN:
             if (piece_to_move.color == chess.WHITE and to_r == 0) or \
@@ -574,9 +898,9 @@ class Board:
             self.promoting_pawn_color_is_white = (piece_to_move.color == chess.WHITE)
             
             self.is_animating = True
-            self.animating_piece_surface = get_piece_image(self.visual_board[from_r][from_c])
-            self.anim_start_pixel_pos = (from_c * SQUARE_SIZE + SQUARE_SIZE // 2, from_r * SQUARE_SIZE + SQUARE_SIZE // 2)
-            self.anim_end_pixel_pos = (to_c * SQUARE_SIZE + SQUARE_SIZE // 2, to_r * SQUARE_SIZE + SQUARE_SIZE // 2)
+            self.animating_piece_surface = self._piece_image(self.visual_board[from_r][from_c])
+            self.anim_start_pixel_pos = self._square_center((from_r, from_c))
+            self.anim_end_pixel_pos = self._square_center(to_coords)
             self.anim_current_pixel_pos = list(self.anim_start_pixel_pos)
             self.anim_original_start_coords = (from_r, from_c)
             self.anim_target_coords = to_coords 
@@ -597,9 +921,9 @@ class Board:
             move_to_push = chess.Move(from_sq_chess, to_sq_chess, promotion=promo_piece_for_move)
 
         self.is_animating = True
-        self.animating_piece_surface = get_piece_image(self.visual_board[from_r][from_c])
-        self.anim_start_pixel_pos = (from_c * SQUARE_SIZE + SQUARE_SIZE // 2, from_r * SQUARE_SIZE + SQUARE_SIZE // 2)
-        self.anim_end_pixel_pos = (to_c * SQUARE_SIZE + SQUARE_SIZE // 2, to_r * SQUARE_SIZE + SQUARE_SIZE // 2)
+        self.animating_piece_surface = self._piece_image(self.visual_board[from_r][from_c])
+        self.anim_start_pixel_pos = self._square_center((from_r, from_c))
+        self.anim_end_pixel_pos = self._square_center(to_coords)
         self.anim_current_pixel_pos = list(self.anim_start_pixel_pos)
         self.anim_original_start_coords = (from_r, from_c)
         self.anim_target_coords = to_coords
@@ -617,12 +941,16 @@ class Board:
         promotion_uci = self.promotion_pending_base_move_uci + chess.piece_symbol(chosen_piece_type).lower()
         promoted_move = chess.Move.from_uci(promotion_uci)
 
-        if promoted_move in self.chess_board.legal_moves:
-            self.chess_board.push(promoted_move)
+        if self.termination.is_legal(promoted_move):
+            self.history.push(promoted_move)
+            self.game_needs_recording = True
+            self._send_online_move(promoted_move)
             self._sync_visual_board() 
             self._update_status_message()
             self._check_game_over()
             self._update_undo_button_state() 
+            if self.game_mode == MODE_PUZZLE:
+                self._check_puzzle_progress()
         else:
             print(f"Error: Chosen promotion move {promoted_move.uci()} is not legal.")
             self._sync_visual_board() 
@@ -638,50 +966,45 @@ class Board:
             pygame.time.set_timer(AI_MOVE_EVENT, 500)
 
     def _trigger_ai_move(self):
+        if self.game_mode == MODE_PUZZLE:
+            self._play_puzzle_reply()
+            return
         if self.game_mode != MODE_PVA:
             self.ai_is_thinking = False 
             self._update_status_message() 
             return
 
-        if self.game_over or self.is_animating or not self.stockfish_engine:
+        if self.game_over or self.is_animating or not (self.stockfish_engine or self.engine_service or
+                                                       self.scripted_ai_moves is not None or evaluator.NUMPY_AVAILABLE):
             self.ai_is_thinking = False 
             self._update_status_message() 
             return
         
+        if not self.ai_is_thinking or self.engine_future is not None:
+            return # Cancelled after the event was queued, or already waiting on the engine service
+
         ai_color = chess.BLACK if self.player_is_white else chess.WHITE
-        if self.chess_board.turn == ai_color: 
+        if self.chess_board.turn == ai_color and self.scripted_ai_moves is not None:
+            self._play_ai_move(self.scripted_ai_moves.popleft() if self.scripted_ai_moves else None)
+        elif self.chess_board.turn == ai_color and self._uses_position_evaluator():
+            print(f"AI ({self.current_ai_difficulty}) is choosing a move with the NumPy evaluator...")
+            self._play_ai_move(evaluator.choose_move(self.chess_board))
+        elif self.chess_board.turn == ai_color and self.engine_service:
+            self._submit_ai_move_to_service()
+        elif self.chess_board.turn == ai_color: 
             print(f"AI ({self.current_ai_difficulty}) is actually processing move...")
             
-            skill = STOCKFISH_SKILL_LEVELS.get(self.current_ai_difficulty, STOCKFISH_SKILL_LEVELS["Medium"]) 
             try:
-                self.stockfish_engine.configure({"Skill Level": skill})
+                profile = self._apply_engine_profile()
             except Exception as e: 
                 print(f"Error configuring Stockfish for AI move: {e}")
                 self.ai_is_thinking = False
                 self._update_status_message() 
                 return
 
-            think_time = 0.1 if self.current_ai_difficulty == "Easiest" else \
-                         0.3 if self.current_ai_difficulty == "Easy" else \
-                         0.7 if self.current_ai_difficulty == "Medium" else \
-                         1.5 if self.current_ai_difficulty == "Hard" else 2.5
-
             try:
-                result = self.stockfish_engine.play(self.chess_board, chess.engine.Limit(time=think_time))
-                ai_chess_move = result.move 
-                
-                if ai_chess_move:
-                    print(f"AI plays: {ai_chess_move.uci()}")
-                    from_coords = self._chess_sq_to_coords(ai_chess_move.from_square)
-                    to_coords = self._chess_sq_to_coords(ai_chess_move.to_square)
-                    
-                    if from_coords and to_coords:
-                        self.pending_move_for_ai = ai_chess_move 
-                        self.move_piece(from_coords, to_coords, is_ai_move=True) 
-                else: 
-                    print("AI returned no move (unexpected).")
-                    self.ai_is_thinking = False 
-                    self._update_status_message() 
+                ai_chess_move = choose_move(self.stockfish_engine, self.chess_board, profile, game=self.engine_game_token)
+                self._play_ai_move(ai_chess_move)
             except chess.engine.EngineTerminatedError:
                 print("Stockfish engine terminated unexpectedly during AI move.")
                 self.stockfish_engine = None 
@@ -694,18 +1017,66 @@ class Board:
         else: 
             self.ai_is_thinking = False
 
+    def _uses_position_evaluator(self):
+        """The low difficulties (and PvA without Stockfish) use the NumPy evaluator when numpy is installed."""
+        if not evaluator.NUMPY_AVAILABLE:
+            return False
+        return self.current_ai_difficulty in EVALUATOR_DIFFICULTIES or not (self.stockfish_engine or self.engine_service)
+
+    def _play_ai_move(self, ai_chess_move):
+        if ai_chess_move:
+            print(f"AI plays: {ai_chess_move.uci()}")
+            if self.ai_move_recorder and self.game_mode == MODE_PVA:
+                self.ai_move_recorder(ai_chess_move)
+            from_coords = self._chess_sq_to_coords(ai_chess_move.from_square)
+            to_coords = self._chess_sq_to_coords(ai_chess_move.to_square)
+            
+            if from_coords and to_coords:
+                self.pending_move_for_ai = ai_chess_move 
+                self.move_piece(from_coords, to_coords, is_ai_move=True) 
+        else: 
+            print("AI returned no move (unexpected).")
+            self.ai_is_thinking = False 
+            self._update_status_message() 
+
+    def _submit_ai_move_to_service(self):
+        try:
+            self.engine_future = self.engine_service.submit(id(self), self.chess_board, self.current_ai_difficulty,
+                                                            priority=PRIORITY_HIGH)
+            self.engine_future_generation = self.engine_generation
+            pygame.time.set_timer(AI_MOVE_EVENT, 0)
+        except EngineQueueFull:
+            pygame.time.set_timer(AI_MOVE_EVENT, 250) # Try again shortly
+        except EngineServiceError as e:
+            print(f"Engine service unavailable: {e}")
+            self.ai_is_thinking = False
+            self._update_status_message()
+
+    def _poll_engine_future(self):
+        future = self.engine_future
+        if not future.done():
+            return
+        self.engine_future = None
+        if future.cancelled() or self.engine_future_generation != self.engine_generation:
+            return
+        try:
+            ai_chess_move = future.result()
+        except Exception as e:
+            print(f"Error during AI move processing: {e}")
+            self.ai_is_thinking = False
+            self._update_status_message()
+            return
+        if self.ai_is_thinking and not self.is_animating and not self.game_over:
+            self._play_ai_move(ai_chess_move)
+
     def _update_animation(self):
         if not self.is_animating:
             return
 
-        target_x, target_y = self.anim_end_pixel_pos
-        current_x, current_y = self.anim_current_pixel_pos
-        dx = target_x - current_x
-        dy = target_y - current_y
-        distance = math.sqrt(dx*dx + dy*dy)
-
-        if distance < ANIMATION_SPEED: 
-            self.anim_current_pixel_pos = list(self.anim_end_pixel_pos) 
+        speed = ANIMATION_SPEED * self.square_size / SQUARE_SIZE # Same duration at any board size
+        self.anim_current_pixel_pos, finished = advance_animation(self.anim_current_pixel_pos, self.anim_end_pixel_pos,
+                                                                  speed)
+        if finished: 
             self.is_animating = False 
 
             if self.is_awaiting_promotion: 
@@ -719,11 +1090,15 @@ class Board:
             if hasattr(self, 'pending_move') and self.pending_move:
                 move_to_execute = self.pending_move
                 
-                if move_to_execute in self.chess_board.legal_moves or self.chess_board.is_capture(move_to_execute): 
-                    self.chess_board.push(move_to_execute)
+                if self.termination.is_legal(move_to_execute) or self.chess_board.is_capture(move_to_execute): 
+                    self.history.push(move_to_execute)
+                    self.game_needs_recording = True
+                    if not self.pending_move_from_network:
+                        self._send_online_move(move_to_execute)
                 else: 
-                    print(f"Warning: Pending move {move_to_execute.uci()} was not pushed. Current legal moves: {list(self.chess_board.legal_moves)}")
+                    print(f"Warning: Pending move {move_to_execute.uci()} was not pushed. Current legal moves: {self.termination.legal_moves}")
                 self.pending_move = None
+                self.pending_move_from_network = False
             
             self._sync_visual_board() 
             self.animating_piece_surface = None
@@ -737,14 +1112,13 @@ class Board:
             self._update_status_message() 
             self._check_game_over()     
             self._update_undo_button_state() 
+            if self.game_mode == MODE_PUZZLE:
+                self._check_puzzle_progress()
 
             if not self.game_over and self.game_mode == MODE_PVA and self.chess_board.turn == ai_color:
                 self.ai_is_thinking = True 
                 self._update_status_message() 
                 pygame.time.set_timer(AI_MOVE_EVENT, 500) 
-        else: 
-            self.anim_current_pixel_pos[0] += (dx / distance) * ANIMATION_SPEED
-            self.anim_current_pixel_pos[1] += (dy / distance) * ANIMATION_SPEED
     def _update_status_message(self):
         self.king_in_check_coords = None 
         if self.game_over: 
@@ -770,23 +1144,41 @@ class Board:
                  player_turn_text = f"AI's Turn ({self.current_ai_difficulty})"
             elif current_turn_color == human_player_chess_color:
                 player_turn_text = "Your Turn"
+        elif self.game_mode == MODE_ONLINE:
+            if self.net_game_id is None:
+                player_turn_text = "Connecting..."
+            elif self.net_color is None:
+                player_turn_text = "Watching: " + ("White's Turn" if current_turn_color == chess.WHITE else "Black's Turn")
+            elif current_turn_color == self.net_color:
+                player_turn_text = "Your Turn"
+            else:
+                player_turn_text = "Opponent's Turn"
+        elif self.game_mode == MODE_PUZZLE:
+            if self.current_puzzle is None:
+                player_turn_text = "No puzzle found"
+            elif self.puzzle_feedback:
+                player_turn_text = self.puzzle_feedback
+            else:
+                side = "White" if self.current_puzzle.solver_color == chess.WHITE else "Black"
+                player_turn_text = f"Puzzle {self.current_puzzle.rating}: {side} to play"
         
         self.status_message = player_turn_text
-        if self.chess_board.is_check() and not self.is_awaiting_promotion and self.active_overlay_type != OVERLAY_AI_CONFIRM :
+        in_check = self.termination.is_check()
+        if in_check and not self.is_awaiting_promotion and self.active_overlay_type != OVERLAY_AI_CONFIRM :
             if self.status_message:
                 self.status_message += " - CHECK!"
             else: 
                 self.status_message = "CHECK!"
 
 
-        if self.chess_board.is_check(): 
+        if in_check: 
             king_square = self.chess_board.king(self.chess_board.turn) 
             if king_square is not None:
                 self.king_in_check_coords = self._chess_sq_to_coords(king_square)
     def _check_game_over(self):
         if self.game_over: return 
 
-        outcome = self.chess_board.outcome()
+        outcome = self.termination.outcome()
         if outcome:
             self.game_over = True
             self.ai_is_thinking = False 
@@ -799,6 +1191,11 @@ class Board:
                         self.game_over_message = "CHECKMATE! You Win!"
                     else:
                         self.game_over_message = "CHECKMATE! AI Wins!"
+                elif self.game_mode == MODE_ONLINE and self.net_color is not None:
+                    if actual_winner_color == self.net_color:
+                        self.game_over_message = "CHECKMATE! You Win!"
+                    else:
+                        self.game_over_message = "CHECKMATE! Opponent Wins!"
                 else: 
                     winner_display = "White" if actual_winner_color == chess.WHITE else "Black"
                     self.game_over_message = f"CHECKMATE! {winner_display} wins."
@@ -811,45 +1208,89 @@ class Board:
                 self.game_over_message = "GAME OVER! Draw."
             self.status_message = "" 
             self._update_undo_button_state() 
+    # --- Puzzles ---
+    def _start_next_puzzle(self):
+        if self.puzzle_trainer is None:
+            self.puzzle_trainer = PuzzleTrainer(self.puzzle_store, PUZZLE_RATINGS[self.current_ai_difficulty])
+        self.puzzle_feedback = ""
+        self.current_puzzle = self.puzzle_trainer.next_puzzle()
+        if self.current_puzzle is None:
+            print("No puzzle available for this rating.")
+            return
+        self.history.reset(self.current_puzzle.start_fen)
+        self._sync_visual_board()
+        print(f"Puzzle {self.current_puzzle.source_id} ({self.current_puzzle.rating}, "
+              f"{' '.join(self.current_puzzle.themes)})")
+
+    def _check_puzzle_progress(self):
+        """Called after each move in puzzle mode: takes back wrong moves and plays the opponent's replies."""
+        puzzle = self.current_puzzle
+        if puzzle is None or not self.history.cursor:
+            return
+        ply = self.history.cursor - 1
+        if self.chess_board.turn == puzzle.solver_color: # The opponent's scripted reply was just played
+            self.ai_is_thinking = False
+            self._update_status_message()
+            return
+
+        if not puzzle.is_correct(ply, self.chess_board.peek(), self.chess_board):
+            self.history.jump_to(ply)
+            self._sync_visual_board()
+            self.game_over = False
+            self.game_over_message = ""
+            self.puzzle_feedback = "Wrong move, try again"
+        elif ply + 1 >= len(puzzle.solution) or self.chess_board.is_checkmate():
+            self.game_over = True
+            self.game_over_message = "PUZZLE SOLVED!"
+            self.puzzle_feedback = ""
+        else:
+            self.puzzle_feedback = "Correct! Keep going"
+            self.ai_is_thinking = True
+            pygame.time.set_timer(AI_MOVE_EVENT, PUZZLE_REPLY_DELAY_MS)
+        self._update_status_message()
+        self._update_undo_button_state()
+
+    def _play_puzzle_reply(self):
+        pygame.time.set_timer(AI_MOVE_EVENT, 0)
+        puzzle = self.current_puzzle
+        if puzzle is None or not self.ai_is_thinking or self.is_animating or self.game_over:
+            return
+        ply = self.history.cursor
+        if ply < len(puzzle.solution) and self.chess_board.turn != puzzle.solver_color:
+            self._play_ai_move(puzzle.solution[ply])
+        else:
+            self.ai_is_thinking = False
+
+    def close_puzzles(self):
+        if self.puzzle_trainer:
+            self.puzzle_trainer.close()
+            self.puzzle_trainer = None
+        if self.puzzle_store:
+            self.puzzle_store.close()
+            self.puzzle_store = None
+
     # --- Drawing Methods ---
     def draw_board_area(self, screen):
-        for r_idx in range(ROWS):
-            for c_idx in range(COLS):
-                color = LIGHT_SQUARE if (r_idx + c_idx) % 2 == 0 else DARK_SQUARE
-                pygame.draw.rect(screen, color, (c_idx * SQUARE_SIZE, r_idx * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-        
+        screen.blit(board_layer(self.square_size), (0, 0))
+
         if self.king_in_check_coords and not self.game_over:
-            r, c = self.king_in_check_coords
-            check_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-            check_surface.fill(CHECK_HIGHLIGHT_COLOR)
-            screen.blit(check_surface, (c * SQUARE_SIZE, r * SQUARE_SIZE))
-
-        for r_idx in range(ROWS):
-            for c_idx in range(COLS):
-                if self.is_awaiting_promotion and self.promotion_square_coords == (r_idx, c_idx):
-                    continue
-                if self.is_animating and self.anim_original_start_coords == (r_idx, c_idx):
-                    continue 
-
-                piece_notation = self.visual_board[r_idx][c_idx]
-                if piece_notation:
-                    image = get_piece_image(piece_notation)
-                    if image:
-                        img_rect = image.get_rect(center=(c_idx * SQUARE_SIZE + SQUARE_SIZE // 2,
-                                                          r_idx * SQUARE_SIZE + SQUARE_SIZE // 2))
-                        screen.blit(image, img_rect.topleft)
+            draw_square_overlay(screen, self.king_in_check_coords, CHECK_HIGHLIGHT_COLOR, self.square_size)
+
+        skip = []
+        if self.is_awaiting_promotion:
+            skip.append(self.promotion_square_coords)
+        if self.is_animating:
+            skip.append(self.anim_original_start_coords)
+        if self.is_dragging:
+            skip.append(self.drag_coords)
+        draw_pieces(screen, self.visual_board, self._piece_image, self.square_size, skip=skip)
         
         if not self.is_animating and not (self.game_mode == MODE_PVA and self.ai_is_thinking) and not self.is_awaiting_promotion and self.active_overlay_type == OVERLAY_NONE: 
             if self.selected_square_coords:
-                r, c = self.selected_square_coords
-                highlight_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-                highlight_surface.fill(SELECTED_SQUARE_HIGHLIGHT_COLOR) 
-                screen.blit(highlight_surface, (c * SQUARE_SIZE, r * SQUARE_SIZE))
-
-            for r_idx, c_idx in self.valid_moves_coords:
-                center_x = c_idx * SQUARE_SIZE + SQUARE_SIZE // 2
-                center_y = r_idx * SQUARE_SIZE + SQUARE_SIZE // 2
-                pygame.draw.circle(screen, VALID_MOVE_DOT_COLOR, (center_x, center_y), SQUARE_SIZE // 6) 
+                draw_square_overlay(screen, self.selected_square_coords, SELECTED_SQUARE_HIGHLIGHT_COLOR, self.square_size)
+
+            for coords in self.valid_moves_coords:
+                pygame.draw.circle(screen, VALID_MOVE_DOT_COLOR, self._square_center(coords), self.square_size // 6) 
     def draw_animated_piece(self, screen):
         if self.is_animating and self.animating_piece_surface and self.anim_current_pixel_pos:
             piece_width, piece_height = self.animating_piece_surface.get_size()
@@ -858,20 +1299,113 @@ class Board:
             screen.blit(self.animating_piece_surface, (draw_x, draw_y))
 
     def draw_side_panel(self, screen):
-        panel_rect = pygame.Rect(BOARD_WIDTH, 0, SIDE_PANEL_WIDTH, HEIGHT)
+        panel_rect = pygame.Rect(self.board_size, 0, self.window_size[0] - self.board_size, self.window_size[1])
         pygame.draw.rect(screen, SIDE_PANEL_BG_COLOR, panel_rect)
 
         if self.status_message: 
              text_surface = self.status_font.render(self.status_message, True, TEXT_COLOR)
              status_text_y_center = 30 
-             text_rect = text_surface.get_rect(center=(BOARD_WIDTH + SIDE_PANEL_WIDTH // 2, status_text_y_center))
+             text_rect = text_surface.get_rect(center=(panel_rect.centerx, status_text_y_center))
              screen.blit(text_surface, text_rect)
         
         for button in self.buttons:
             button.draw(screen)
+        self._draw_move_list(screen)
+        self._draw_explorer(screen)
+
+    def _move_list_window(self):
+        """(first row, visible rows, total rows, 1 if the game starts with Black to move)."""
+        visible_rows = self.move_list_rect.height // MOVE_LIST_ROW_HEIGHT
+        black_starts = 1 if self.history.start_turn == chess.BLACK else 0
+        total_rows = (len(self.history) + black_starts + 1) // 2
+        max_first_row = max(0, total_rows - visible_rows)
+        if self.move_list_first_row is not None and self.move_list_scroll_cursor == self.history.cursor:
+            return min(self.move_list_first_row, max_first_row), visible_rows, total_rows, black_starts
+        self.move_list_first_row = None
+        cursor_row = max(0, (self.history.cursor - 1 + black_starts) // 2)
+        return max(0, min(cursor_row - visible_rows // 2, max_first_row)), visible_rows, total_rows, black_starts
+
+    def _scroll_move_list(self, rows):
+        first_row, visible_rows, total_rows, _ = self._move_list_window()
+        self.move_list_first_row = max(0, min(first_row + rows, total_rows - visible_rows))
+        self.move_list_scroll_cursor = self.history.cursor
+
+    def _draw_move_list(self, screen):
+        """Blits only the visible rows, each from the row cache, so long games draw as fast as short ones."""
+        self.move_list_click_targets = []
+        rect = self.move_list_rect
+        first_row, visible_rows, total_rows, black_starts = self._move_list_window()
+        if visible_rows <= 0 or not len(self.history):
+            return
+
+        number_width = 40
+        san_width = (rect.width - number_width) // 2
+        for row in range(first_row, min(total_rows, first_row + visible_rows)):
+            y = rect.top + (row - first_row) * MOVE_LIST_ROW_HEIGHT
+            white_ply = 2 * row + 1 - black_starts
+            plies = [ply if 1 <= ply <= len(self.history) else None for ply in (white_ply, white_ply + 1)]
+            screen.blit(self._move_list_row_surface(row, plies, rect.width, number_width, san_width), (rect.left, y))
+            for column, ply in enumerate(plies):
+                if ply is not None:
+                    cell_rect = pygame.Rect(rect.left + number_width + column * san_width, y, san_width, MOVE_LIST_ROW_HEIGHT)
+                    self.move_list_click_targets.append((cell_rect, ply))
+
+    def _move_list_row_surface(self, row, plies, width, number_width, san_width):
+        """
+        One rendered row of the move list. Rows are cached by what they show (move number,
+        SANs from the history's per-ply cache, highlighted cell), so undoing or playing a
+        different move simply misses the cache.
+        """
+        sans = tuple(self.history.san_at(ply) if ply is not None else None for ply in plies)
+        highlighted = plies.index(self.history.cursor) if self.history.cursor in plies else None
+        key = (width, self.history.start_fullmove + row, sans, highlighted)
+        surface = self.move_list_row_surfaces.get(key)
+        if surface is not None:
+            self.move_list_row_surfaces.move_to_end(key)
+            return surface
+
+        surface = pygame.Surface((width, MOVE_LIST_ROW_HEIGHT))
+        surface.fill(SIDE_PANEL_BG_COLOR)
+        surface.blit(self.move_list_font.render(f"{self.history.start_fullmove + row}.", True, TEXT_COLOR), (0, 2))
+        for column, san in enumerate(sans):
+            if san is None:
+                continue
+            cell_rect = pygame.Rect(number_width + column * san_width, 0, san_width, MOVE_LIST_ROW_HEIGHT)
+            if column == highlighted:
+                pygame.draw.rect(surface, MOVE_LIST_HIGHLIGHT_COLOR, cell_rect, border_radius=3)
+            surface.blit(self.move_list_font.render(san, True, TEXT_COLOR), (cell_rect.left + 4, 2))
+        self.move_list_row_surfaces[key] = surface
+        while len(self.move_list_row_surfaces) > MOVE_LIST_ROW_CACHE_SIZE:
+            self.move_list_row_surfaces.popitem(last=False)
+        return surface
+
+    def _update_explorer_rows(self):
+        position_key = self.termination.position_key
+        if position_key == self.explorer_position_key:
+            return
+        self.explorer_position_key = position_key
+        self.explorer_rows = []
+        for stats in self.opening_explorer.lookup_hash(position_key)[:EXPLORER_PANEL_ROWS]:
+            if stats.move in self.chess_board.legal_moves: # Guards against hash collisions
+                self.explorer_rows.append((self.chess_board.san(stats.move), stats.games, stats.white_score))
+
+    def _draw_explorer(self, screen):
+        if not self.opening_explorer or self.explorer_rect.height <= 0:
+            return
+        self._update_explorer_rows()
+        rect = self.explorer_rect
+        pygame.draw.line(screen, TEXT_COLOR, rect.topleft, rect.topright)
+        title = "Opening explorer" if self.explorer_rows else "Opening explorer: no games"
+        screen.blit(self.move_list_font.render(title, True, TEXT_COLOR), (rect.left, rect.top + 2))
+        for index, (san, games, white_score) in enumerate(self.explorer_rows):
+            y = rect.top + (index + 1) * MOVE_LIST_ROW_HEIGHT
+            screen.blit(self.move_list_font.render(san, True, TEXT_COLOR), (rect.left + 4, y + 2))
+            detail = self.move_list_font.render(f"{games}  {round(white_score * 100)}%", True, TEXT_COLOR)
+            screen.blit(detail, detail.get_rect(topright=(rect.right - 4, y + 2)))
+
     def draw_game_over_display(self, screen):
         if self.game_over and self.game_over_message:
-            overlay_rect = pygame.Rect(0, 0, BOARD_WIDTH, BOARD_HEIGHT)
+            overlay_rect = self._board_rect()
             overlay_surface = pygame.Surface((overlay_rect.width, overlay_rect.height), pygame.SRCALPHA)
             overlay_surface.fill(GAME_OVER_BG_COLOR)
             text_surface = self.game_over_font.render(self.game_over_message, True, TEXT_COLOR)
@@ -881,7 +1415,7 @@ class Board:
 
     def draw_restart_confirmation_dialog(self, screen):
         if self.show_restart_confirmation:
-            overlay_rect = pygame.Rect(0, 0, BOARD_WIDTH, BOARD_HEIGHT)
+            overlay_rect = self._board_rect()
             overlay_surface = pygame.Surface((overlay_rect.width, overlay_rect.height), pygame.SRCALPHA)
             overlay_surface.fill(GAME_OVER_BG_COLOR) 
 
@@ -912,9 +1446,7 @@ class Board:
             return
 
         overlay_margin = 40
-        overlay_rect_on_screen = pygame.Rect(overlay_margin, overlay_margin, 
-                                   BOARD_WIDTH - 2 * overlay_margin, 
-                                   BOARD_HEIGHT - 2 * overlay_margin)
+        overlay_rect_on_screen = self._board_rect().inflate(-2 * overlay_margin, -2 * overlay_margin)
         
         overlay_surface = pygame.Surface((overlay_rect_on_screen.width, overlay_rect_on_screen.height), pygame.SRCALPHA)
         overlay_surface.fill(TEXT_OVERLAY_BG_COLOR)
@@ -967,7 +1499,7 @@ class Board:
         if not self.is_awaiting_promotion:
             return
 
-        overlay_rect = pygame.Rect(0, 0, BOARD_WIDTH, BOARD_HEIGHT) 
+        overlay_rect = self._board_rect() 
         overlay_surface = pygame.Surface((overlay_rect.width, overlay_rect.height), pygame.SRCALPHA)
         overlay_surface.fill(PROMOTION_OVERLAY_BG_COLOR)
 
@@ -995,7 +1527,7 @@ class Board:
         if self.active_overlay_type != OVERLAY_AI_CONFIRM:
             return
 
-        overlay_rect = pygame.Rect(0, 0, BOARD_WIDTH, BOARD_HEIGHT)
+        overlay_rect = self._board_rect()
         overlay_surface = pygame.Surface((overlay_rect.width, overlay_rect.height), pygame.SRCALPHA)
         overlay_surface.fill(AI_CONFIRM_OVERLAY_BG_COLOR)
 
@@ -1029,6 +1561,12 @@ class Board:
 
 
     def update(self):
+        if self.pending_sprite_size:
+            self._update_sprite_size()
+        if self.net_client:
+            self._update_network()
+        if self.engine_future is not None:
+            self._poll_engine_future()
         if not self.game_over : 
             self._update_animation()
             if self.game_mode == MODE_PVA and self.ai_is_thinking and self.active_overlay_type == OVERLAY_NONE:
@@ -1036,6 +1574,46 @@ class Board:
 
 
     def draw(self, screen):
+        """Draws the frame; returns the changed rects for pygame.display.update, or None if everything changed."""
+        if self.drag_coords and self.selected_square_coords != self.drag_coords:
+            self._cancel_drag() # The position changed under the pressed piece (undo, restart, resync...)
+        if self.is_dragging:
+            return self._draw_drag_frame(screen)
+        self._draw_scene(screen)
+        return None
+
+    def _drag_scene_key(self):
+        """Everything besides the dragged sprite that can change the picture during a drag."""
+        return (self.window_size, self.piece_sprite_size, self.status_message,
+                len(self.chess_board.move_stack), self.active_overlay_type, self.show_restart_confirmation,
+                self.game_over, self.pending_sprite_size, self.move_list_first_row)
+
+    def _draw_drag_frame(self, screen):
+        """
+        While a piece is dragged only its sprite moves. The rest of the frame (valid-move
+        dots and check highlight included) is snapshotted once, and each frame just restores
+        the sprite's previous rect from the snapshot and blits the sprite at the mouse.
+        """
+        dirty_rects = []
+        key = self._drag_scene_key()
+        if self.drag_snapshot is None or self.drag_snapshot_key != key or self.drag_snapshot.get_size() != screen.get_size():
+            self._draw_scene(screen)
+            self.drag_snapshot = screen.copy()
+            self.drag_snapshot_key = key
+            dirty_rects = None
+        elif self.drag_sprite_rect:
+            screen.blit(self.drag_snapshot, self.drag_sprite_rect, self.drag_sprite_rect)
+            dirty_rects.append(self.drag_sprite_rect)
+        sprite = self._piece_image(self.visual_board[self.drag_coords[0]][self.drag_coords[1]])
+        self.drag_sprite_rect = None
+        if sprite:
+            self.drag_sprite_rect = sprite.get_rect(center=self.drag_pos)
+            screen.blit(sprite, self.drag_sprite_rect)
+            if dirty_rects is not None:
+                dirty_rects.append(self.drag_sprite_rect)
+        return dirty_rects
+
+    def _draw_scene(self, screen):
         screen.fill(SIDE_PANEL_BG_COLOR) 
         self.draw_board_area(screen)     
         self.draw_animated_piece(screen) 
@@ -1053,8 +1631,44 @@ class Board:
             self._draw_promotion_choice_overlay(screen)
 
 
-    def handle_button_events(self, event):
+    def handle_event(self, event):
+        """Dispatches one pygame event; used by the game loop and by event replays."""
+        if event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            mark_input() # Times click-to-sound latency
+        try:
+            self._dispatch_event(event)
+        finally:
+            end_input()
+
+    def _dispatch_event(self, event):
+        # Button click actions are initiated from handle_button_events
+        # if it returns True for a MOUSEBUTTONDOWN event.
+        button_was_clicked_and_actioned = self.handle_button_events(event)
+
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1: # Left mouse button
+            if not button_was_clicked_and_actioned and not self.is_animating:
+                # Checks the confirmation dialog first, then the board
+                self.handle_click_on_board_or_dialog(event.pos)
+
         if event.type == pygame.MOUSEMOTION:
+            self.pointer_pos = event.pos
+        elif event.type == pygame.MOUSEWHEEL and self.move_list_rect.collidepoint(self.pointer_pos):
+            self._scroll_move_list(-event.y * MOVE_LIST_SCROLL_ROWS)
+
+        if self.drag_coords:
+            if event.type == pygame.MOUSEMOTION:
+                self._update_drag(event)
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                self._end_drag(event.pos)
+
+        if event.type == AI_MOVE_EVENT and not self.is_animating:
+            self._trigger_ai_move()
+
+        if event.type == pygame.VIDEORESIZE:
+            self.set_window_size(event.w, event.h, WINDOW_RESIZE_DEBOUNCE_MS)
+
+    def handle_button_events(self, event):
+        if event.type == pygame.MOUSEMOTION and not self.is_dragging: # Hover changes would go stale in the drag snapshot
             for button in self.buttons:
                 button.handle_event(event) 
             if self.active_overlay_type in [OVERLAY_RULES, OVERLAY_ABOUT] and self.overlay_close_button:
@@ -1075,8 +1689,120 @@ class Board:
             for button in self.buttons:
                 if button.handle_event(event): 
                     return True 
+            if self._handle_move_list_click(event.pos):
+                return True
         return False 
 
+    # --- Online Play ---
+    def connect_online(self, host, port, game_id=None, watch=False):
+        """Connects to a GameServer and creates, joins or watches a game."""
+        client = NetClient(host, port)
+        if not client.start():
+            print(f"Could not connect to game server at {host}:{port}: {client.error}")
+            return False
+        print(f"Connected to game server at {host}:{port}.")
+        self.close_network()
+        self.net_client = client
+        self.net_game_id = None
+        self.net_color = None
+        self.net_inbox = []
+        self.record_current_game()
+        self.game_mode = MODE_ONLINE
+        self._cancel_engine_work()
+        self.game_mode_button.update_text(f"Mode: {self.game_mode}")
+        self._update_ai_difficulty_button_state()
+        self._update_player_color_button_state()
+        self.restart_game()
+
+        if game_id is None:
+            client.send({"op": "create"})
+        else:
+            client.send({"op": "watch" if watch else "join", "game": str(game_id)})
+        return True
+
+    def _send_online_move(self, move):
+        if self.game_mode == MODE_ONLINE and self.net_client and self.net_game_id is not None:
+            self.net_client.send({"op": "move", "game": self.net_game_id, "uci": move.uci(),
+                                  "ply": len(self.chess_board.move_stack) - 1})
+
+    def _update_network(self):
+        self.net_inbox.extend(self.net_client.poll())
+        # Remote moves are animated one at a time, so wait for the board to be idle.
+        while self.net_inbox and not self.is_animating and not self.is_awaiting_promotion:
+            self._handle_network_message(self.net_inbox.pop(0))
+
+    def _handle_network_message(self, message):
+        op = message.get("op")
+        if op in ("created", "joined", "watching"):
+            self.net_game_id = message["game"]
+            self.net_color = {"white": chess.WHITE, "black": chess.BLACK}.get(message.get("color"))
+            self.player_is_white = self.net_color != chess.BLACK
+            self._load_online_state(message)
+            print(f"Online game {self.net_game_id}: {op} as {message.get('color', 'spectator')}.")
+        elif op == "moved" and message.get("game") == self.net_game_id:
+            move = chess.Move.from_uci(message["uci"])
+            ply = message["ply"]
+            current_ply = len(self.chess_board.move_stack)
+            if ply == current_ply and self.chess_board.move_stack and self.chess_board.peek() == move:
+                return # Echo of our own move
+            if ply != current_ply + 1:
+                print("Online game out of sync; requesting full state.")
+                self._request_online_resync()
+                return
+            from_coords = self._chess_sq_to_coords(move.from_square)
+            to_coords = self._chess_sq_to_coords(move.to_square)
+            self.pending_move_for_ai = move
+            self.pending_move_from_network = True
+            self.move_piece(from_coords, to_coords, is_ai_move=True)
+        elif op == "game_over" and message.get("game") == self.net_game_id:
+            outcome = message.get("outcome") or {}
+            self.game_over = True
+            winner = outcome.get("winner")
+            if outcome.get("termination") == "RESIGNATION":
+                self.game_over_message = f"{(winner or '').capitalize()} wins by resignation."
+            else:
+                self.game_over_message = f"GAME OVER! {outcome.get('result', '')}"
+            self.status_message = ""
+            self._update_undo_button_state()
+        elif op in ("player_joined", "player_left"):
+            print(f"Online game {message.get('game')}: {message.get('color')} {op.split('_')[1]}.")
+        elif op == "error":
+            print(f"Game server error: {message.get('reason')}")
+            if message.get("reason") in ("illegal move", "stale ply", "not your turn"):
+                self._request_online_resync()
+        elif op == "disconnected":
+            print(f"Disconnected from game server: {message.get('reason')}")
+            self.status_message = "Disconnected"
+
+    def _request_online_resync(self):
+        if self.net_game_id is not None:
+            self.net_client.send({"op": "join" if self.net_color is not None else "watch", "game": self.net_game_id})
+
+    def _load_online_state(self, message):
+        self.history.reset(message.get("fen"))
+        for uci in message.get("moves", []):
+            self.history.push(chess.Move.from_uci(uci))
+        self._sync_visual_board()
+        self.selected_square_coords = None
+        self.valid_moves_coords = []
+        self.game_over = False
+        self.game_over_message = ""
+        self._update_status_message()
+        self._check_game_over()
+        self._update_undo_button_state()
+
+    def close_network(self):
+        if self.net_client:
+            if self.net_game_id is not None:
+                self.net_client.send({"op": "leave", "game": self.net_game_id})
+            self.net_client.close()
+            self.net_client = None
+
+    def close_explorer(self):
+        if self.opening_explorer:
+            self.opening_explorer.close()
+            self.opening_explorer = None
+
     def close_engine(self):
         if self.stockfish_engine:
             try:
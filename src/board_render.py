@@ -0,0 +1,100 @@
+# src/board_render.py
+
+import collections
+import math
+import pygame
+import chess
+from src.constants import ROWS, COLS, LIGHT_SQUARE, DARK_SQUARE, ASSET_CACHE_SIZES
+
+# Translucent single-square fills, keyed by (color, size); built once instead of every frame.
+_OVERLAY_SURFACES = {}
+# Empty boards by square size, least recently used first.
+_BOARD_LAYERS = collections.OrderedDict()
+
+
+def piece_notation(piece):
+    """'wP', 'bK', ... as used by PIECE_IMAGES and the visual board."""
+    return ('w' if piece.color == chess.WHITE else 'b') + piece.symbol().upper()
+
+
+def visual_board_from(chess_board):
+    """8x8 rows of piece notations (or None), rank 8 first, like Board.visual_board."""
+    visual_board = [[None for _ in range(COLS)] for _ in range(ROWS)]
+    for square, piece in chess_board.piece_map().items():
+        visual_board[ROWS - 1 - chess.square_rank(square)][chess.square_file(square)] = piece_notation(piece)
+    return visual_board
+
+
+def square_coords(square):
+    """Board (row, col) of a chess square, row 0 being rank 8."""
+    return ROWS - 1 - chess.square_rank(square), chess.square_file(square)
+
+
+def _screen_position(coords, square_size, origin, flipped):
+    row, col = coords
+    if flipped:
+        row, col = ROWS - 1 - row, COLS - 1 - col
+    return origin[0] + col * square_size, origin[1] + row * square_size
+
+
+def draw_squares(surface, square_size, origin=(0, 0)):
+    for r_idx in range(ROWS):
+        for c_idx in range(COLS):
+            color = LIGHT_SQUARE if (r_idx + c_idx) % 2 == 0 else DARK_SQUARE
+            pygame.draw.rect(surface, color, (origin[0] + c_idx * square_size, origin[1] + r_idx * square_size,
+                                              square_size, square_size))
+
+
+def board_layer(square_size):
+    """
+    The empty board at `square_size`, drawn once and blitted (or copied) afterwards.
+    Like the piece sprites, only the ASSET_CACHE_SIZES most recently used sizes are kept.
+    """
+    layer = _BOARD_LAYERS.get(square_size)
+    if layer is None:
+        layer = _BOARD_LAYERS[square_size] = pygame.Surface((square_size * COLS, square_size * ROWS))
+        draw_squares(layer, square_size)
+        while len(_BOARD_LAYERS) > ASSET_CACHE_SIZES:
+            _BOARD_LAYERS.popitem(last=False)
+    else:
+        _BOARD_LAYERS.move_to_end(square_size)
+    return layer
+
+
+def draw_square_overlay(surface, coords, color, square_size, origin=(0, 0), flipped=False):
+    """Blends an RGBA color over one square."""
+    overlay = _OVERLAY_SURFACES.get((color, square_size))
+    if overlay is None:
+        overlay = pygame.Surface((square_size, square_size), pygame.SRCALPHA)
+        overlay.fill(color)
+        _OVERLAY_SURFACES[(color, square_size)] = overlay
+    surface.blit(overlay, _screen_position(coords, square_size, origin, flipped))
+
+
+def draw_pieces(surface, visual_board, image_for, square_size, origin=(0, 0), flipped=False, skip=()):
+    """Blits each piece image centred on its square; `skip` lists (row, col) squares to leave empty."""
+    for r_idx in range(ROWS):
+        for c_idx in range(COLS):
+            piece = visual_board[r_idx][c_idx]
+            if not piece or (r_idx, c_idx) in skip:
+                continue
+            image = image_for(piece)
+            if image:
+                x, y = _screen_position((r_idx, c_idx), square_size, origin, flipped)
+                img_rect = image.get_rect(center=(x + square_size // 2, y + square_size // 2))
+                surface.blit(image, img_rect.topleft)
+
+
+def square_center(coords, square_size, origin=(0, 0), flipped=False):
+    x, y = _screen_position(coords, square_size, origin, flipped)
+    return x + square_size // 2, y + square_size // 2
+
+
+def advance_animation(current, target, speed):
+    """One frame of a sliding piece: moves `speed` pixels towards the target; returns (position, finished)."""
+    dx = target[0] - current[0]
+    dy = target[1] - current[1]
+    distance = math.sqrt(dx*dx + dy*dy)
+    if distance < speed:
+        return list(target), True
+    return [current[0] + (dx / distance) * speed, current[1] + (dy / distance) * speed], False
@@ -13,6 +13,13 @@ HEIGHT = BOARD_HEIGHT
 ROWS, COLS = 8, 8
 SQUARE_SIZE = BOARD_WIDTH // COLS
 
+# --- Resizable Window ---
+MIN_BOARD_SIZE = 320 # The window can shrink until the board is this small
+MIN_WINDOW_HEIGHT = 600 # ... and until the side panel's buttons just fit
+WINDOW_DESKTOP_FRACTION = 0.9 # The first window fits in this much of the desktop
+WINDOW_RESIZE_DEBOUNCE_MS = 150 # Piece sprites are rescaled once resizing pauses this long
+ASSET_CACHE_SIZES = 4 # Piece sprite sets and board layers kept per size
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -24,6 +31,8 @@ DARK_SQUARE = (181, 136, 99)
 SELECTED_SQUARE_HIGHLIGHT_COLOR = (245, 245, 245, 130) 
 VALID_MOVE_DOT_COLOR = (235, 235, 235) 
 CHECK_HIGHLIGHT_COLOR = (255, 50, 50, 150) 
+LAST_MOVE_HIGHLIGHT_COLOR = (205, 210, 106, 150)
+MARKED_SQUARE_HIGHLIGHT_COLOR = (80, 160, 255, 120)
 
 SIDE_PANEL_BG_COLOR = (50, 50, 50)
 TEXT_COLOR = (230, 230, 230) 
@@ -65,15 +74,50 @@ OVERLAY_LINE_SPACING = 5
 PROMOTION_CHOICE_FONT_SIZE = 20
 PROMOTION_BUTTON_WIDTH = 120 
 PROMOTION_BUTTON_HEIGHT = 50
+MOVE_LIST_FONT_SIZE = 18
+MOVE_LIST_ROW_HEIGHT = 22
+MOVE_LIST_HIGHLIGHT_COLOR = (90, 90, 120)
+MOVE_LIST_ROW_CACHE_SIZE = 96 # Rendered move-list rows kept for reuse
+MOVE_LIST_SCROLL_ROWS = 3 # Rows per mouse-wheel step
 
 # --- Game Modes & AI ---
 MODE_PVP = "Player vs Player"
 MODE_PVA = "Player vs AI"
+MODE_ONLINE = "Online PvP" # Only entered by connecting to a game server
 
 AI_DIFFICULTIES = ["Easiest", "Easy", "Medium", "Hard", "Unbeatable"]
 STOCKFISH_SKILL_LEVELS = {
     "Easiest": 0, "Easy": 3, "Medium": 7, "Hard": 12, "Unbeatable": 20
 }
+AI_THINK_TIMES = { # Seconds per AI move
+    "Easiest": 0.1, "Easy": 0.3, "Medium": 0.7, "Hard": 1.5, "Unbeatable": 2.5
+}
+# Engine resources per difficulty. "threads_share"/"hash_share" are fractions of the
+# host budget found by engine_tuning.calibrate_engine(); 0 means 1 thread / minimum hash.
+ENGINE_PROFILES = {
+    "Easiest":    {"depth": 5,    "nodes": None, "multipv": 3, "threads_share": 0.0, "hash_share": 0.0},
+    "Easy":       {"depth": 8,    "nodes": None, "multipv": 2, "threads_share": 0.0, "hash_share": 0.0},
+    "Medium":     {"depth": None, "nodes": None, "multipv": 1, "threads_share": 0.5, "hash_share": 0.25},
+    "Hard":       {"depth": None, "nodes": None, "multipv": 1, "threads_share": 1.0, "hash_share": 0.5},
+    "Unbeatable": {"depth": None, "nodes": None, "multipv": 1, "threads_share": 1.0, "hash_share": 1.0},
+}
+for _difficulty, _profile in ENGINE_PROFILES.items():
+    _profile["skill"] = STOCKFISH_SKILL_LEVELS[_difficulty]
+    _profile["time"] = AI_THINK_TIMES[_difficulty]
+ENGINE_CPU_BUDGET = 0.75 # Fraction of logical cores the engines may use
+ENGINE_RAM_BUDGET_FRACTION = 0.25 # Fraction of physical RAM available for hash tables
+ENGINE_MAX_HASH_MB = 2048
+ENGINE_MIN_HASH_MB = 16
+ENGINE_CLEAR_HASH_ON_RESTART = True # Send ucinewgame (clearing hash) only when a game restarts
+ENGINE_CALIBRATION_SECONDS = 0.25 # Search time per benchmark run
+
+# --- NumPy Evaluator (optional numpy) ---
+EVALUATOR_DIFFICULTIES = ("Easiest",) # Played by src/evaluator.py instead of Stockfish
+EVALUATOR_SEARCH_DEPTH = 2 # Plies; depth 2 scores each move by the opponent's best static reply
+EVALUATOR_MOVE_NOISE_CP = 40 # Random jitter so the evaluator's play varies
+EVALUATOR_MOBILITY_WEIGHT = 4 # Centipawns per attacked square
+EVALUATOR_BISHOP_PAIR_BONUS = 30
+
 DEFAULT_GAME_MODE = MODE_PVP
 DEFAULT_AI_DIFFICULTY = AI_DIFFICULTIES[0] # Easiest
 
@@ -82,17 +126,106 @@ PLAYER_PLAYS_AS_WHITE = True # Default: Player is White, AI is Black
 
 # --- Animation Settings ---
 ANIMATION_SPEED = 30
+DRAG_START_DISTANCE = 5 # Pixels a pressed piece must move before it is dragged rather than clicked
 
 # --- Asset Loading ---
 ASSET_PATH = os.path.join(os.path.dirname(__file__), '..', 'assets')
 IMAGE_PATH = os.path.join(ASSET_PATH, 'images', 'pieces')
 SOUND_PATH = os.path.join(ASSET_PATH, 'sounds')
 TEXT_FILE_PATH = ASSET_PATH 
+# Assets are looked up by their path under ASSET_PATH, in the packed bundle if it has been built
+# (python -m src.asset_bundle build) and otherwise on disk
+PIECE_IMAGE_ASSET_DIR = "images/pieces"
+SOUND_ASSET_DIR = "sounds"
+ASSET_BUNDLE_PATH = os.path.join(os.path.dirname(__file__), '..', 'assets.bundle')
+ASSET_BUNDLE_EXCLUDE = ("screenshot.png",) # Only used by the README
+
+# --- Audio ---
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER_SIZE = 512 # Samples per mixer buffer; output latency is about buffer / frequency
+AUDIO_MIXER_CHANNELS = 16
+AUDIO_LATENCY_SAMPLES = 256 # Click-to-sound timings kept for the latency summary
 
 # --- Text File Names ---
 RULES_FILENAME = "rules.txt"
 ABOUT_FILENAME = "about.txt"
 
+# --- Saved Games ---
+USER_DATA_PATH = os.path.join(os.path.expanduser("~"), ".unbeatable_chess")
+SAVE_GAME_PATH = os.path.join(USER_DATA_PATH, "savegame.ucg")
+GAME_RECORD_CHECKPOINT_INTERVAL = 16 # Plies between position checkpoints in saved games
+GAME_DATABASE_PATH = os.path.join(USER_DATA_PATH, "games.sqlite3")
+GAME_DB_BATCH_SIZE = 64 # Games committed per write transaction at most
+GAME_DB_BATCH_SECONDS = 0.5 # How long the writer waits to fill a batch
+
+# --- Puzzles ---
+MODE_PUZZLE = "Puzzles"
+PUZZLE_DATABASE_PATH = os.path.join(USER_DATA_PATH, "puzzles.sqlite3")
+PUZZLE_RATING_BUCKET = 50 # Rating points per sampling bucket
+PUZZLE_RATING_WINDOW = 100 # Puzzles are sampled within +- this many points of the target
+PUZZLE_DEFAULT_RATING = 1500
+PUZZLE_IMPORT_BATCH_SIZE = 10000
+PUZZLE_REPLY_DELAY_MS = 400 # Pause before the opponent's reply is played
+PUZZLE_RATINGS = { # Target puzzle rating for each difficulty setting
+    "Easiest": 800, "Easy": 1200, "Medium": 1600, "Hard": 2000, "Unbeatable": 2400
+}
+
+# --- Opening Explorer ---
+EXPLORER_INDEX_PATH = os.path.join(USER_DATA_PATH, "explorer.idx")
+EXPLORER_MAX_PLY = 30 # Only the first plies of each game are indexed
+EXPLORER_CHUNK_BYTES = 64 * 1024 * 1024 # PGN bytes parsed per worker task
+EXPLORER_RUN_MAX_ENTRIES = 2_000_000 # Entries a worker aggregates before writing a sorted run
+EXPLORER_PANEL_ROWS = 4 # Moves shown in the side panel
+
+# --- Training Data Export ---
+DATASET_PATH = os.path.join(USER_DATA_PATH, "dataset")
+DATASET_SHARD_ROWS = 1 << 20 # Positions per .npy shard (about 110 MB)
+DATASET_DEDUP_BITS = 1 << 30 # Bloom filter size for Zobrist deduplication (128 MB, power of two)
+DATASET_MAX_PLIES = 300 # Self-play games longer than this are adjudicated as draws
+DATASET_RANDOM_OPENING_PLIES = 6 # Random moves at the start of each self-play game, for variety
+DATASET_GAMES_PER_TASK = 4 # Self-play games per worker task
+
+# --- Perft & EPD Benchmarks ---
+PERFT_DEFAULT_DEPTH = 3
+EPD_POSITIONS_PER_TASK = 8 # EPD positions per worker task
+
+# --- Position Thumbnails ---
+THUMBNAIL_CACHE_PATH = os.path.join(USER_DATA_PATH, "thumbnails")
+THUMBNAIL_DEFAULT_SIZE = 256 # Board edge in pixels
+THUMBNAIL_RENDER_VERSION = 1 # Bump when the drawing changes so cached images are re-rendered
+
+# --- Replay Export ---
+REPLAY_EXPORT_PATH = os.path.join(USER_DATA_PATH, "replays")
+REPLAY_DEFAULT_SIZE = 640 # Board edge in pixels
+REPLAY_FPS = 60 # Matches the game loop, so animations take as long as in the game
+REPLAY_HOLD_SECONDS = 0.5 # Pause on each position after its move lands
+REPLAY_FINAL_HOLD_SECONDS = 2.0
+REPLAY_PLIES_PER_TASK = 4 # Plies rendered per worker task
+REPLAY_FRAME_FORMAT = "png" # Or "tga"/"bmp": larger files, much faster to write
+
+# --- Event Recording & Replay ---
+EVENT_RECORDING_PATH = os.path.join(USER_DATA_PATH, "recordings")
+EVENT_REPLAY_FRAME_BUDGET_MS = 1000 / 60 # Frames slower than this would drop below 60 fps
+EVENT_REPLAY_SLOWEST_FRAMES = 10 # Slowest frames listed in a replay report
+EVENT_REPLAY_REGRESSION_TOLERANCE = 1.25 # Mean/p95 frame time this much above the baseline is a regression
+
+# --- Simul Exhibition ---
+SIMUL_DEFAULT_BOARDS = 8
+SIMUL_HEADER_HEIGHT = 36 # Summary line above the grid
+SIMUL_LABEL_HEIGHT = 22 # Status line under each board
+SIMUL_MARGIN = 12 # Gap between boards
+
+# --- Shared Engine Service & Tuning ---
+ENGINE_SERVICE_MAX_QUEUE = 256 # Requests waiting before submit() pushes back
+ENGINE_SERVICE_WAIT_SAMPLES = 1000 # Recent queue waits kept for metrics
+ENGINE_CALIBRATION_FILE = os.path.join(USER_DATA_PATH, "engine_calibration.json")
+
+# --- Online Play ---
+NET_DEFAULT_HOST = "127.0.0.1"
+NET_DEFAULT_PORT = 8765
+NET_MAX_LINE_BYTES = 64 * 1024
+NET_MAX_GAMES = 10000
+
 # --- Overlay Types ---
 OVERLAY_NONE = 0
 OVERLAY_RULES = 1
@@ -111,6 +244,15 @@ SOUND_FILES = {
     'piece_move': 'move.wav',
 }
 
+# Each category plays on its own reserved mixer channels, so e.g. a click never cuts off a move
+SOUND_CATEGORIES = {
+    'button_click': 'ui',
+    'piece_select': 'selection',
+    'piece_deselect': 'selection',
+    'piece_move': 'move',
+}
+AUDIO_CATEGORY_CHANNELS = {'ui': 2, 'selection': 1, 'move': 2}
+
 # --- Stockfish Engine Path ---
 STOCKFISH_EXECUTABLE_NAME = "stockfish-windows-x86-64-avx2.exe"
 STOCKFISH_PATH = os.path.join(os.path.dirname(__file__), '..', 'engine', STOCKFISH_EXECUTABLE_NAME)
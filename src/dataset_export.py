@@ -0,0 +1,311 @@
+# src/dataset_export.py
+
+import argparse
+import glob
+import multiprocessing
+import os
+import random
+import sys
+import time
+import chess
+import chess.engine
+from src.constants import (DATASET_PATH, DATASET_SHARD_ROWS, DATASET_DEDUP_BITS, DATASET_MAX_PLIES,
+                           DATASET_RANDOM_OPENING_PLIES, DATASET_GAMES_PER_TASK, EXPLORER_CHUNK_BYTES,
+                           STOCKFISH_PATH)
+from src.game_logic import TerminationTracker
+from src.game_record import split_pgn, iter_pgn_chunk
+from src.engine_tuning import resolve_profile, apply_profile, build_limit
+from src import evaluator
+
+try:
+    import numpy as np
+except ImportError: # numpy is optional; see pyproject.toml [project.optional-dependencies]
+    np = None
+
+EVAL_UNKNOWN = -32768
+EVAL_CLIP = 10000 # Mates are stored as +-EVAL_CLIP
+
+# One training sample: packed bitplanes (12 x 64 bits, see evaluator._plane_index),
+# side to move, castling rights (1 WK, 2 WQ, 4 BK, 8 BQ), eval and result from White's
+# point of view, and the Polyglot Zobrist hash.
+RECORD_FIELDS = [("planes", "u1", (12, 8)), ("turn", "u1"), ("castling", "u1"),
+                 ("eval", "<i2"), ("result", "i1"), ("hash", "<u8")]
+RECORD_DTYPE = np.dtype(RECORD_FIELDS) if np is not None else None
+
+_RESULTS = {"1-0": 1, "0-1": -1, "1/2-1/2": 0}
+
+
+def _castling_bits(board):
+    return ((1 if board.has_kingside_castling_rights(chess.WHITE) else 0) |
+            (2 if board.has_queenside_castling_rights(chess.WHITE) else 0) |
+            (4 if board.has_kingside_castling_rights(chess.BLACK) else 0) |
+            (8 if board.has_queenside_castling_rights(chess.BLACK) else 0))
+
+
+def _score_to_cp(pov_score):
+    if pov_score is None:
+        return EVAL_UNKNOWN
+    return max(-EVAL_CLIP, min(EVAL_CLIP, pov_score.white().score(mate_score=EVAL_CLIP)))
+
+
+def positions_to_records(boards, hashes, evals, result):
+    """Builds a RECORD_DTYPE array; unknown evals are filled in with the NumPy evaluator."""
+    records = np.zeros(len(boards), dtype=RECORD_DTYPE)
+    if not boards:
+        return records
+    bitboards = evaluator.boards_to_bitboards(boards)
+    records["planes"] = bitboards.astype("<u8").view(np.uint8).reshape(-1, 12, 8)
+    records["turn"] = [board.turn for board in boards]
+    records["castling"] = [_castling_bits(board) for board in boards]
+    evals = np.array(evals, dtype=np.int32)
+    missing = evals == EVAL_UNKNOWN
+    if missing.any():
+        evals[missing] = np.clip(evaluator.evaluate_bitboards(bitboards[missing]), -EVAL_CLIP, EVAL_CLIP)
+    records["eval"] = evals
+    records["result"] = result
+    records["hash"] = np.array(hashes, dtype=np.uint64)
+    return records
+
+
+def unpack_planes(records):
+    """(N, 12, 64) uint8 bitplanes from dataset records."""
+    return np.unpackbits(records["planes"], axis=2, bitorder="little")
+
+
+# --- Producers (run in worker processes) ---
+
+_worker_engine = None
+
+
+def _init_selfplay_worker(engine_path, difficulty):
+    global _worker_engine
+    if engine_path and os.path.exists(engine_path):
+        try:
+            engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+            profile = resolve_profile(difficulty)
+            apply_profile(engine, profile, {})
+            _worker_engine = (engine, profile)
+        except Exception as e:
+            print(f"Self-play worker could not start Stockfish ({e}); using the NumPy evaluator.")
+
+
+def _selfplay_games(task):
+    """Plays games from slightly randomised openings; returns one records array for all of them."""
+    seed, games = task
+    rng = random.Random(seed)
+    batches = []
+    for _ in range(games):
+        board = chess.Board()
+        tracker = TerminationTracker(board)
+        boards, hashes, evals = [], [], []
+        game_token = object()
+        outcome = None
+        while len(board.move_stack) < DATASET_MAX_PLIES:
+            outcome = tracker.outcome()
+            if outcome is not None:
+                break
+            score = None
+            if len(board.move_stack) < DATASET_RANDOM_OPENING_PLIES:
+                move = rng.choice(tracker.legal_moves)
+            elif _worker_engine is not None:
+                engine, profile = _worker_engine
+                played = engine.play(board, build_limit(profile), info=chess.engine.INFO_SCORE, game=game_token)
+                move, score = played.move, played.info.get("score")
+            else:
+                move = evaluator.choose_move(board, rng=rng)
+            boards.append(board.copy(stack=False))
+            hashes.append(tracker.position_key)
+            evals.append(_score_to_cp(score))
+            tracker.push(move)
+        if outcome is None:
+            result = 0 # Adjudicated as a draw at the ply limit
+        else:
+            result = 0 if outcome.winner is None else (1 if outcome.winner == chess.WHITE else -1)
+        batches.append(positions_to_records(boards, hashes, evals, result))
+    return np.concatenate(batches) if batches else np.zeros(0, dtype=RECORD_DTYPE)
+
+
+def _pgn_chunk_records(task):
+    """Converts the decisive/drawn games in one PGN byte range; [%eval] comments are used when present."""
+    pgn_path, start, end = task
+    batches = []
+    for game in iter_pgn_chunk(pgn_path, start, end):
+        result = _RESULTS.get(game.headers.get("Result"))
+        if result is None:
+            continue
+        board = game.board()
+        tracker = TerminationTracker(board)
+        boards, hashes, evals = [], [], []
+        node = game
+        try:
+            for child in game.mainline():
+                boards.append(board.copy(stack=False))
+                hashes.append(tracker.position_key)
+                evals.append(_score_to_cp(node.eval()))
+                tracker.push(child.move)
+                node = child
+        except (AssertionError, ValueError):
+            continue # Illegal move in the PGN
+        batches.append(positions_to_records(boards, hashes, evals, result))
+    return np.concatenate(batches) if batches else np.zeros(0, dtype=RECORD_DTYPE)
+
+
+# --- Consumer ---
+
+class ShardWriter:
+    """
+    Appends records to fixed-capacity .npy shards through memory maps, so nothing
+    but the current batch is held in RAM. Duplicate positions (by Zobrist hash) are
+    dropped with a Bloom filter, which may wrongly drop a tiny fraction of new positions.
+    """
+    def __init__(self, directory=DATASET_PATH, shard_rows=DATASET_SHARD_ROWS, dedup_bits=DATASET_DEDUP_BITS):
+        self.directory = directory
+        self.shard_rows = shard_rows
+        os.makedirs(directory, exist_ok=True)
+        self._bits = np.zeros(dedup_bits // 8, dtype=np.uint8)
+        self._bit_mask = np.uint64(dedup_bits - 1) # dedup_bits must be a power of two
+        self._shard = None
+        self._shard_path = None
+        self._shard_fill = 0
+        self.written = 0
+        self.duplicates = 0
+        existing = sorted(glob.glob(os.path.join(directory, "shard-*.npy")))
+        self._next_index = len(existing)
+        for path in existing: # Appending: earlier shards' positions count as seen
+            self._check_and_mark(np.load(path, mmap_mode="r")["hash"])
+
+    def _bloom_positions(self, hashes):
+        # Zobrist hashes are already uniformly random, so the k = 3 probe positions are
+        # derived from their two halves by double hashing.
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        return [(low + np.uint64(probe) * high) & self._bit_mask for probe in range(3)]
+
+    def _check_and_mark(self, hashes):
+        """Returns a mask of hashes not seen before and marks them all as seen."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        positions = self._bloom_positions(hashes)
+        seen = np.ones(len(hashes), dtype=bool)
+        for position in positions:
+            seen &= ((self._bits[position >> np.uint64(3)] >> (position & np.uint64(7)).astype(np.uint8)) & 1).astype(bool)
+        _, first = np.unique(hashes, return_index=True)
+        fresh = np.zeros(len(hashes), dtype=bool)
+        fresh[first] = True
+        fresh &= ~seen
+        for position in positions:
+            np.bitwise_or.at(self._bits, position >> np.uint64(3),
+                             np.left_shift(1, (position & np.uint64(7)).astype(np.uint8)).astype(np.uint8))
+        return fresh
+
+    def _open_shard(self):
+        self._shard_path = os.path.join(self.directory, f"shard-{self._next_index:05d}.npy")
+        self._next_index += 1
+        self._shard = np.lib.format.open_memmap(self._shard_path + ".tmp", mode="w+", dtype=RECORD_DTYPE,
+                                                shape=(self.shard_rows,))
+        self._shard_fill = 0
+
+    def _close_shard(self):
+        if self._shard is None:
+            return
+        self._shard.flush()
+        if self._shard_fill == self.shard_rows:
+            del self._shard
+            os.replace(self._shard_path + ".tmp", self._shard_path)
+        elif self._shard_fill:
+            final = np.lib.format.open_memmap(self._shard_path, mode="w+", dtype=RECORD_DTYPE,
+                                              shape=(self._shard_fill,))
+            for offset in range(0, self._shard_fill, 65536):
+                final[offset:offset + 65536] = self._shard[offset:min(self._shard_fill, offset + 65536)]
+            final.flush()
+            del final, self._shard
+            os.remove(self._shard_path + ".tmp")
+        else:
+            del self._shard
+            os.remove(self._shard_path + ".tmp")
+            self._next_index -= 1
+        self._shard = None
+
+    def write(self, records):
+        produced = len(records)
+        if produced:
+            records = records[self._check_and_mark(records["hash"])]
+        self.duplicates += produced - len(records)
+        offset = 0
+        while offset < len(records):
+            if self._shard is None:
+                self._open_shard()
+            count = min(len(records) - offset, self.shard_rows - self._shard_fill)
+            self._shard[self._shard_fill:self._shard_fill + count] = records[offset:offset + count]
+            self._shard_fill += count
+            offset += count
+            if self._shard_fill == self.shard_rows:
+                self._close_shard()
+        self.written += len(records)
+
+    def close(self):
+        self._close_shard()
+
+
+def open_dataset(directory=DATASET_PATH):
+    """Memory-mapped record arrays, one per shard."""
+    return [np.load(path, mmap_mode="r") for path in sorted(glob.glob(os.path.join(directory, "shard-*.npy")))]
+
+
+def _run(tasks, function, writer, workers, initializer=None, initargs=()):
+    started = time.perf_counter()
+    produced = 0
+    with multiprocessing.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+        for records in pool.imap_unordered(function, tasks):
+            produced += len(records)
+            writer.write(records)
+    writer.close()
+    elapsed = time.perf_counter() - started
+    print(f"{produced} positions produced, {writer.written} written, {writer.duplicates} duplicates "
+          f"dropped in {elapsed:.1f}s ({produced / max(elapsed, 1e-9):,.0f} positions/s) -> {writer.directory}")
+
+
+def export_selfplay(games, directory=DATASET_PATH, workers=None, engine_path=STOCKFISH_PATH,
+                    difficulty="Easy", seed=None):
+    """Plays `games` games across worker processes (Stockfish if available, else the NumPy evaluator)."""
+    if np is None:
+        raise evaluator.EvaluatorUnavailable("Dataset export needs numpy (pip install numpy).")
+    base_seed = seed if seed is not None else random.randrange(1 << 30)
+    tasks = [(base_seed + index, min(DATASET_GAMES_PER_TASK, games - index))
+             for index in range(0, games, DATASET_GAMES_PER_TASK)]
+    _run(tasks, _selfplay_games, ShardWriter(directory), workers,
+         initializer=_init_selfplay_worker, initargs=(engine_path, difficulty))
+
+
+def export_pgn(pgn_paths, directory=DATASET_PATH, workers=None, chunk_bytes=EXPLORER_CHUNK_BYTES):
+    """Converts PGN databases, one byte range per task."""
+    if np is None:
+        raise evaluator.EvaluatorUnavailable("Dataset export needs numpy (pip install numpy).")
+    tasks = [chunk for path in pgn_paths for chunk in split_pgn(path, chunk_bytes)]
+    _run(tasks, _pgn_chunk_records, ShardWriter(directory), workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export training positions to .npy shards")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    selfplay = subparsers.add_parser("selfplay", help="play games and export their positions")
+    selfplay.add_argument("--games", type=int, default=100)
+    selfplay.add_argument("--difficulty", default="Easy")
+    selfplay.add_argument("--no-engine", action="store_true", help="use the NumPy evaluator even if Stockfish exists")
+    selfplay.add_argument("--seed", type=int)
+    pgn = subparsers.add_parser("pgn", help="export positions from PGN files")
+    pgn.add_argument("files", nargs="+")
+    for subparser in (selfplay, pgn):
+        subparser.add_argument("--out", default=DATASET_PATH)
+        subparser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "selfplay":
+        export_selfplay(args.games, args.out, args.workers, None if args.no_engine else STOCKFISH_PATH,
+                        args.difficulty, args.seed)
+    else:
+        export_pgn(args.files, args.out, args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+# src/engine_service.py
+
+import collections
+import concurrent.futures
+import itertools
+import os
+import threading
+import time
+import chess
+import chess.engine
+from src.constants import (STOCKFISH_PATH, AI_THINK_TIMES, ENGINE_MIN_HASH_MB,
+                           ENGINE_SERVICE_MAX_QUEUE, ENGINE_SERVICE_WAIT_SAMPLES)
+from src.engine_tuning import load_or_calibrate, resolve_profile, apply_profile, choose_move
+
+PRIORITY_HIGH = 0    # AI replies a player is waiting for
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2     # Background work (hints, reviews)
+
+
+class EngineServiceError(Exception):
+    pass
+
+
+class EngineQueueFull(EngineServiceError):
+    """Raised by submit() when the queue is at capacity; callers should retry later."""
+
+
+class EngineUnavailable(EngineServiceError):
+    pass
+
+
+class _SearchJob:
+    __slots__ = ("key", "session_id", "board", "difficulty", "time_limit", "priority",
+                 "futures", "submitted_at", "sequence")
+
+    def __init__(self, key, session_id, board, difficulty, time_limit, priority, sequence):
+        self.key = key
+        self.session_id = session_id
+        self.board = board
+        self.difficulty = difficulty
+        self.time_limit = time_limit
+        self.priority = priority
+        self.futures = []  # (session_id, future) pairs; coalesced requests add more
+        self.submitted_at = time.perf_counter()
+        self.sequence = sequence
+
+
+class EngineScheduler:
+    """
+    A fixed pool of Stockfish processes shared by many game sessions.
+    Requests are queued per priority level and served round-robin between sessions,
+    identical requests (same position, difficulty and time budget) share one search,
+    and submit() refuses work once max_queue requests are waiting.
+    """
+    def __init__(self, engine_path=STOCKFISH_PATH, pool_size=None, max_queue=ENGINE_SERVICE_MAX_QUEUE):
+        self.engine_path = engine_path
+        self.pool_size = pool_size or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._lock = threading.Condition()
+        self._levels = {}        # priority -> OrderedDict(session_id -> deque of jobs)
+        self._queued_by_key = {} # key -> queued or running job, for coalescing
+        self._queue_depth = 0
+        self._sequence = itertools.count()
+        self._workers = []
+        self._engines = []
+        self._running = False
+        self._wait_samples = collections.deque(maxlen=ENGINE_SERVICE_WAIT_SAMPLES)
+        self._counters = collections.Counter()
+        self._busy = 0
+        self.calibration = None
+
+    # --- Lifecycle ---
+    def start(self):
+        if self._running:
+            return self
+        if not self.engine_path or not os.path.exists(self.engine_path):
+            raise EngineUnavailable(f"Stockfish executable not found at {self.engine_path}")
+        for index in range(self.pool_size):
+            try:
+                engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+            except Exception as e:
+                print(f"Engine service: could not start engine {index}: {e}")
+                continue
+            self._engines.append(engine)
+        if not self._engines:
+            raise EngineUnavailable("No engine processes could be started.")
+        # The host budget is split between the pool's engines.
+        host = load_or_calibrate(self.engine_path)
+        self.calibration = {"threads": max(1, host["threads"] // len(self._engines)),
+                            "hash_mb": max(ENGINE_MIN_HASH_MB, host["hash_mb"] // len(self._engines))}
+        self._running = True
+        for index, engine in enumerate(self._engines):
+            worker = threading.Thread(target=self._worker_loop, args=(engine,),
+                                      name=f"EngineWorker-{index}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        print(f"Engine service started with {len(self._engines)} engine process(es).")
+        return self
+
+    def shutdown(self):
+        with self._lock:
+            self._running = False
+            for sessions in self._levels.values():
+                for jobs in sessions.values():
+                    for job in jobs:
+                        for _, future in job.futures:
+                            future.cancel()
+            self._levels.clear()
+            self._queued_by_key.clear()
+            self._queue_depth = 0
+            self._lock.notify_all()
+        for worker in self._workers:
+            worker.join(timeout=5.0)
+        for engine in self._engines:
+            try:
+                engine.quit()
+            except Exception as e:
+                print(f"Engine service: error quitting engine: {e}")
+        self._workers = []
+        self._engines = []
+
+    # --- Requests ---
+    def submit(self, session_id, board, difficulty, time_limit=None, priority=PRIORITY_NORMAL):
+        """
+        Queues a search and returns a concurrent.futures.Future resolving to the best chess.Move.
+        The board is copied, so the caller may keep playing on it.
+        """
+        if time_limit is None:
+            time_limit = AI_THINK_TIMES.get(difficulty, AI_THINK_TIMES["Medium"])
+        key = (board.fen(), difficulty, time_limit)
+        future = concurrent.futures.Future()
+        with self._lock:
+            if not self._running:
+                raise EngineUnavailable("Engine service is not running.")
+            job = self._queued_by_key.get(key)
+            if job is not None:
+                job.futures.append((session_id, future))
+                self._counters["coalesced"] += 1
+                if priority < job.priority and job in self._session_queue(job.priority, job.session_id):
+                    self._requeue(job, priority)
+                return future
+            if self._queue_depth >= self.max_queue:
+                self._counters["rejected"] += 1
+                raise EngineQueueFull(f"Engine queue is full ({self._queue_depth} waiting).")
+
+            job = _SearchJob(key, session_id, board.copy(), difficulty, time_limit, priority, next(self._sequence))
+            job.futures.append((session_id, future))
+            self._session_queue(priority, session_id, create=True).append(job)
+            self._queued_by_key[key] = job
+            self._queue_depth += 1
+            self._counters["submitted"] += 1
+            self._lock.notify()
+        return future
+
+    def cancel_session(self, session_id):
+        """Cancels a session's queued requests; searches shared with other sessions keep running for them."""
+        cancelled = 0
+        with self._lock:
+            for priority, sessions in self._levels.items():
+                for owner, jobs in list(sessions.items()):
+                    for job in list(jobs):
+                        mine = [future for owner_id, future in job.futures if owner_id == session_id]
+                        if not mine:
+                            continue
+                        for future in mine:
+                            future.cancel()
+                        cancelled += len(mine)
+                        job.futures = [(owner_id, future) for owner_id, future in job.futures
+                                       if owner_id != session_id]
+                        if job.session_id == session_id:
+                            jobs.remove(job)
+                            if job.futures:
+                                job.session_id = job.futures[0][0]
+                                self._session_queue(priority, job.session_id, create=True).append(job)
+                            else:
+                                self._queued_by_key.pop(job.key, None)
+                                self._queue_depth -= 1
+                for owner in [owner for owner, jobs in sessions.items() if not jobs]:
+                    del sessions[owner]
+            self._counters["cancelled"] += cancelled
+        return cancelled
+
+    def _session_queue(self, priority, session_id, create=False):
+        sessions = self._levels.get(priority)
+        if sessions is None:
+            if not create:
+                return ()
+            sessions = self._levels[priority] = collections.OrderedDict()
+        jobs = sessions.get(session_id)
+        if jobs is None:
+            if not create:
+                return ()
+            jobs = sessions[session_id] = collections.deque()
+        return jobs
+
+    def _requeue(self, job, priority):
+        jobs = self._levels[job.priority][job.session_id]
+        jobs.remove(job)
+        if not jobs:
+            del self._levels[job.priority][job.session_id]
+        job.priority = priority
+        self._session_queue(priority, job.session_id, create=True).append(job)
+
+    def _next_job(self):
+        """Highest priority first; within a priority, rotate between sessions."""
+        for priority in sorted(self._levels):
+            sessions = self._levels[priority]
+            if not sessions:
+                continue
+            session_id, jobs = next(iter(sessions.items()))
+            job = jobs.popleft()
+            if jobs:
+                sessions.move_to_end(session_id) # Round-robin: this session goes to the back
+            else:
+                del sessions[session_id]
+            self._queue_depth -= 1
+            return job
+        return None
+
+    def _worker_loop(self, engine):
+        applied_options = {}
+        while True:
+            with self._lock:
+                job = self._next_job()
+                while job is None and self._running:
+                    self._lock.wait()
+                    job = self._next_job()
+                if job is None:
+                    return
+                self._busy += 1
+                self._wait_samples.append(time.perf_counter() - job.submitted_at)
+
+            move = None
+            error = None
+            try:
+                profile = resolve_profile(job.difficulty, self.calibration)
+                profile["time"] = job.time_limit
+                apply_profile(engine, profile, applied_options)
+                move = choose_move(engine, job.board, profile)
+            except Exception as e:
+                error = e
+
+            with self._lock:
+                self._busy -= 1
+                if self._queued_by_key.get(job.key) is job:
+                    del self._queued_by_key[job.key]
+                self._counters["completed" if error is None else "failed"] += 1
+                futures = [future for _, future in job.futures]
+            for future in futures:
+                if future.set_running_or_notify_cancel():
+                    if error is None:
+                        future.set_result(move)
+                    else:
+                        future.set_exception(error)
+            if isinstance(error, chess.engine.EngineTerminatedError):
+                print("Engine service: an engine process terminated; its worker is stopping.")
+                return
+
+    # --- Metrics ---
+    def metrics(self):
+        with self._lock:
+            waits = sorted(self._wait_samples)
+            sessions_waiting = sum(len(sessions) for sessions in self._levels.values())
+            return {
+                "engines": len(self._engines),
+                "busy_engines": self._busy,
+                "queue_depth": self._queue_depth,
+                "sessions_waiting": sessions_waiting,
+                "submitted": self._counters["submitted"],
+                "completed": self._counters["completed"],
+                "failed": self._counters["failed"],
+                "coalesced": self._counters["coalesced"],
+                "rejected": self._counters["rejected"],
+                "cancelled": self._counters["cancelled"],
+                "wait_avg_ms": round(1000 * sum(waits) / len(waits), 2) if waits else 0.0,
+                "wait_p95_ms": round(1000 * waits[int(len(waits) * 0.95)], 2) if waits else 0.0,
+                "wait_max_ms": round(1000 * waits[-1], 2) if waits else 0.0,
+            }
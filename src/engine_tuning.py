@@ -0,0 +1,194 @@
+# src/engine_tuning.py
+
+import json
+import os
+import random
+import sys
+import time
+import chess
+import chess.engine
+from src.constants import (ENGINE_PROFILES, ENGINE_CPU_BUDGET, ENGINE_RAM_BUDGET_FRACTION,
+                           ENGINE_MAX_HASH_MB, ENGINE_MIN_HASH_MB, ENGINE_CALIBRATION_FILE,
+                           ENGINE_CALIBRATION_SECONDS, STOCKFISH_PATH)
+
+# Middlegame positions used to benchmark nodes per second.
+CALIBRATION_FENS = [
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "2rq1rk1/pp1bppbp/3p1np1/4n3/3NP3/1BN1BP2/PPPQ2PP/R3K2R w KQ - 5 12",
+]
+
+
+def physical_memory_mb():
+    """Total physical RAM in MB, or None if it cannot be determined."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return status.ullTotalPhys // (1024 * 1024)
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def _round_down_power_of_two(value):
+    power = 1
+    while power * 2 <= value:
+        power *= 2
+    return power
+
+
+def host_budget(cpu_budget=ENGINE_CPU_BUDGET, ram_budget_fraction=ENGINE_RAM_BUDGET_FRACTION,
+                max_hash_mb=ENGINE_MAX_HASH_MB):
+    """Threads and hash (MB) the engines may use on this machine."""
+    cores = os.cpu_count() or 1
+    threads = max(1, int(cores * cpu_budget))
+    ram_mb = physical_memory_mb()
+    hash_mb = max_hash_mb if ram_mb is None else min(max_hash_mb, int(ram_mb * ram_budget_fraction))
+    return {"cores": cores, "threads": threads, "hash_mb": max(ENGINE_MIN_HASH_MB, _round_down_power_of_two(hash_mb))}
+
+
+def _measure_nps(engine, threads, seconds):
+    engine.configure({"Threads": threads})
+    samples = []
+    for fen in CALIBRATION_FENS:
+        info = engine.analyse(chess.Board(fen), chess.engine.Limit(time=seconds))
+        if info.get("nps"):
+            samples.append(info["nps"])
+        elif info.get("nodes") and info.get("time"):
+            samples.append(info["nodes"] / info["time"])
+    return sum(samples) / len(samples) if samples else 0.0
+
+
+def calibrate_engine(engine_path=STOCKFISH_PATH, budget=None, seconds=ENGINE_CALIBRATION_SECONDS):
+    """
+    Benchmarks nps at 1, 2, 4, ... threads up to the budget and keeps the smallest
+    thread count that reaches 90% of the best measured speed.
+    """
+    budget = budget or host_budget()
+    engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+    try:
+        thread_counts = []
+        count = 1
+        while count < budget["threads"]:
+            thread_counts.append(count)
+            count *= 2
+        thread_counts.append(budget["threads"])
+
+        nps_by_threads = {}
+        for threads in thread_counts:
+            nps_by_threads[threads] = _measure_nps(engine, threads, seconds)
+    finally:
+        engine.quit()
+
+    best_nps = max(nps_by_threads.values()) if nps_by_threads else 0.0
+    effective_threads = budget["threads"]
+    for threads in thread_counts:
+        if best_nps and nps_by_threads[threads] >= 0.9 * best_nps:
+            effective_threads = threads
+            break
+    return {
+        "engine_path": os.path.abspath(engine_path),
+        "engine_mtime": os.path.getmtime(engine_path),
+        "cores": budget["cores"],
+        "threads": effective_threads,
+        "hash_mb": budget["hash_mb"],
+        "nps_by_threads": {str(threads): round(nps) for threads, nps in nps_by_threads.items()},
+        "calibrated_at": time.time(),
+    }
+
+
+def load_or_calibrate(engine_path=STOCKFISH_PATH, cache_path=ENGINE_CALIBRATION_FILE, force=False):
+    """
+    Returns the host calibration, running the benchmark only when no cached result
+    matches this engine binary and core count. Falls back to the static budget on errors.
+    """
+    budget = host_budget()
+    if not force and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if (cached.get("engine_path") == os.path.abspath(engine_path) and
+                    cached.get("engine_mtime") == os.path.getmtime(engine_path) and
+                    cached.get("cores") == budget["cores"]):
+                # Budgets may have been edited since the benchmark; never exceed them.
+                cached["threads"] = min(cached["threads"], budget["threads"])
+                cached["hash_mb"] = min(cached["hash_mb"], budget["hash_mb"])
+                return cached
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable engine calibration cache: {e}")
+
+    print("Calibrating engine settings for this machine...")
+    try:
+        calibration = calibrate_engine(engine_path, budget)
+    except Exception as e:
+        print(f"Engine calibration failed ({e}); using the static host budget.")
+        return dict(budget)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(calibration, f, indent=2)
+    except OSError as e:
+        print(f"Could not save engine calibration: {e}")
+    print(f"Engine calibration: {calibration['threads']} thread(s), {calibration['hash_mb']} MB hash, "
+          f"nps {calibration['nps_by_threads']}")
+    return calibration
+
+
+def resolve_profile(difficulty, calibration=None, threads_cap=None):
+    """Turns a difficulty's ENGINE_PROFILES entry into concrete engine options and search limits."""
+    profile = dict(ENGINE_PROFILES.get(difficulty, ENGINE_PROFILES["Medium"]))
+    calibration = calibration or {"threads": 1, "hash_mb": ENGINE_MIN_HASH_MB}
+    threads = max(1, round(calibration["threads"] * profile["threads_share"]))
+    if threads_cap is not None:
+        threads = max(1, min(threads, threads_cap))
+    hash_mb = max(ENGINE_MIN_HASH_MB, _round_down_power_of_two(max(1, int(calibration["hash_mb"] * profile["hash_share"]))))
+    profile["options"] = {"Skill Level": profile["skill"], "Threads": threads, "Hash": hash_mb}
+    return profile
+
+
+def build_limit(profile):
+    return chess.engine.Limit(time=profile["time"], depth=profile["depth"], nodes=profile["nodes"])
+
+
+def apply_profile(engine, profile, applied_options):
+    """
+    Configures only the options that differ from `applied_options` (updated in place),
+    since changing Threads or Hash makes the engine reallocate.
+    """
+    changed = {name: value for name, value in profile["options"].items()
+               if applied_options.get(name) != value and name in engine.options}
+    if changed:
+        engine.configure(changed)
+        applied_options.update(changed)
+    return changed
+
+
+def choose_move(engine, board, profile, game=None, rng=random):
+    """
+    Plays a move under the profile's limits. With MultiPV > 1 the engine lists several
+    candidates and one is picked at random (weighted towards the best), for weaker, varied play.
+    """
+    limit = build_limit(profile)
+    if profile["multipv"] <= 1:
+        return engine.play(board, limit, game=game).move
+    infos = engine.analyse(board, limit, multipv=profile["multipv"], game=game)
+    candidates = [info["pv"][0] for info in infos if info.get("pv")]
+    if not candidates:
+        return engine.play(board, limit, game=game).move
+    return pick_candidate(candidates, rng)
+
+
+def pick_candidate(candidates, rng=random):
+    """Picks one of the MultiPV moves (best first), each twice as likely as the next."""
+    weights = [2 ** (len(candidates) - index) for index in range(len(candidates))]
+    return rng.choices(candidates, weights=weights)[0]
@@ -0,0 +1,315 @@
+# src/evaluator.py
+
+import argparse
+import random
+import sys
+import time
+import chess
+from src.constants import (EVALUATOR_MOBILITY_WEIGHT, EVALUATOR_BISHOP_PAIR_BONUS,
+                           EVALUATOR_SEARCH_DEPTH, EVALUATOR_MOVE_NOISE_CP)
+
+try:
+    import numpy as np
+except ImportError: # numpy is optional; see pyproject.toml [project.optional-dependencies]
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+MATE_SCORE = 100000
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+# Piece-square tables from White's point of view, written rank 8 first (a8..h8, ..., a1..h1).
+_PST = {
+    chess.PAWN: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20],
+    chess.ROOK: [
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0],
+    chess.QUEEN: [
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20],
+}
+_KING_ENDGAME_PST = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50]
+_PHASE_WEIGHTS = {chess.KNIGHT: 1, chess.BISHOP: 1, chess.ROOK: 2, chess.QUEEN: 4}
+_MAX_PHASE = 24
+
+
+class EvaluatorUnavailable(Exception):
+    pass
+
+
+def _require_numpy():
+    if np is None:
+        raise EvaluatorUnavailable("The position evaluator needs numpy (pip install numpy).")
+
+
+def _plane_index(piece_type, color):
+    """Bitplanes are ordered P, N, B, R, Q, K for White, then the same for Black."""
+    return piece_type - 1 + (0 if color == chess.WHITE else 6)
+
+
+def _build_tables():
+    """(768, 2) float32 matrix: material + PST for the middlegame and endgame, White positive."""
+    tables = np.zeros((12, 64, 2), dtype=np.float32)
+    for piece_type, table in _PST.items():
+        endgame = _KING_ENDGAME_PST if piece_type == chess.KING else table
+        for square in chess.SQUARES:
+            white_index = square ^ 56 # The tables are written rank 8 first
+            for column, values in enumerate((table, endgame)):
+                tables[_plane_index(piece_type, chess.WHITE), square, column] = PIECE_VALUES[piece_type] + values[white_index]
+                tables[_plane_index(piece_type, chess.BLACK), square, column] = -(PIECE_VALUES[piece_type] + values[square])
+    phase = np.zeros(12, dtype=np.float32)
+    for piece_type, weight in _PHASE_WEIGHTS.items():
+        phase[_plane_index(piece_type, chess.WHITE)] = weight
+        phase[_plane_index(piece_type, chess.BLACK)] = weight
+    return tables.reshape(768, 2), phase
+
+
+if np is not None:
+    _TABLES, _PHASE = _build_tables()
+    _U = np.uint64
+    _NOT_A = _U(0xFEFEFEFEFEFEFEFE)
+    _NOT_AB = _U(0xFCFCFCFCFCFCFCFC)
+    _NOT_H = _U(0x7F7F7F7F7F7F7F7F)
+    _NOT_GH = _U(0x3F3F3F3F3F3F3F3F)
+    _ALL = _U(0xFFFFFFFFFFFFFFFF)
+    # (shift, wrap mask): positive shifts go left (towards h8).
+    _ORTHOGONAL = ((8, _ALL), (-8, _ALL), (1, _NOT_A), (-1, _NOT_H))
+    _DIAGONAL = ((9, _NOT_A), (7, _NOT_H), (-7, _NOT_A), (-9, _NOT_H))
+
+
+def _shift(bitboards, amount):
+    return bitboards << _U(amount) if amount > 0 else bitboards >> _U(-amount)
+
+
+def _slider_attacks(sliders, empty, directions):
+    """Kogge-Stone occluded fills over whole arrays of bitboards at once."""
+    attacks = np.zeros_like(sliders)
+    for amount, wrap in directions:
+        generator = sliders
+        propagator = empty & wrap
+        generator = generator | (propagator & _shift(generator, amount))
+        propagator = propagator & _shift(propagator, amount)
+        generator = generator | (propagator & _shift(generator, 2 * amount))
+        propagator = propagator & _shift(propagator, 2 * amount)
+        generator = generator | (propagator & _shift(generator, 4 * amount))
+        attacks |= _shift(generator, amount) & wrap
+    return attacks
+
+
+def _knight_attacks(knights):
+    l1 = (knights >> _U(1)) & _NOT_H
+    l2 = (knights >> _U(2)) & _NOT_GH
+    r1 = (knights << _U(1)) & _NOT_A
+    r2 = (knights << _U(2)) & _NOT_AB
+    h1 = l1 | r1
+    h2 = l2 | r2
+    return (h1 << _U(16)) | (h1 >> _U(16)) | (h2 << _U(8)) | (h2 >> _U(8))
+
+
+def _popcount(bitboards):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bitboards).astype(np.int32)
+    return np.unpackbits(bitboards.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1, dtype=np.int32)
+
+
+def _board_row(b):
+    return (b.pawns, b.knights, b.bishops, b.rooks, b.queens, b.kings, b.occupied_co[chess.WHITE],
+            b.occupied_co[chess.BLACK])
+
+
+def _rows_to_bitboards(rows):
+    raw = np.array(rows, dtype=np.uint64).reshape(-1, 8)
+    return np.concatenate([raw[:, :6] & raw[:, 6:7], raw[:, :6] & raw[:, 7:8]], axis=1)
+
+
+def boards_to_bitboards(boards):
+    """(N, 12) uint64 array with one bitboard per piece type and colour."""
+    _require_numpy()
+    return _rows_to_bitboards([_board_row(b) for b in boards])
+
+
+def bitboards_to_planes(bitboards):
+    """Expands (N, 12) bitboards into (N, 12, 64) uint8 bitplanes indexed by square (a1 = 0)."""
+    count = bitboards.shape[0]
+    as_bytes = bitboards.astype("<u8").view(np.uint8).reshape(count, 12, 8)
+    return np.unpackbits(as_bytes, axis=2, bitorder="little")
+
+
+def boards_to_planes(boards):
+    """Stacked 12x64 bitplanes for a batch of chess.Board objects."""
+    return bitboards_to_planes(boards_to_bitboards(boards))
+
+
+def evaluate_bitboards(bitboards):
+    """Static scores in centipawns, positive for White, for an (N, 12) bitboard array."""
+    planes = bitboards_to_planes(bitboards).reshape(-1, 768).astype(np.float32)
+    middlegame_endgame = planes @ _TABLES
+    phase = np.minimum(planes.reshape(-1, 12, 64).sum(axis=2) @ _PHASE, _MAX_PHASE)
+    scores = (middlegame_endgame[:, 0] * phase + middlegame_endgame[:, 1] * (_MAX_PHASE - phase)) / _MAX_PHASE
+
+    white = bitboards[:, 0:6]
+    black = bitboards[:, 6:12]
+    white_occupied = np.bitwise_or.reduce(white, axis=1)
+    black_occupied = np.bitwise_or.reduce(black, axis=1)
+    empty = ~(white_occupied | black_occupied)
+    mobility = np.zeros(bitboards.shape[0], dtype=np.int32)
+    for pieces, own, sign in ((white, white_occupied, 1), (black, black_occupied, -1)):
+        knights = _knight_attacks(pieces[:, 1]) & ~own
+        diagonal = _slider_attacks(pieces[:, 2] | pieces[:, 4], empty, _DIAGONAL) & ~own
+        orthogonal = _slider_attacks(pieces[:, 3] | pieces[:, 4], empty, _ORTHOGONAL) & ~own
+        mobility += sign * (_popcount(knights) + _popcount(diagonal) + _popcount(orthogonal))
+    bishop_pair = (_popcount(white[:, 2]) >= 2).astype(np.int32) - (_popcount(black[:, 2]) >= 2).astype(np.int32)
+    return (np.rint(scores).astype(np.int32) + EVALUATOR_MOBILITY_WEIGHT * mobility +
+            EVALUATOR_BISHOP_PAIR_BONUS * bishop_pair)
+
+
+def evaluate_boards(boards):
+    """Static scores in centipawns, positive for White, for a list of chess.Board objects."""
+    if not boards:
+        _require_numpy()
+        return np.zeros(0, dtype=np.int32)
+    return evaluate_bitboards(boards_to_bitboards(boards))
+
+
+def _terminal_score(board):
+    """Score (White positive) for a board with no legal moves."""
+    if board.is_check():
+        return -MATE_SCORE if board.turn == chess.WHITE else MATE_SCORE
+    return 0
+
+
+def score_moves(board, depth=EVALUATOR_SEARCH_DEPTH):
+    """
+    Scores every legal move for the side to move (higher is better for that side).
+    Depth 2 assumes the best static reply; all leaf positions are evaluated in one batch.
+    """
+    _require_numpy()
+    sign = 1 if board.turn == chess.WHITE else -1
+    moves = list(board.legal_moves)
+    leaves = [] # Bitboard rows; leaf positions are visited with push/pop instead of copied
+    owners = [] # Index of the root move each leaf belongs to
+    fixed = {}  # Root move index -> terminal score
+    child = board.copy(stack=False)
+    for index, move in enumerate(moves):
+        child.push(move)
+        if depth < 2:
+            leaves.append(_board_row(child))
+            owners.append(index)
+        else:
+            replies = list(child.legal_moves)
+            if not replies:
+                fixed[index] = _terminal_score(child)
+            for reply in replies:
+                child.push(reply)
+                leaves.append(_board_row(child))
+                owners.append(index)
+                child.pop()
+        child.pop()
+
+    values = np.full(len(moves), np.inf, dtype=np.float64)
+    if leaves:
+        leaf_scores = evaluate_bitboards(_rows_to_bitboards(leaves)) * sign
+        np.minimum.at(values, np.array(owners), leaf_scores) # The opponent picks the reply worst for us
+    for index, score in fixed.items():
+        values[index] = score * sign
+    return moves, values
+
+
+def choose_move(board, depth=EVALUATOR_SEARCH_DEPTH, noise_cp=EVALUATOR_MOVE_NOISE_CP, rng=random):
+    """Best move by the evaluator, with up to noise_cp of random jitter for varied, weaker play."""
+    moves, values = score_moves(board, depth)
+    if not moves:
+        return None
+    best_index = max(range(len(moves)), key=lambda i: values[i] + rng.uniform(0, noise_cp))
+    return moves[best_index]
+
+
+def _random_positions(count, rng):
+    positions = []
+    while len(positions) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(0, 60)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        positions.append(board)
+    return positions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized evaluator")
+    parser.add_argument("--positions", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    _require_numpy()
+    boards = _random_positions(args.positions, random.Random(args.seed))
+    started = time.perf_counter()
+    bitboards = boards_to_bitboards(boards)
+    extracted = time.perf_counter()
+    scores = evaluate_bitboards(bitboards)
+    finished = time.perf_counter()
+    total = finished - started
+    print(f"{len(boards)} positions in {total * 1000:.1f} ms ({len(boards) / total:,.0f}/s): "
+          f"extraction {1000 * (extracted - started):.1f} ms, scoring {1000 * (finished - extracted):.1f} ms")
+    print(f"Score range {scores.min()} .. {scores.max()} cp")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,269 @@
+# src/event_recording.py
+
+import argparse
+import collections
+import json
+import os
+import random
+import sys
+import time
+import pygame
+import chess
+from src.constants import (WIDTH, HEIGHT, EVENT_RECORDING_PATH, EVENT_REPLAY_FRAME_BUDGET_MS,
+                           EVENT_REPLAY_SLOWEST_FRAMES, EVENT_REPLAY_REGRESSION_TOLERANCE)
+
+RECORDING_VERSION = 1
+
+
+class RecordingError(Exception):
+    pass
+
+
+def _json_value(value):
+    """The value as JSON (tuples become lists), or None if it cannot be stored."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)) and all(isinstance(item, (bool, int, float, str)) for item in value):
+        return list(value)
+    return None
+
+
+def encode_event(event):
+    attributes = {}
+    for key, value in event.dict.items():
+        stored = _json_value(value)
+        if stored is not None or value is None:
+            attributes[key] = stored
+    return [event.type, attributes]
+
+
+def decode_event(encoded):
+    event_type, attributes = encoded
+    return pygame.event.Event(event_type, {key: tuple(value) if isinstance(value, list) else value
+                                           for key, value in attributes.items()})
+
+
+def board_state(board):
+    """What a replay must reproduce exactly."""
+    return {
+        "fen": board.chess_board.fen(),
+        "moves": [move.uci() for move in board.chess_board.move_stack],
+        "game_over": bool(board.game_over),
+        "mode": board.game_mode,
+        "difficulty": board.current_ai_difficulty,
+    }
+
+
+class EventRecorder:
+    """
+    Writes the game loop's event stream as JSON lines: a header (RNG seed, versions,
+    window size), one line per frame that had events or AI moves, and an end line with
+    the frame count and final board state.
+    """
+    def __init__(self, path, seed, metadata=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.frame = 0
+        self.started = time.perf_counter()
+        self._frame_ai_moves = []
+        self._file = open(path, "w", encoding="utf-8")
+        header = {"version": RECORDING_VERSION, "seed": seed, "pygame": pygame.version.ver,
+                  "python_chess": chess.__version__, "size": [WIDTH, HEIGHT], "recorded_at": time.time()}
+        header.update(metadata or {})
+        self._write(header)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def record_ai_move(self, move):
+        self._frame_ai_moves.append(move.uci())
+
+    def record_frame(self, events):
+        """Call once per frame with that frame's events, before they are handled."""
+        if events or self._frame_ai_moves:
+            record = {"frame": self.frame, "t": round((time.perf_counter() - self.started) * 1000, 3),
+                      "events": [encode_event(event) for event in events]}
+            if self._frame_ai_moves:
+                # Played since the previous line; replays only need their order
+                record["ai_moves"] = self._frame_ai_moves
+                self._frame_ai_moves = []
+            self._write(record)
+        self.frame += 1
+
+    def close(self, board):
+        if self._file.closed:
+            return
+        record = {"end": True, "frames": self.frame, "state": board_state(board)}
+        if self._frame_ai_moves:
+            record["ai_moves"] = self._frame_ai_moves
+        self._write(record)
+        self._file.close()
+        print(f"Recorded {self.frame} frames to {self.path}")
+
+
+def load_recording(path):
+    """Returns (header, {frame: events}, AI moves in order, end record)."""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get("version") != RECORDING_VERSION:
+        raise RecordingError(f"{path} is not a version {RECORDING_VERSION} event recording.")
+    header = lines[0]
+    end = lines[-1] if lines[-1].get("end") else None
+    if end is None:
+        raise RecordingError(f"{path} has no end record (the game did not exit cleanly).")
+    events_by_frame = {}
+    ai_moves = []
+    for record in lines[1:]:
+        ai_moves.extend(record.get("ai_moves", []))
+        if "frame" in record:
+            events_by_frame[record["frame"]] = record["events"]
+    return header, events_by_frame, ai_moves, end
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def replay_recording(path, live_ai=False):
+    """
+    Feeds a recording back through Board.handle_event/update/draw headlessly, one frame
+    per recorded frame with no waiting (a fixed logical 60 Hz clock). Timers are ignored;
+    their recorded events are replayed instead. Unless live_ai is set, AI moves come from
+    the recording, so no engine runs and the replay is deterministic. Returns a report dict.
+    """
+    header, events_by_frame, ai_moves, end = load_recording(path)
+    if header.get("online"):
+        raise RecordingError("Online games cannot be replayed (the server's moves are not recorded).")
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    from src.board import Board
+    import src.assets_manager
+    import src.audio
+
+    src.audio.pre_init_mixer()
+    pygame.init()
+    screen = pygame.display.set_mode(tuple(header["size"]), pygame.RESIZABLE)
+    src.assets_manager.load_images()
+    src.audio.load_sounds(background=False) # A loader thread would add noise to the frame timings
+    random.seed(header["seed"])
+    scripted = None if live_ai else collections.deque(chess.Move.from_uci(uci) for uci in ai_moves)
+    board = Board(scripted_ai_moves=scripted)
+    played_ai_moves = []
+    board.ai_move_recorder = lambda move: played_ai_moves.append(move.uci())
+
+    frame_ms = []
+    try:
+        for frame in range(end["frames"]):
+            pygame.event.clear() # Live timers would make the replay depend on wall-clock time
+            started = time.perf_counter()
+            for encoded in events_by_frame.get(frame, []):
+                event = decode_event(encoded)
+                if event.type == pygame.VIDEORESIZE:
+                    screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+                if event.type != pygame.QUIT:
+                    board.handle_event(event)
+            board.update()
+            dirty_rects = board.draw(screen)
+            if dirty_rects is None:
+                pygame.display.flip()
+            else:
+                pygame.display.update(dirty_rects)
+            frame_ms.append((time.perf_counter() - started) * 1000)
+    finally:
+        board.close_engine()
+        board.close_explorer()
+        board.close_puzzles()
+        pygame.quit()
+
+    ordered = sorted(frame_ms)
+    slowest = sorted(range(len(frame_ms)), key=frame_ms.__getitem__, reverse=True)[:EVENT_REPLAY_SLOWEST_FRAMES]
+    state = board_state(board)
+    return {
+        "recording": os.path.abspath(path),
+        "live_ai": live_ai,
+        "frames": len(frame_ms),
+        "timing_ms": {
+            "total": round(sum(frame_ms), 3),
+            "mean": round(sum(frame_ms) / max(1, len(frame_ms)), 3),
+            "p50": round(_percentile(ordered, 0.50), 3),
+            "p95": round(_percentile(ordered, 0.95), 3),
+            "p99": round(_percentile(ordered, 0.99), 3),
+            "max": round(ordered[-1] if ordered else 0.0, 3),
+            "over_budget": sum(1 for ms in frame_ms if ms > EVENT_REPLAY_FRAME_BUDGET_MS),
+        },
+        "slowest_frames": [{"frame": frame, "ms": round(frame_ms[frame], 3),
+                            "events": [pygame.event.event_name(encoded[0]) for encoded in events_by_frame.get(frame, [])]}
+                           for frame in slowest],
+        "ai_moves": played_ai_moves,
+        "audio_latency_ms": src.audio.latency_summary(),
+        "state": state,
+        "matches_recording": state == end["state"],
+    }
+
+
+def compare_reports(report, baseline, tolerance=EVENT_REPLAY_REGRESSION_TOLERANCE):
+    """Lists regressions against a baseline report: a different final state, or slower mean/p95 frames."""
+    problems = []
+    if report["state"] != baseline["state"]:
+        problems.append(f"final state differs: {baseline['state']['fen']} -> {report['state']['fen']}")
+    for key in ("mean", "p95"):
+        before, after = baseline["timing_ms"][key], report["timing_ms"][key]
+        if before > 0 and after > before * tolerance:
+            problems.append(f"{key} frame time {before:.2f}ms -> {after:.2f}ms ({after / before:.0%} of baseline)")
+    return problems
+
+
+def default_recording_path():
+    return os.path.join(EVENT_RECORDING_PATH, time.strftime("%Y%m%d-%H%M%S") + ".jsonl")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded event stream headlessly and report frame timings")
+    parser.add_argument("recording")
+    parser.add_argument("--report", metavar="PATH", help="write the report as JSON (e.g. to keep as a baseline)")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against an earlier report")
+    parser.add_argument("--live-ai", action="store_true",
+                        help="let the engine/evaluator choose AI moves again instead of using the recorded ones")
+    args = parser.parse_args(argv)
+
+    try:
+        report = replay_recording(args.recording, args.live_ai)
+    except (RecordingError, OSError, ValueError) as e:
+        print(f"Replay failed: {e}")
+        return 1
+    timing = report["timing_ms"]
+    print(f"Replayed {report['frames']} frames in {timing['total'] / 1000:.2f}s: mean {timing['mean']:.2f}ms, "
+          f"p50 {timing['p50']:.2f}ms, p95 {timing['p95']:.2f}ms, p99 {timing['p99']:.2f}ms, max {timing['max']:.2f}ms, "
+          f"{timing['over_budget']} over the {EVENT_REPLAY_FRAME_BUDGET_MS:.1f}ms budget")
+    for slow in report["slowest_frames"][:3]:
+        print(f"  frame {slow['frame']}: {slow['ms']:.2f}ms {', '.join(slow['events'])}")
+    audio = report["audio_latency_ms"]
+    if audio:
+        print(f"  click-to-sound over {audio['sounds']} sounds: p50 {audio['p50']:.2f}ms, p95 {audio['p95']:.2f}ms "
+              f"(+{audio['buffer']:.1f}ms mixer buffer)")
+    exit_code = 0
+    if not report["matches_recording"]:
+        print("WARNING: the final board state differs from the recording.")
+        exit_code = 1
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare_reports(report, json.load(f))
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        if problems:
+            exit_code = 1
+        else:
+            print("No regressions against the baseline.")
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+# src/game_database.py
+
+import json
+import os
+import queue
+import sqlite3
+import struct
+import threading
+import time
+import chess
+from src.constants import GAME_DATABASE_PATH, GAME_DB_BATCH_SIZE, GAME_DB_BATCH_SECONDS
+from src.game_logic import position_hash, material_signature
+from src.game_record import (GameRecord, encode_move, decode_move, result_code_from_outcome,
+                             result_to_pgn, result_from_pgn)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    mode TEXT,
+    difficulty TEXT,
+    player_color TEXT,
+    result TEXT NOT NULL,
+    plies INTEGER NOT NULL,
+    start_fen TEXT,          -- NULL for the standard starting position
+    moves BLOB NOT NULL,     -- uint16 per ply, see game_record.encode_move
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS games_by_difficulty ON games(difficulty, result);
+CREATE INDEX IF NOT EXISTS games_by_result ON games(result);
+
+-- First ply at which each game reached a position (Polyglot Zobrist hash, signed 64-bit).
+CREATE TABLE IF NOT EXISTS positions (
+    hash INTEGER NOT NULL,
+    game_id INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    PRIMARY KEY (hash, game_id)
+) WITHOUT ROWID;
+
+-- First ply at which each game reached a material signature.
+CREATE TABLE IF NOT EXISTS materials (
+    material INTEGER NOT NULL,
+    game_id INTEGER NOT NULL,
+    ply INTEGER NOT NULL,
+    PRIMARY KEY (material, game_id)
+) WITHOUT ROWID;
+"""
+
+_GAME_COLUMNS = "g.id, g.played_at, g.mode, g.difficulty, g.player_color, g.result, g.plies"
+
+
+def _signed_hash(key):
+    """SQLite integers are signed 64-bit; Zobrist hashes are unsigned."""
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+
+def pack_material_signature(signature):
+    """Packs a material signature (12 small counts) into one integer, 4 bits per slot."""
+    packed = 0
+    for count in signature:
+        packed = (packed << 4) | min(count, 15)
+    return packed
+
+
+def _pack_moves(moves):
+    return struct.pack(f"<{len(moves)}H", *[encode_move(move) for move in moves])
+
+
+def _unpack_moves(blob):
+    return [decode_move(code) for code in struct.unpack(f"<{len(blob) // 2}H", blob)]
+
+
+class GameDatabase:
+    """
+    Local SQLite store of played games.
+    record_game() only queues the game; a background thread indexes positions and
+    commits queued games in batches, so callers on the UI thread never wait on disk.
+    """
+    def __init__(self, path=GAME_DATABASE_PATH, batch_size=GAME_DB_BATCH_SIZE,
+                 batch_seconds=GAME_DB_BATCH_SECONDS):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_seconds = batch_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._reader = self._connect(check_same_thread=False)
+        self._reader.executescript(_SCHEMA)
+        self._reader_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name="GameDatabaseWriter", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def open_default(cls, path=GAME_DATABASE_PATH):
+        """Opens the database, or returns None (games are then simply not stored)."""
+        try:
+            return cls(path)
+        except (sqlite3.Error, OSError) as e:
+            print(f"Could not open game database {path}: {e}")
+            return None
+
+    def _connect(self, check_same_thread=True):
+        connection = sqlite3.connect(self.path, check_same_thread=check_same_thread, timeout=30.0)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # --- Writing ---
+    def record_game(self, chess_board, metadata=None, result=None):
+        """Queues the game on the board (root position and move stack) for storage."""
+        if result is None:
+            result = result_code_from_outcome(chess_board.outcome())
+        root = chess_board.root()
+        start_fen = None if root.fen() == chess.STARTING_FEN else root.fen()
+        self._queue.put((time.time(), start_fen, list(chess_board.move_stack), result, dict(metadata or {})))
+
+    def record(self, record, played_at=None):
+        """Queues a GameRecord (e.g. an imported game) for storage."""
+        start_fen = None if record.start_fen == chess.STARTING_FEN else record.start_fen
+        self._queue.put((played_at or time.time(), start_fen, record.moves, record.result, dict(record.metadata)))
+
+    def flush(self):
+        """Blocks until every queued game has been committed."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._reader_lock:
+            self._reader.close()
+
+    def _writer_loop(self):
+        connection = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            deadline = time.perf_counter() + self.batch_seconds
+            while item is not None and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            games = [game for game in batch if game is not None]
+            try:
+                if games:
+                    with connection:
+                        for game in games:
+                            try:
+                                self._insert_game(connection, *game)
+                            except (ValueError, AssertionError) as e:
+                                print(f"Skipping a game with an invalid position or move: {e}")
+            except sqlite3.Error as e:
+                print(f"Error writing {len(games)} game(s) to the database: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(games) < len(batch): # Close sentinel
+                connection.close()
+                return
+
+    def _insert_game(self, connection, played_at, start_fen, moves, result, metadata):
+        board = chess.Board(start_fen or chess.STARTING_FEN)
+        positions = {_signed_hash(position_hash(board)): 0}
+        materials = {pack_material_signature(material_signature(board)): 0}
+        for ply, move in enumerate(moves, start=1):
+            capture_or_promotion = move.promotion or board.is_capture(move)
+            board.push(move)
+            positions.setdefault(_signed_hash(position_hash(board)), ply)
+            if capture_or_promotion:
+                materials.setdefault(pack_material_signature(material_signature(board)), ply)
+
+        cursor = connection.execute(
+            "INSERT INTO games (played_at, mode, difficulty, player_color, result, plies, start_fen, moves, metadata) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (played_at, metadata.get("Mode"), metadata.get("AIDifficulty"), metadata.get("PlayerColor"),
+             result_to_pgn(result), len(moves), start_fen, _pack_moves(moves),
+             json.dumps(metadata, separators=(",", ":")) if metadata else None))
+        game_id = cursor.lastrowid
+        connection.executemany("INSERT INTO positions (hash, game_id, ply) VALUES (?, ?, ?)",
+                               [(key, game_id, ply) for key, ply in positions.items()])
+        connection.executemany("INSERT INTO materials (material, game_id, ply) VALUES (?, ?, ?)",
+                               [(key, game_id, ply) for key, ply in materials.items()])
+
+    # --- Queries ---
+    def _query(self, sql, parameters=()):
+        with self._reader_lock:
+            return [dict(row) for row in self._reader.execute(sql, parameters)]
+
+    def games_reaching(self, position, limit=100):
+        """Games that reached the position (a chess.Board or FEN), with the ply it was reached at."""
+        board = chess.Board(position) if isinstance(position, str) else position
+        return self._query(
+            f"SELECT {_GAME_COLUMNS}, p.ply FROM positions p JOIN games g ON g.id = p.game_id "
+            "WHERE p.hash = ? ORDER BY g.id DESC LIMIT ?",
+            (_signed_hash(position_hash(board)), limit))
+
+    def games_with_material(self, signature, limit=100):
+        """Games that reached a material signature (a tuple from game_logic, or a chess.Board)."""
+        if isinstance(signature, chess.Board):
+            signature = material_signature(signature)
+        return self._query(
+            f"SELECT {_GAME_COLUMNS}, m.ply FROM materials m JOIN games g ON g.id = m.game_id "
+            "WHERE m.material = ? ORDER BY g.id DESC LIMIT ?",
+            (pack_material_signature(signature), limit))
+
+    def games_by(self, difficulty=None, result=None, mode=None, limit=100):
+        """Games filtered by AI difficulty, PGN result string ("1-0", "1/2-1/2", ...) and mode."""
+        conditions = []
+        parameters = []
+        for column, value in (("difficulty", difficulty), ("result", result), ("mode", mode)):
+            if value is not None:
+                conditions.append(f"g.{column} = ?")
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        return self._query(f"SELECT {_GAME_COLUMNS} FROM games g {where}ORDER BY g.id DESC LIMIT ?",
+                           (*parameters, limit))
+
+    def count_games(self):
+        return self._query("SELECT COUNT(*) AS count FROM games")[0]["count"]
+
+    def load_record(self, game_id):
+        """Returns the stored game as a GameRecord, or None if there is no such game."""
+        rows = self._query("SELECT result, start_fen, moves, metadata FROM games WHERE id = ?", (game_id,))
+        if not rows:
+            return None
+        row = rows[0]
+        return GameRecord(row["start_fen"] or chess.STARTING_FEN, _unpack_moves(row["moves"]),
+                          result_from_pgn(row["result"]),
+                          json.loads(row["metadata"]) if row["metadata"] else None)
@@ -0,0 +1,220 @@
+# src/game_logic.py
+
+import chess
+import chess.polyglot
+
+# Material signature layout: per colour (White first) the counts of
+# pawns, knights, light-square bishops, dark-square bishops, rooks, queens.
+_SIG_PAWN, _SIG_KNIGHT, _SIG_LIGHT_BISHOP, _SIG_DARK_BISHOP, _SIG_ROOK, _SIG_QUEEN = range(6)
+_SIG_SLOTS_PER_COLOR = 6
+_SIG_SLOTS = {chess.PAWN: _SIG_PAWN, chess.KNIGHT: _SIG_KNIGHT,
+              chess.ROOK: _SIG_ROOK, chess.QUEEN: _SIG_QUEEN}
+
+
+def position_hash(board):
+    """Returns the 64-bit Polyglot Zobrist hash of the position on the board."""
+    return chess.polyglot.zobrist_hash(board)
+
+
+def _signature_slot(piece_type, color, square):
+    base = 0 if color == chess.WHITE else _SIG_SLOTS_PER_COLOR
+    if piece_type == chess.BISHOP:
+        is_light = bool(chess.BB_SQUARES[square] & chess.BB_LIGHT_SQUARES)
+        return base + (_SIG_LIGHT_BISHOP if is_light else _SIG_DARK_BISHOP)
+    return base + _SIG_SLOTS[piece_type]
+
+
+def material_signature(board):
+    """Computes the material signature of a board from scratch."""
+    signature = [0] * (2 * _SIG_SLOTS_PER_COLOR)
+    for square, piece in board.piece_map().items():
+        if piece.piece_type != chess.KING:
+            signature[_signature_slot(piece.piece_type, piece.color, square)] += 1
+    return tuple(signature)
+
+
+_INSUFFICIENT_MATERIAL_CACHE = {}
+
+
+def _side_has_insufficient_material(signature, color):
+    own = signature[:6] if color == chess.WHITE else signature[6:]
+    other = signature[6:] if color == chess.WHITE else signature[:6]
+    if own[_SIG_PAWN] or own[_SIG_ROOK] or own[_SIG_QUEEN]:
+        return False
+    if own[_SIG_KNIGHT]:
+        # A lone knight cannot mate unless the opponent has pieces to selfmate with.
+        own_minors = own[_SIG_KNIGHT] + own[_SIG_LIGHT_BISHOP] + own[_SIG_DARK_BISHOP]
+        other_blockers = (other[_SIG_PAWN] + other[_SIG_KNIGHT] + other[_SIG_LIGHT_BISHOP] +
+                          other[_SIG_DARK_BISHOP] + other[_SIG_ROOK])
+        return own_minors <= 1 and not other_blockers
+    if own[_SIG_LIGHT_BISHOP] or own[_SIG_DARK_BISHOP]:
+        # Bishops all on one square colour (both sides) and no pawns or knights anywhere.
+        light = signature[_SIG_LIGHT_BISHOP] + signature[6 + _SIG_LIGHT_BISHOP]
+        dark = signature[_SIG_DARK_BISHOP] + signature[6 + _SIG_DARK_BISHOP]
+        no_pawns_or_knights = not (signature[_SIG_PAWN] or signature[6 + _SIG_PAWN] or
+                                   signature[_SIG_KNIGHT] or signature[6 + _SIG_KNIGHT])
+        return (not light or not dark) and no_pawns_or_knights
+    return True
+
+
+def is_insufficient_material_signature(signature):
+    """Same rules as chess.Board.is_insufficient_material(), decided from a signature."""
+    result = _INSUFFICIENT_MATERIAL_CACHE.get(signature)
+    if result is None:
+        result = (_side_has_insufficient_material(signature, chess.WHITE) and
+                  _side_has_insufficient_material(signature, chess.BLACK))
+        _INSUFFICIENT_MATERIAL_CACHE[signature] = result
+    return result
+
+
+class TerminationTracker:
+    """
+    Keeps game-over detection cheap and flat as the game grows.
+    All pushes and pops on the tracked chess.Board must go through this tracker,
+    which maintains a position-hash repetition counter, a material signature stack
+    and a per-ply cache of the legal move list, check flag and outcome.
+    """
+    def __init__(self, chess_board):
+        self.chess_board = chess_board
+        self.reset_from_board()
+
+    def reset_from_board(self):
+        """Rebuilds all counters from the current board (and its move stack)."""
+        replay = chess.Board(self.chess_board.root().fen()) if self.chess_board.move_stack else None
+        self.repetition_counts = {}
+        self.hash_stack = []
+        self.signature_stack = []
+        if replay is None:
+            self._record_position(self.chess_board)
+        else:
+            self._record_position(replay)
+            for move in self.chess_board.move_stack:
+                replay.push(move)
+                self._record_position(replay)
+        self._invalidate_ply_cache()
+
+    def reset(self, fen=None):
+        """Resets the tracked board to the starting position (or the given FEN)."""
+        if fen is None:
+            self.chess_board.reset()
+        else:
+            self.chess_board.set_fen(fen)
+        self.reset_from_board()
+
+    def _record_position(self, board):
+        key = position_hash(board)
+        self.hash_stack.append(key)
+        self.repetition_counts[key] = self.repetition_counts.get(key, 0) + 1
+        self.signature_stack.append(material_signature(board))
+
+    def _invalidate_ply_cache(self):
+        self._legal_moves = None
+        self._legal_move_set = None
+        self._is_check = None
+        self._outcome = None
+        self._outcome_computed = False
+
+    def push(self, move):
+        board = self.chess_board
+        signature = self.signature_stack[-1]
+        captured_square = move.to_square
+        if board.is_en_passant(move):
+            captured_square = move.to_square + (-8 if board.turn == chess.WHITE else 8)
+        captured = board.piece_at(captured_square)
+        if captured is not None or move.promotion:
+            signature = list(signature)
+            if captured is not None:
+                signature[_signature_slot(captured.piece_type, captured.color, captured_square)] -= 1
+            if move.promotion:
+                signature[_signature_slot(chess.PAWN, board.turn, move.from_square)] -= 1
+                signature[_signature_slot(move.promotion, board.turn, move.to_square)] += 1
+            signature = tuple(signature)
+
+        board.push(move)
+        key = position_hash(board)
+        self.hash_stack.append(key)
+        self.repetition_counts[key] = self.repetition_counts.get(key, 0) + 1
+        self.signature_stack.append(signature)
+        self._invalidate_ply_cache()
+
+    def pop(self):
+        move = self.chess_board.pop()
+        key = self.hash_stack.pop()
+        count = self.repetition_counts[key] - 1
+        if count:
+            self.repetition_counts[key] = count
+        else:
+            del self.repetition_counts[key]
+        self.signature_stack.pop()
+        self._invalidate_ply_cache()
+        return move
+
+    def prime(self, legal_moves, is_check, outcome):
+        """Seeds the per-ply cache with values already known (e.g. from a history snapshot)."""
+        self._legal_moves = legal_moves
+        self._legal_move_set = None
+        self._is_check = is_check
+        self._outcome = outcome
+        self._outcome_computed = True
+
+    @property
+    def legal_moves(self):
+        """The legal moves of the current ply, generated once and reused."""
+        if self._legal_moves is None:
+            self._legal_moves = list(self.chess_board.legal_moves)
+        return self._legal_moves
+
+    def is_legal(self, move):
+        if self._legal_move_set is None:
+            self._legal_move_set = set(self.legal_moves)
+        return move in self._legal_move_set
+
+    def is_check(self):
+        if self._is_check is None:
+            self._is_check = self.chess_board.is_check()
+        return self._is_check
+
+    @property
+    def material_signature(self):
+        return self.signature_stack[-1]
+
+    @property
+    def position_key(self):
+        return self.hash_stack[-1]
+
+    def repetition_count(self):
+        return self.repetition_counts.get(self.hash_stack[-1], 0)
+
+    def is_insufficient_material(self):
+        return is_insufficient_material_signature(self.signature_stack[-1])
+
+    def can_claim_threefold_repetition(self):
+        return self.repetition_count() >= 3
+
+    def can_claim_fifty_moves(self):
+        return self.chess_board.halfmove_clock >= 100 and bool(self.legal_moves)
+
+    def outcome(self):
+        """Mirrors chess.Board.outcome() (no draw claims) using the cached counters."""
+        if self._outcome_computed:
+            return self._outcome
+
+        board = self.chess_board
+        outcome = None
+        if not self.legal_moves:
+            if self.is_check():
+                outcome = chess.Outcome(chess.Termination.CHECKMATE, not board.turn)
+            elif self.is_insufficient_material():
+                outcome = chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+            else:
+                outcome = chess.Outcome(chess.Termination.STALEMATE, None)
+        elif self.is_insufficient_material():
+            outcome = chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+        elif board.halfmove_clock >= 150:
+            outcome = chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+        elif self.repetition_count() >= 5:
+            outcome = chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+
+        self._outcome = outcome
+        self._outcome_computed = True
+        return outcome
@@ -0,0 +1,429 @@
+# src/game_record.py
+
+import io
+import json
+import mmap
+import os
+import struct
+import chess
+import chess.pgn
+from src.constants import GAME_RECORD_CHECKPOINT_INTERVAL
+
+# --- Record layout ---
+# header | start FEN (utf-8) | metadata (JSON, utf-8) | moves (uint16 each) | checkpoints
+RECORD_MAGIC = b"UCGR"
+RECORD_VERSION = 1
+_HEADER = struct.Struct("<4sBBHIHH")  # magic, version, result, checkpoint interval, plies, fen len, meta len
+_MOVE = struct.Struct("<H")
+
+# Checkpoint: 64 squares packed as nibbles, then turn/castling, ep square, halfmove, fullmove.
+_CHECKPOINT = struct.Struct("<32sBBHH")
+_NO_EP = 0xFF
+
+# --- Archive trailer: offsets of every record, then count and magic ---
+ARCHIVE_MAGIC = b"UCGA"
+_TRAILER = struct.Struct("<I4s")
+_OFFSET = struct.Struct("<Q")
+
+RESULT_UNKNOWN, RESULT_WHITE, RESULT_BLACK, RESULT_DRAW = range(4)
+_RESULT_TO_PGN = {RESULT_UNKNOWN: "*", RESULT_WHITE: "1-0", RESULT_BLACK: "0-1", RESULT_DRAW: "1/2-1/2"}
+_PGN_TO_RESULT = {v: k for k, v in _RESULT_TO_PGN.items()}
+
+# Nibble codes: 0 empty, 1-6 white P..K, 7-12 black P..K.
+_PIECE_TO_NIBBLE = {(pt, color): pt + (0 if color == chess.WHITE else 6)
+                    for pt in chess.PIECE_TYPES for color in chess.COLORS}
+_NIBBLE_TO_PIECE = {v: chess.Piece(pt, color) for (pt, color), v in _PIECE_TO_NIBBLE.items()}
+
+
+class GameRecordError(Exception):
+    pass
+
+
+def encode_move(move):
+    """Packs a move into 16 bits: from (6) | to (6) << 6 | promotion piece type (3) << 12."""
+    if not move:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(code):
+    if code == 0:
+        return chess.Move.null()
+    promotion = (code >> 12) & 0x7
+    return chess.Move(code & 0x3F, (code >> 6) & 0x3F, promotion=promotion or None)
+
+
+def result_code_from_outcome(outcome):
+    if outcome is None:
+        return RESULT_UNKNOWN
+    if outcome.winner is None:
+        return RESULT_DRAW
+    return RESULT_WHITE if outcome.winner == chess.WHITE else RESULT_BLACK
+
+
+def result_to_pgn(result):
+    return _RESULT_TO_PGN.get(result, "*")
+
+
+def result_from_pgn(text):
+    return _PGN_TO_RESULT.get(text, RESULT_UNKNOWN)
+
+
+def _pack_position(board):
+    nibbles = bytearray(32)
+    for square, piece in board.piece_map().items():
+        code = _PIECE_TO_NIBBLE[(piece.piece_type, piece.color)]
+        nibbles[square >> 1] |= code << (4 * (square & 1))
+    flags = (1 if board.turn == chess.WHITE else 0)
+    flags |= (2 if board.has_kingside_castling_rights(chess.WHITE) else 0)
+    flags |= (4 if board.has_queenside_castling_rights(chess.WHITE) else 0)
+    flags |= (8 if board.has_kingside_castling_rights(chess.BLACK) else 0)
+    flags |= (16 if board.has_queenside_castling_rights(chess.BLACK) else 0)
+    ep_square = board.ep_square if board.ep_square is not None else _NO_EP
+    return _CHECKPOINT.pack(bytes(nibbles), flags, ep_square,
+                            min(board.halfmove_clock, 0xFFFF), min(board.fullmove_number, 0xFFFF))
+
+
+def _unpack_position(buffer, offset):
+    nibbles, flags, ep_square, halfmove, fullmove = _CHECKPOINT.unpack_from(buffer, offset)
+    board = chess.Board(None)
+    for index, byte in enumerate(nibbles):
+        if byte & 0x0F:
+            board.set_piece_at(index * 2, _NIBBLE_TO_PIECE[byte & 0x0F])
+        if byte >> 4:
+            board.set_piece_at(index * 2 + 1, _NIBBLE_TO_PIECE[byte >> 4])
+    board.turn = bool(flags & 1)
+    castling = 0
+    if flags & 2: castling |= chess.BB_H1
+    if flags & 4: castling |= chess.BB_A1
+    if flags & 8: castling |= chess.BB_H8
+    if flags & 16: castling |= chess.BB_A8
+    board.castling_rights = castling
+    board.ep_square = None if ep_square == _NO_EP else ep_square
+    board.halfmove_clock = halfmove
+    board.fullmove_number = fullmove
+    return board
+
+
+class GameRecord:
+    """
+    A single game in the compact binary format.
+    Records built from raw bytes (e.g. an mmap slice) decode moves lazily,
+    and board_at(ply) seeks via the nearest checkpoint instead of replaying the game.
+    """
+    def __init__(self, start_fen=chess.STARTING_FEN, moves=None, result=RESULT_UNKNOWN,
+                 metadata=None, checkpoint_interval=GAME_RECORD_CHECKPOINT_INTERVAL):
+        self.start_fen = start_fen
+        self._moves = list(moves) if moves is not None else []
+        self.result = result
+        self.metadata = dict(metadata) if metadata else {}
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self._buffer = None
+        self._moves_offset = 0
+        self._checkpoints_offset = 0
+        self._ply_count = len(self._moves)
+
+    @classmethod
+    def from_board(cls, chess_board, result=None, metadata=None):
+        """Builds a record from a chess.Board's root position and move stack."""
+        if result is None:
+            result = result_code_from_outcome(chess_board.outcome())
+        return cls(chess_board.root().fen(), chess_board.move_stack, result, metadata)
+
+    @classmethod
+    def from_bytes(cls, buffer, offset=0):
+        """Parses a record header from any buffer (bytes, memoryview, mmap) without copying the moves."""
+        if len(buffer) - offset < _HEADER.size:
+            raise GameRecordError("Buffer too small for a game record header.")
+        magic, version, result, interval, plies, fen_len, meta_len = _HEADER.unpack_from(buffer, offset)
+        if magic != RECORD_MAGIC:
+            raise GameRecordError("Not a game record (bad magic).")
+        if version != RECORD_VERSION:
+            raise GameRecordError(f"Unsupported game record version: {version}")
+        position = offset + _HEADER.size
+        start_fen = bytes(buffer[position:position + fen_len]).decode("utf-8")
+        position += fen_len
+        metadata = json.loads(bytes(buffer[position:position + meta_len]).decode("utf-8")) if meta_len else {}
+        position += meta_len
+
+        record = cls(start_fen, None, result, metadata, interval)
+        record._moves = None
+        record._buffer = buffer
+        record._moves_offset = position
+        record._checkpoints_offset = position + plies * _MOVE.size
+        record._ply_count = plies
+        return record
+
+    def __len__(self):
+        return self._ply_count
+
+    @property
+    def moves(self):
+        if self._moves is None:
+            count = self._ply_count
+            codes = struct.unpack_from(f"<{count}H", self._buffer, self._moves_offset)
+            self._moves = [decode_move(code) for code in codes]
+        return self._moves
+
+    def move_at(self, ply_index):
+        """Returns the move played at ply_index (0-based) without decoding the whole game."""
+        if self._moves is not None:
+            return self._moves[ply_index]
+        if not 0 <= ply_index < self._ply_count:
+            raise IndexError(ply_index)
+        return decode_move(_MOVE.unpack_from(self._buffer, self._moves_offset + ply_index * _MOVE.size)[0])
+
+    @property
+    def size_in_bytes(self):
+        fen_len = len(self.start_fen.encode("utf-8"))
+        meta_len = len(self._metadata_bytes())
+        checkpoints = self._ply_count // self.checkpoint_interval + 1
+        return _HEADER.size + fen_len + meta_len + self._ply_count * _MOVE.size + checkpoints * _CHECKPOINT.size
+
+    def _metadata_bytes(self):
+        return json.dumps(self.metadata, separators=(",", ":")).encode("utf-8") if self.metadata else b""
+
+    def to_bytes(self):
+        moves = self.moves
+        fen_bytes = self.start_fen.encode("utf-8")
+        meta_bytes = self._metadata_bytes()
+        out = bytearray(_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, self.result, self.checkpoint_interval,
+                                     len(moves), len(fen_bytes), len(meta_bytes)))
+        out += fen_bytes
+        out += meta_bytes
+        out += struct.pack(f"<{len(moves)}H", *[encode_move(move) for move in moves])
+
+        board = chess.Board(self.start_fen)
+        out += _pack_position(board)
+        for ply, move in enumerate(moves, start=1):
+            board.push(move)
+            if ply % self.checkpoint_interval == 0:
+                out += _pack_position(board)
+        return bytes(out)
+
+    def board_at(self, ply):
+        """
+        Returns a chess.Board for the position after `ply` half-moves.
+        The board starts from the nearest checkpoint, so its move stack only
+        holds the few moves replayed since that checkpoint.
+        """
+        if not 0 <= ply <= self._ply_count:
+            raise IndexError(ply)
+        checkpoint_index = ply // self.checkpoint_interval
+        if self._buffer is not None:
+            offset = self._checkpoints_offset + checkpoint_index * _CHECKPOINT.size
+            board = _unpack_position(self._buffer, offset)
+            first_ply = checkpoint_index * self.checkpoint_interval
+        else:
+            board = chess.Board(self.start_fen)
+            first_ply = 0
+        for ply_index in range(first_ply, ply):
+            board.push(self.move_at(ply_index))
+        return board
+
+    def to_board(self):
+        """Returns a chess.Board at the final position with the full move stack (for resuming)."""
+        board = chess.Board(self.start_fen)
+        for move in self.moves:
+            board.push(move)
+        return board
+
+    def detach(self):
+        """Copies lazily-referenced data so the record outlives the buffer it was read from."""
+        self.moves
+        self._buffer = None
+        return self
+
+
+# --- Single game files ---
+
+def save_game(path, record):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(record.to_bytes())
+    os.replace(temp_path, path)
+
+
+def load_game(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    return GameRecord.from_bytes(data)
+
+
+# --- Multi-game archives ---
+
+class GameArchive:
+    """Read-only, memory-mapped access to an archive of many game records."""
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise GameRecordError(f"Archive is empty: {path}")
+        self._view = memoryview(self._mmap)
+        self._offsets = _read_archive_offsets(self._view)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        return GameRecord.from_bytes(self._view, self._offsets[index])
+
+    def __iter__(self):
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def close(self):
+        if self._mmap is not None:
+            self._view.release()
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _read_archive_offsets(buffer):
+    if len(buffer) < _TRAILER.size:
+        raise GameRecordError("File too small to be a game archive.")
+    count, magic = _TRAILER.unpack_from(buffer, len(buffer) - _TRAILER.size)
+    if magic != ARCHIVE_MAGIC:
+        raise GameRecordError("Not a game archive (bad trailer magic).")
+    index_start = len(buffer) - _TRAILER.size - count * _OFFSET.size
+    return list(struct.unpack_from(f"<{count}Q", buffer, index_start))
+
+
+def append_to_archive(path, records):
+    """Appends records to an archive (creating it if needed) and rewrites the trailing index."""
+    offsets = []
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            data_end = os.path.getsize(path)
+            f.seek(data_end - _TRAILER.size)
+            count, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != ARCHIVE_MAGIC:
+                raise GameRecordError(f"Not a game archive: {path}")
+            index_size = count * _OFFSET.size
+            f.seek(data_end - _TRAILER.size - index_size)
+            offsets = list(struct.unpack(f"<{count}Q", f.read(index_size)))
+            data_end -= _TRAILER.size + index_size
+        mode = "r+b"
+    else:
+        data_end = 0
+        mode = "wb"
+
+    with open(path, mode) as f:
+        f.seek(data_end)
+        f.truncate()
+        for record in records:
+            offsets.append(f.tell())
+            f.write(record.to_bytes())
+        f.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        f.write(_TRAILER.pack(len(offsets), ARCHIVE_MAGIC))
+    return len(offsets)
+
+
+# --- PGN import/export ---
+
+def record_to_pgn(record):
+    game = chess.pgn.Game()
+    for key, value in record.metadata.items():
+        game.headers[str(key)] = str(value)
+    if record.start_fen != chess.STARTING_FEN:
+        game.setup(chess.Board(record.start_fen))
+    game.headers["Result"] = result_to_pgn(record.result)
+    node = game
+    for move in record.moves:
+        node = node.add_variation(move)
+    return str(game)
+
+
+def record_from_pgn_game(game):
+    board = game.board()
+    metadata = {key: value for key, value in game.headers.items()
+                if key not in ("Result", "FEN", "SetUp") and value not in ("?", "????.??.??")}
+    return GameRecord(board.fen(), list(game.mainline_moves()),
+                      result_from_pgn(game.headers.get("Result", "*")), metadata)
+
+
+def record_from_pgn(pgn_text):
+    game = chess.pgn.read_game(io.StringIO(pgn_text))
+    if game is None:
+        raise GameRecordError("No game found in PGN text.")
+    return record_from_pgn_game(game)
+
+
+def iter_pgn_records(pgn_path):
+    """Streams GameRecords from a PGN file one game at a time."""
+    with open(pgn_path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            yield record_from_pgn_game(game)
+
+
+def split_pgn(pgn_path, chunk_bytes):
+    """Splits a PGN file into byte ranges that each start at an [Event tag."""
+    size = os.path.getsize(pgn_path)
+    boundaries = [0]
+    with open(pgn_path, "rb") as f:
+        while boundaries[-1] + chunk_bytes < size:
+            f.seek(boundaries[-1] + chunk_bytes)
+            f.readline() # Skip a possibly partial line
+            while True:
+                position = f.tell()
+                line = f.readline()
+                if not line:
+                    position = size
+                    break
+                if line.startswith(b"[Event "):
+                    break
+            if position >= size:
+                break
+            boundaries.append(position)
+    boundaries.append(size)
+    return [(pgn_path, boundaries[i], boundaries[i + 1]) for i in range(len(boundaries) - 1)]
+
+
+def iter_pgn_chunk(pgn_path, start, end):
+    """Yields the games in bytes [start, end) of a PGN file, e.g. one range from split_pgn()."""
+    with open(pgn_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    stream = io.StringIO(data.decode("utf-8", errors="replace"))
+    while True:
+        game = chess.pgn.read_game(stream)
+        if game is None:
+            return
+        yield game
+
+
+def import_pgn_to_archive(pgn_path, archive_path, batch_size=1000):
+    batch = []
+    total = 0
+    for record in iter_pgn_records(pgn_path):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            total = append_to_archive(archive_path, batch)
+            batch = []
+    if batch or total == 0:
+        total = append_to_archive(archive_path, batch)
+    return total
+
+
+def export_archive_to_pgn(archive_path, pgn_path):
+    with GameArchive(archive_path) as archive, open(pgn_path, "w", encoding="utf-8") as f:
+        for record in archive:
+            f.write(record_to_pgn(record))
+            f.write("\n\n")
+        return len(archive)
@@ -0,0 +1,132 @@
+# src/history.py
+
+import chess
+from src.constants import ROWS
+from src.game_record import encode_move, decode_move
+
+# Visual board codes: 0 empty, 1-12 piece notations as used by Board.visual_board.
+PIECE_NOTATIONS = (None, 'wP', 'wN', 'wB', 'wR', 'wQ', 'wK', 'bP', 'bN', 'bB', 'bR', 'bQ', 'bK')
+_PIECE_CODES = {(pt, color): pt + (0 if color == chess.WHITE else 6)
+                for pt in chess.PIECE_TYPES for color in chess.COLORS}
+
+
+def square_to_coords(square):
+    return ROWS - 1 - chess.square_rank(square), chess.square_file(square)
+
+
+class PlySnapshot:
+    """Everything the UI derives from a position, captured once when the ply is first reached."""
+    __slots__ = ("visual", "check_coords", "outcome", "legal_codes", "san")
+
+    def __init__(self, visual, check_coords, outcome, legal_codes, san):
+        self.visual = visual              # bytes(64), index = row * 8 + col
+        self.check_coords = check_coords  # (row, col) of the king in check, or None
+        self.outcome = outcome            # chess.Outcome or None
+        self.legal_codes = legal_codes    # tuple of 16-bit encoded legal moves
+        self.san = san                    # SAN of the move that led here ('' for the start)
+
+    @classmethod
+    def capture(cls, chess_board, termination, san=""):
+        visual = bytearray(64)
+        for square, piece in chess_board.piece_map().items():
+            row, col = square_to_coords(square)
+            visual[row * 8 + col] = _PIECE_CODES[(piece.piece_type, piece.color)]
+        check_coords = None
+        if termination.is_check():
+            king_square = chess_board.king(chess_board.turn)
+            if king_square is not None:
+                check_coords = square_to_coords(king_square)
+        legal_codes = tuple(encode_move(move) for move in termination.legal_moves)
+        return cls(bytes(visual), check_coords, termination.outcome(), legal_codes, san)
+
+    def fill_visual_board(self, visual_board):
+        visual = self.visual
+        for row in range(ROWS):
+            board_row = visual_board[row]
+            offset = row * 8
+            for col in range(8):
+                board_row[col] = PIECE_NOTATIONS[visual[offset + col]]
+
+    def legal_moves(self):
+        return [decode_move(code) for code in self.legal_codes]
+
+
+class MoveHistory:
+    """
+    Main-line move history with redo and jump-to-ply.
+    All moves go through the TerminationTracker so its counters stay correct;
+    each ply's derived UI state is kept as a PlySnapshot so jumps never recompute it.
+    """
+    def __init__(self, termination):
+        self.termination = termination
+        self.line = []        # every move of the main line, including undone (redo-able) ones
+        self.snapshots = []   # snapshots[ply] describes the position after `ply` moves
+        self.cursor = 0       # ply currently on the board
+        self.reset_from_board()
+
+    @property
+    def chess_board(self):
+        return self.termination.chess_board
+
+    def reset(self, fen=None):
+        self.termination.reset(fen)
+        self.reset_from_board()
+
+    def reset_from_board(self):
+        """Adopts the board's current position as the start of the history."""
+        self.line = []
+        self.snapshots = [PlySnapshot.capture(self.chess_board, self.termination)]
+        self.cursor = 0
+        self.start_turn = self.chess_board.turn
+        self.start_fullmove = self.chess_board.fullmove_number
+
+    def turn_at(self, ply):
+        return self.start_turn if ply % 2 == 0 else not self.start_turn
+
+    def __len__(self):
+        return len(self.line)
+
+    @property
+    def current(self):
+        return self.snapshots[self.cursor]
+
+    def can_undo(self):
+        return self.cursor > 0
+
+    def can_redo(self):
+        return self.cursor < len(self.line)
+
+    def is_at_end(self):
+        return self.cursor == len(self.line)
+
+    def push(self, move):
+        """Plays a new move at the cursor, discarding redo history unless it is the same move."""
+        if self.cursor < len(self.line):
+            if self.line[self.cursor] == move:
+                return self.jump_to(self.cursor + 1)
+            del self.line[self.cursor:]
+            del self.snapshots[self.cursor + 1:]
+        san = self.chess_board.san(move)
+        self.termination.push(move)
+        self.line.append(move)
+        self.cursor += 1
+        snapshot = PlySnapshot.capture(self.chess_board, self.termination, san)
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def jump_to(self, ply):
+        """Moves the board to `ply`, reusing stored snapshots for all derived state."""
+        ply = max(0, min(ply, len(self.line)))
+        while self.cursor > ply:
+            self.termination.pop()
+            self.cursor -= 1
+        while self.cursor < ply:
+            self.termination.push(self.line[self.cursor])
+            self.cursor += 1
+        snapshot = self.snapshots[self.cursor]
+        self.termination.prime(snapshot.legal_moves(), snapshot.check_coords is not None, snapshot.outcome)
+        return snapshot
+
+    def san_at(self, ply):
+        """SAN of the move that reached `ply` (1-based)."""
+        return self.snapshots[ply].san
@@ -3,6 +3,8 @@
 import pygame
 import sys
 import os
+import argparse
+import random
 
 # --- Path Setup ---
 try:
@@ -17,67 +19,109 @@ except NameError:
     if project_root not in sys.path: sys.path.insert(0, project_root)
     if current_dir not in sys.path: sys.path.insert(0, current_dir)
 
-from src.constants import WIDTH, HEIGHT
+from src.constants import NET_DEFAULT_PORT
 from src.board import Board
+from src.game_database import GameDatabase
+from src.event_recording import EventRecorder, default_recording_path
+from src.window import enable_dpi_awareness, initial_window_size, clamp_window_size
 import src.assets_manager
+import src.audio
 
-AI_MOVE_EVENT = pygame.USEREVENT + 1
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="The Unbeatable Chess")
+    parser.add_argument("--connect", metavar="HOST[:PORT]",
+                        help="play online through a game server (see src/net_server.py)")
+    parser.add_argument("--game", help="online game id to join (a new game is created if omitted)")
+    parser.add_argument("--watch", action="store_true", help="watch the online game instead of playing")
+    parser.add_argument("--record", nargs="?", const="", metavar="PATH",
+                        help="record input events for src/event_recording.py replays (default: a new file "
+                             "in the user data folder)")
+    parser.add_argument("--seed", type=int, help="random seed (recorded with --record)")
+    return parser.parse_args(argv)
 
-def run_game():
+def run_game(args=None):
+    if args is None:
+        args = parse_args([])
+    enable_dpi_awareness()
+    src.audio.pre_init_mixer()
     pygame.init()
     print("Pygame initialized.")
 
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    width, height = initial_window_size()
+    screen = pygame.display.set_mode((width, height), pygame.RESIZABLE)
     pygame.display.set_caption("The Unbeatable Chess")
-    print(f"Screen setup complete: {WIDTH}x{HEIGHT}")
+    print(f"Screen setup complete: {width}x{height}")
 
     src.assets_manager.load_images() 
-    src.assets_manager.load_sounds()
+    src.audio.load_sounds()
     print("Asset loading explicitly called.")
 
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    random.seed(seed)
+    recorder = None
+    if args.record is not None:
+        recorder = EventRecorder(args.record or default_recording_path(), seed,
+                                 {"online": bool(args.connect), "size": list(screen.get_size())})
+
+    game_database = GameDatabase.open_default()
     try:
-        board = Board()
+        board = Board(game_database=game_database)
         print("Board object created.")
     except Exception as e:
         print(f"Error creating Board object: {e}")
         pygame.quit()
         sys.exit()
 
+    if recorder:
+        board.ai_move_recorder = recorder.record_ai_move
+        print(f"Recording input events to {recorder.path} (seed {seed})")
+
+    if args.connect:
+        host, _, port = args.connect.partition(":")
+        board.connect_online(host, int(port) if port else NET_DEFAULT_PORT, game_id=args.game, watch=args.watch)
+
     clock = pygame.time.Clock()
     running = True
     print("Starting game loop...")
     while running:
-        mouse_pos = pygame.mouse.get_pos() 
+        events = pygame.event.get()
+        if recorder:
+            recorder.record_frame(events)
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False 
-
-            # Pass MOUSEMOTION to buttons for hover effects.
-            # Button click actions are now initiated from board.handle_button_events
-            # if it returns True for a MOUSEBUTTONDOWN event.
-            button_was_clicked_and_actioned = board.handle_button_events(event)
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1: # Left mouse button
-                    if not button_was_clicked_and_actioned: # If no main UI button handled the click
-                        if not board.is_animating: 
-                            # board.handle_click_on_board_or_dialog will check confirmation dialog first, then board
-                            board.handle_click_on_board_or_dialog(mouse_pos) 
-            
-            if event.type == AI_MOVE_EVENT: 
-                if not board.is_animating: 
-                    board._trigger_ai_move()
+            elif event.type == pygame.VIDEORESIZE:
+                size = clamp_window_size(event.w, event.h)
+                # pygame 2.6 cannot set a minimum window size, so undersized windows are grown back
+                screen = pygame.display.set_mode(size, pygame.RESIZABLE) if size != event.size else pygame.display.get_surface()
+            board.handle_event(event)
         
         board.update() 
-        board.draw(screen) 
-        pygame.display.flip()
+        dirty_rects = board.draw(screen) 
+        if dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(dirty_rects)
         clock.tick(60) 
 
     board.close_engine() 
+    board.close_network()
+    board.close_explorer()
+    board.close_puzzles()
+    board.record_current_game()
+    if recorder:
+        recorder.close(board)
+    audio_latency = src.audio.latency_summary()
+    if audio_latency:
+        print(f"Click-to-sound latency over {audio_latency['sounds']} sounds: p50 {audio_latency['p50']:.2f}ms, "
+              f"p95 {audio_latency['p95']:.2f}ms, max {audio_latency['max']:.2f}ms "
+              f"(+{audio_latency['buffer']:.1f}ms mixer buffer)")
+    if game_database:
+        game_database.close()
     print("Exiting game loop. Quitting Pygame.")
     pygame.quit()
     sys.exit()
 
 if __name__ == '__main__':
-    run_game()
+    run_game(parse_args())
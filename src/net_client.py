@@ -0,0 +1,86 @@
+# src/net_client.py
+
+import asyncio
+import json
+import queue
+import threading
+from src.constants import NET_MAX_LINE_BYTES
+from src.net_server import encode_message
+
+
+class NetClient:
+    """
+    Connects the pygame UI to a GameServer.
+    The asyncio connection runs on a background thread; the game loop calls poll()
+    to receive messages and send() to queue outgoing ones, so it never blocks on the network.
+    """
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.incoming = queue.Queue()
+        self.connected = False
+        self.error = None
+        self._loop = asyncio.new_event_loop()
+        self._writer = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="NetClient", daemon=True)
+
+    def start(self, timeout=5.0):
+        self._thread.start()
+        self._ready.wait(timeout)
+        return self.connected
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._session())
+        finally:
+            self._loop.close()
+
+    async def _session(self):
+        try:
+            reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=NET_MAX_LINE_BYTES)
+        except OSError as e:
+            self.error = str(e)
+            self._ready.set()
+            return
+        self.connected = True
+        self._ready.set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    self.incoming.put(json.loads(line))
+                except ValueError:
+                    print(f"NetClient: ignoring malformed message: {line[:80]!r}")
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            self.error = str(e)
+        finally:
+            self.connected = False
+            self.incoming.put({"op": "disconnected", "reason": self.error or "connection closed"})
+
+    def send(self, message):
+        if self._writer is None or not self.connected:
+            return False
+        data = encode_message(message)
+        self._loop.call_soon_threadsafe(self._writer.write, data)
+        return True
+
+    def poll(self):
+        """Returns all messages received since the last call."""
+        messages = []
+        while True:
+            try:
+                messages.append(self.incoming.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self):
+        if self._writer is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._writer.close)
+            except RuntimeError:
+                pass
+        self._thread.join(timeout=2.0)
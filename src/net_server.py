@@ -0,0 +1,409 @@
+# src/net_server.py
+#
+# Asyncio game server for online Player vs Player.
+# Protocol: one JSON object per line in each direction.
+#   client -> server: {"op": "create"} | {"op": "join", "game": id} | {"op": "watch", "game": id}
+#                     {"op": "move", "game": id, "uci": "e2e4", "ply": n} | {"op": "resign", "game": id}
+#                     {"op": "leave", "game": id}
+#   server -> client: "created", "joined", "watching", "moved", "player_joined", "player_left",
+#                     "game_over" and "error" messages (see GameServer below).
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+import chess
+from src.game_logic import TerminationTracker
+from src.constants import NET_DEFAULT_HOST, NET_DEFAULT_PORT, NET_MAX_LINE_BYTES, NET_MAX_GAMES
+
+COLOR_NAMES = {chess.WHITE: "white", chess.BLACK: "black"}
+
+
+def encode_message(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def outcome_to_dict(outcome):
+    if outcome is None:
+        return None
+    winner = None if outcome.winner is None else COLOR_NAMES[outcome.winner]
+    return {"termination": outcome.termination.name, "winner": winner, "result": outcome.result()}
+
+
+class GameSession:
+    """Headless state of one hosted game. Kept small so thousands of idle games fit in one process."""
+    __slots__ = ("game_id", "chess_board", "termination", "players", "spectators", "finished")
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.chess_board = chess.Board()
+        self.termination = TerminationTracker(self.chess_board)
+        self.players = {chess.WHITE: None, chess.BLACK: None}
+        self.spectators = set()
+        self.finished = None  # outcome dict once the game has ended
+
+    @property
+    def ply(self):
+        return len(self.chess_board.move_stack)
+
+    def color_of(self, connection):
+        for color, player in self.players.items():
+            if player is connection:
+                return color
+        return None
+
+    def recipients(self):
+        for player in self.players.values():
+            if player is not None:
+                yield player
+        yield from self.spectators
+
+    def is_empty(self):
+        return not self.spectators and all(player is None for player in self.players.values())
+
+    def state_message(self, op, **extra):
+        message = {"op": op, "game": self.game_id, "fen": self.chess_board.root().fen(),
+                   "moves": [move.uci() for move in self.chess_board.move_stack], "ply": self.ply,
+                   "outcome": self.finished}
+        message.update(extra)
+        return message
+
+
+class ClientConnection:
+    __slots__ = ("writer", "games", "peer")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.games = set()
+        self.peer = writer.get_extra_info("peername")
+
+    def send_bytes(self, data):
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    def send(self, message):
+        self.send_bytes(encode_message(message))
+
+
+class GameServer:
+    def __init__(self, host=NET_DEFAULT_HOST, port=NET_DEFAULT_PORT, max_games=NET_MAX_GAMES):
+        self.host = host
+        self.port = port
+        self.max_games = max_games
+        self.games = {}
+        self._ids = itertools.count(1)
+        self._server = None
+        self.moves_applied = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=NET_MAX_LINE_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"Game server listening on {self.host}:{self.port}")
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        connection = ClientConnection(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    connection.send({"op": "error", "reason": "line too long"})
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("message must be an object")
+                except ValueError as e:
+                    connection.send({"op": "error", "reason": f"bad message: {e}"})
+                    continue
+                self.handle_message(connection, message)
+                if writer.transport.get_write_buffer_size() > NET_MAX_LINE_BYTES * 16:
+                    await writer.drain() # Backpressure for clients that stop reading
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for game_id in list(connection.games):
+                self._leave(connection, game_id)
+            writer.close()
+
+    # --- Message handling (synchronous; every game mutation happens here) ---
+    def handle_message(self, connection, message):
+        op = message.get("op")
+        handler = {"create": self._op_create, "join": self._op_join, "watch": self._op_watch,
+                   "move": self._op_move, "resign": self._op_resign, "leave": self._op_leave}.get(op)
+        if handler is None:
+            connection.send({"op": "error", "reason": f"unknown op: {op}"})
+            return
+        handler(connection, message)
+
+    def _get_game(self, connection, message):
+        session = self.games.get(message.get("game"))
+        if session is None:
+            connection.send({"op": "error", "reason": "no such game", "game": message.get("game")})
+        return session
+
+    def _op_create(self, connection, message):
+        if len(self.games) >= self.max_games:
+            connection.send({"op": "error", "reason": "server full"})
+            return
+        game_id = str(next(self._ids))
+        session = GameSession(game_id)
+        color = chess.BLACK if message.get("color") == "black" else chess.WHITE
+        session.players[color] = connection
+        self.games[game_id] = session
+        connection.games.add(game_id)
+        connection.send(session.state_message("created", color=COLOR_NAMES[color]))
+
+    def _op_join(self, connection, message):
+        session = self._get_game(connection, message)
+        if session is None:
+            return
+        color = session.color_of(connection)
+        if color is None:
+            free = [c for c in (chess.WHITE, chess.BLACK) if session.players[c] is None]
+            if not free:
+                connection.send({"op": "error", "reason": "game is full", "game": session.game_id})
+                return
+            color = free[0]
+            session.players[color] = connection
+            connection.games.add(session.game_id)
+            self._broadcast(session, {"op": "player_joined", "game": session.game_id,
+                                      "color": COLOR_NAMES[color]}, exclude=connection)
+        connection.send(session.state_message("joined", color=COLOR_NAMES[color]))
+
+    def _op_watch(self, connection, message):
+        session = self._get_game(connection, message)
+        if session is None:
+            return
+        session.spectators.add(connection)
+        connection.games.add(session.game_id)
+        connection.send(session.state_message("watching"))
+
+    def _op_move(self, connection, message):
+        session = self._get_game(connection, message)
+        if session is None:
+            return
+        color = session.color_of(connection)
+        reason = None
+        move = None
+        if session.finished:
+            reason = "game is over"
+        elif color is None:
+            reason = "not a player in this game"
+        elif color != session.chess_board.turn:
+            reason = "not your turn"
+        elif message.get("ply", session.ply) != session.ply:
+            reason = "stale ply"
+        else:
+            try:
+                move = chess.Move.from_uci(str(message.get("uci")))
+            except ValueError:
+                reason = "bad move syntax"
+            else:
+                if not session.termination.is_legal(move):
+                    reason = "illegal move"
+        if reason:
+            connection.send({"op": "error", "reason": reason, "game": session.game_id,
+                             "ply": session.ply, "uci": message.get("uci")})
+            return
+
+        san = session.chess_board.san(move)
+        session.termination.push(move)
+        self.moves_applied += 1
+        outcome = outcome_to_dict(session.termination.outcome())
+        session.finished = outcome
+        self._broadcast(session, {"op": "moved", "game": session.game_id, "uci": move.uci(), "san": san,
+                                  "ply": session.ply, "check": session.termination.is_check(),
+                                  "outcome": outcome})
+
+    def _op_resign(self, connection, message):
+        session = self._get_game(connection, message)
+        if session is None:
+            return
+        color = session.color_of(connection)
+        if color is None or session.finished:
+            connection.send({"op": "error", "reason": "cannot resign", "game": session.game_id})
+            return
+        session.finished = {"termination": "RESIGNATION", "winner": COLOR_NAMES[not color],
+                            "result": "0-1" if color == chess.WHITE else "1-0"}
+        self._broadcast(session, {"op": "game_over", "game": session.game_id, "outcome": session.finished})
+
+    def _op_leave(self, connection, message):
+        self._leave(connection, message.get("game"))
+
+    def _leave(self, connection, game_id):
+        session = self.games.get(game_id)
+        connection.games.discard(game_id)
+        if session is None:
+            return
+        session.spectators.discard(connection)
+        color = session.color_of(connection)
+        if color is not None:
+            session.players[color] = None
+            self._broadcast(session, {"op": "player_left", "game": game_id, "color": COLOR_NAMES[color]})
+        if session.is_empty():
+            del self.games[game_id]
+
+    def _broadcast(self, session, message, exclude=None):
+        data = encode_message(message) # Encoded once for every recipient
+        for recipient in session.recipients():
+            if recipient is not exclude:
+                recipient.send_bytes(data)
+
+
+# --- Loopback test harness ---
+
+class _LoopbackClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port, limit=NET_MAX_LINE_BYTES)
+        return cls(reader, writer)
+
+    def send(self, message):
+        self.writer.write(encode_message(message))
+
+    async def receive(self, op=None):
+        while True:
+            message = json.loads(await self.reader.readline())
+            if op is None or message.get("op") == op:
+                return message
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def _play_loopback_game(host, port, plies, rng, spectate):
+    white = await _LoopbackClient.connect(host, port)
+    black = await _LoopbackClient.connect(host, port)
+    white.send({"op": "create"})
+    game_id = (await white.receive("created"))["game"]
+    black.send({"op": "join", "game": game_id})
+    await black.receive("joined")
+    spectator = None
+    if spectate:
+        spectator = await _LoopbackClient.connect(host, port)
+        spectator.send({"op": "watch", "game": game_id})
+        await spectator.receive("watching")
+
+    board = chess.Board()
+    clients = {chess.WHITE: white, chess.BLACK: black}
+    latencies = []
+    for ply in range(plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        move = rng.choice(moves)
+        sent_at = time.perf_counter()
+        clients[board.turn].send({"op": "move", "game": game_id, "uci": move.uci(), "ply": ply})
+        echo = await white.receive("moved")
+        await black.receive("moved")
+        latencies.append(time.perf_counter() - sent_at)
+        if echo["uci"] != move.uci():
+            raise AssertionError(f"Server echoed {echo['uci']} for {move.uci()}")
+        board.push(move)
+        if echo["outcome"]:
+            break
+    if spectator is not None:
+        for _ in range(len(board.move_stack)):
+            await spectator.receive("moved")
+    return white, black, spectator, latencies
+
+
+async def run_loopback_harness(num_games=200, plies=20, idle_games=1000, seed=1):
+    """
+    Starts a server on 127.0.0.1, plays `num_games` random games concurrently through real sockets,
+    then parks `idle_games` extra created-but-idle games, and reports latency and memory figures.
+    """
+    import tracemalloc
+    server = await GameServer("127.0.0.1", 0, max_games=num_games + idle_games + 1).start()
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        _play_loopback_game("127.0.0.1", server.port, plies, random.Random(rng.random()), spectate=(i % 4 == 0))
+        for i in range(num_games)])
+    active_elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    before_idle, _ = tracemalloc.get_traced_memory()
+    idle_clients = []
+    for _ in range(idle_games):
+        client = await _LoopbackClient.connect("127.0.0.1", server.port)
+        client.send({"op": "create"})
+        await client.receive("created")
+        idle_clients.append(client)
+    after_idle, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = sorted(latency for result in results for latency in result[3])
+    report = {
+        "games": num_games,
+        "moves": server.moves_applied,
+        "elapsed_s": round(active_elapsed, 3),
+        "moves_per_s": round(server.moves_applied / active_elapsed, 1) if active_elapsed else None,
+        "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3) if latencies else None,
+        "latency_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3) if latencies else None,
+        "idle_games": idle_games,
+        "bytes_per_idle_game": round((after_idle - before_idle) / idle_games) if idle_games else None,
+        "hosted_games": len(server.games),
+    }
+
+    for white, black, spectator, _ in results:
+        await white.close()
+        await black.close()
+        if spectator is not None:
+            await spectator.close()
+    for client in idle_clients:
+        await client.close()
+    await server.stop()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="The Unbeatable Chess game server")
+    parser.add_argument("--host", default=NET_DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=NET_DEFAULT_PORT)
+    parser.add_argument("--loopback", type=int, metavar="GAMES",
+                        help="run the local loopback harness with this many active games and exit")
+    parser.add_argument("--idle", type=int, default=1000, help="idle games parked by the loopback harness")
+    args = parser.parse_args(argv)
+
+    if args.loopback:
+        report = asyncio.run(run_loopback_harness(args.loopback, idle_games=args.idle))
+        print(json.dumps(report, indent=2))
+        return 0
+    try:
+        asyncio.run(GameServer(args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        print("Game server stopped.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+# src/opening_explorer.py
+
+import argparse
+import concurrent.futures
+import heapq
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import chess
+from src.constants import (EXPLORER_INDEX_PATH, EXPLORER_MAX_PLY, EXPLORER_RUN_MAX_ENTRIES,
+                           EXPLORER_CHUNK_BYTES)
+from src.game_logic import position_hash
+from src.game_record import encode_move, decode_move, split_pgn, iter_pgn_chunk
+
+# Index file: header, then fixed-size entries sorted by (position hash, move).
+INDEX_MAGIC = b"UCOX"
+INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct("<4sHHQ")  # magic, version, max ply, entry count
+# hash, move, games, white wins, draws, black wins, rated games, rating sum
+_ENTRY = struct.Struct("<QHIIIIIQ")
+_HASH = struct.Struct("<Q")
+
+_RESULT_COLUMNS = {"1-0": 0, "1/2-1/2": 1, "0-1": 2}
+
+
+class ExplorerIndexError(Exception):
+    pass
+
+
+class MoveStats:
+    __slots__ = ("move", "games", "white_wins", "draws", "black_wins", "rated_games", "rating_sum")
+
+    def __init__(self, move, games, white_wins, draws, black_wins, rated_games, rating_sum):
+        self.move = move
+        self.games = games
+        self.white_wins = white_wins
+        self.draws = draws
+        self.black_wins = black_wins
+        self.rated_games = rated_games
+        self.rating_sum = rating_sum
+
+    @property
+    def average_rating(self):
+        return self.rating_sum // self.rated_games if self.rated_games else None
+
+    @property
+    def white_score(self):
+        """White's score in this line, from 0.0 to 1.0."""
+        return (self.white_wins + 0.5 * self.draws) / self.games if self.games else 0.0
+
+
+# --- Building ---
+
+def _game_rating(headers):
+    ratings = []
+    for key in ("WhiteElo", "BlackElo"):
+        try:
+            ratings.append(int(headers.get(key, "")))
+        except ValueError:
+            pass
+    return sum(ratings) // len(ratings) if ratings else None
+
+
+def _write_run(stats, run_dir):
+    handle, path = tempfile.mkstemp(prefix="explorer-run-", suffix=".bin", dir=run_dir)
+    with os.fdopen(handle, "wb") as f:
+        for (key, move_code) in sorted(stats):
+            values = stats[(key, move_code)]
+            f.write(_ENTRY.pack(key, move_code, *values))
+    return path
+
+
+def _index_chunk(pgn_path, start, end, max_ply, run_dir, run_max_entries):
+    """Worker: parses games starting in [start, end) of a PGN file and writes sorted run files."""
+    stats = {}
+    runs = []
+    games = 0
+    for game in iter_pgn_chunk(pgn_path, start, end):
+        column = _RESULT_COLUMNS.get(game.headers.get("Result"))
+        if column is None:
+            continue
+        games += 1
+        rating = _game_rating(game.headers)
+        board = game.board()
+        for ply, move in enumerate(game.mainline_moves()):
+            if ply >= max_ply:
+                break
+            key = (position_hash(board), encode_move(move))
+            values = stats.get(key)
+            if values is None:
+                values = stats[key] = [0, 0, 0, 0, 0, 0]
+            values[0] += 1
+            values[1 + column] += 1
+            if rating is not None:
+                values[4] += 1
+                values[5] += rating
+            board.push(move)
+        if len(stats) >= run_max_entries:
+            runs.append(_write_run(stats, run_dir))
+            stats = {}
+    if stats:
+        runs.append(_write_run(stats, run_dir))
+    return runs, games
+
+
+def _iter_run(path):
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(_ENTRY.size * 4096)
+            if not data:
+                return
+            for entry in _ENTRY.iter_unpack(data):
+                yield entry
+
+
+def merge_runs(run_paths, index_path, max_ply, min_games=1):
+    """K-way merges sorted run files, summing entries with the same (hash, move)."""
+    temp_path = index_path + ".tmp"
+    count = 0
+    with open(temp_path, "wb") as out:
+        out.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, max_ply, 0))
+        current_key = None
+        totals = None
+        for entry in heapq.merge(*[_iter_run(path) for path in run_paths], key=lambda e: (e[0], e[1])):
+            key = (entry[0], entry[1])
+            if key != current_key:
+                if current_key is not None and totals[0] >= min_games:
+                    out.write(_ENTRY.pack(*current_key, *totals))
+                    count += 1
+                current_key = key
+                totals = list(entry[2:])
+            else:
+                for i, value in enumerate(entry[2:]):
+                    totals[i] += value
+        if current_key is not None and totals[0] >= min_games:
+            out.write(_ENTRY.pack(*current_key, *totals))
+            count += 1
+        out.seek(0)
+        out.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, max_ply, count))
+    os.replace(temp_path, index_path)
+    return count
+
+
+def build_index(pgn_paths, index_path=EXPLORER_INDEX_PATH, workers=None, max_ply=EXPLORER_MAX_PLY,
+                min_games=1, chunk_bytes=EXPLORER_CHUNK_BYTES, run_max_entries=EXPLORER_RUN_MAX_ENTRIES):
+    """Indexes PGN files across a process pool and merges the sorted runs into one index file."""
+    started = time.perf_counter()
+    directory = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(directory, exist_ok=True)
+    chunks = [chunk for path in pgn_paths for chunk in split_pgn(path, chunk_bytes)]
+    run_paths = []
+    total_games = 0
+    with tempfile.TemporaryDirectory(prefix="explorer-runs-", dir=directory) as run_dir:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_index_chunk, path, start, end, max_ply, run_dir, run_max_entries)
+                       for path, start, end in chunks]
+            for future in concurrent.futures.as_completed(futures):
+                runs, games = future.result()
+                run_paths.extend(runs)
+                total_games += games
+        entries = merge_runs(run_paths, index_path, max_ply, min_games)
+    elapsed = time.perf_counter() - started
+    print(f"Opening explorer index built: {total_games} games, {entries} entries, "
+          f"{len(run_paths)} runs from {len(chunks)} chunks in {elapsed:.1f}s -> {index_path}")
+    return {"games": total_games, "entries": entries, "runs": len(run_paths), "seconds": elapsed}
+
+
+# --- Lookup ---
+
+class OpeningExplorer:
+    """Memory-mapped, binary-searched view of an explorer index."""
+    def __init__(self, index_path=EXPLORER_INDEX_PATH):
+        self.index_path = index_path
+        self._file = open(index_path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ExplorerIndexError(f"Explorer index is empty: {index_path}")
+        magic, version, self.max_ply, self.entry_count = _INDEX_HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ExplorerIndexError(f"Not an explorer index (or unsupported version): {index_path}")
+
+    @classmethod
+    def open_if_exists(cls, index_path=EXPLORER_INDEX_PATH):
+        if not index_path or not os.path.exists(index_path):
+            return None
+        try:
+            return cls(index_path)
+        except (OSError, ExplorerIndexError, struct.error) as e:
+            print(f"Could not open opening explorer index {index_path}: {e}")
+            return None
+
+    def _hash_at(self, index):
+        return _HASH.unpack_from(self._mmap, _INDEX_HEADER.size + index * _ENTRY.size)[0]
+
+    def lookup_hash(self, key):
+        low, high = 0, self.entry_count
+        while low < high: # Lower bound of `key`
+            middle = (low + high) // 2
+            if self._hash_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        results = []
+        index = low
+        while index < self.entry_count:
+            entry = _ENTRY.unpack_from(self._mmap, _INDEX_HEADER.size + index * _ENTRY.size)
+            if entry[0] != key:
+                break
+            results.append(MoveStats(decode_move(entry[1]), *entry[2:]))
+            index += 1
+        results.sort(key=lambda stats: stats.games, reverse=True)
+        return results
+
+    def lookup(self, board):
+        """Move statistics for the board's position, most played first."""
+        return self.lookup_hash(position_hash(board))
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the opening explorer index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="index PGN files")
+    build.add_argument("pgn", nargs="+")
+    build.add_argument("--index", default=EXPLORER_INDEX_PATH)
+    build.add_argument("--workers", type=int, default=None)
+    build.add_argument("--max-ply", type=int, default=EXPLORER_MAX_PLY)
+    build.add_argument("--min-games", type=int, default=1)
+    query = subparsers.add_parser("query", help="show statistics for a FEN")
+    query.add_argument("fen", nargs="?", default=chess.STARTING_FEN)
+    query.add_argument("--index", default=EXPLORER_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_index(args.pgn, args.index, args.workers, args.max_ply, args.min_games)
+        return 0
+
+    explorer = OpeningExplorer(args.index)
+    board = chess.Board(args.fen)
+    started = time.perf_counter()
+    results = explorer.lookup(board)
+    elapsed_us = (time.perf_counter() - started) * 1e6
+    for stats in results:
+        rating = stats.average_rating if stats.average_rating is not None else "-"
+        print(f"{board.san(stats.move):8} {stats.games:9} games  +{stats.white_wins} ={stats.draws} "
+              f"-{stats.black_wins}  avg rating {rating}")
+    print(f"{len(results)} moves, lookup took {elapsed_us:.0f} us")
+    explorer.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
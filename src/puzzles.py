@@ -0,0 +1,332 @@
+# src/puzzles.py
+
+import argparse
+import concurrent.futures
+import csv
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+import chess
+from src.constants import (PUZZLE_DATABASE_PATH, PUZZLE_RATING_BUCKET, PUZZLE_RATING_WINDOW,
+                           PUZZLE_DEFAULT_RATING, PUZZLE_IMPORT_BATCH_SIZE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    id INTEGER PRIMARY KEY,
+    source_id TEXT UNIQUE,
+    fen TEXT NOT NULL,
+    setup_move TEXT,         -- Opponent move played before the puzzle starts (Lichess format)
+    solution TEXT NOT NULL,  -- UCI moves, the solver's first
+    rating INTEGER NOT NULL,
+    themes TEXT NOT NULL,
+    bucket INTEGER NOT NULL, -- rating // PUZZLE_RATING_BUCKET
+    shuffle INTEGER NOT NULL -- Random key for sampling within a bucket
+);
+CREATE INDEX IF NOT EXISTS puzzles_by_bucket ON puzzles(bucket, shuffle);
+
+CREATE TABLE IF NOT EXISTS puzzle_themes (
+    theme TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    shuffle INTEGER NOT NULL,
+    puzzle_id INTEGER NOT NULL,
+    PRIMARY KEY (theme, bucket, shuffle, puzzle_id)
+) WITHOUT ROWID;
+"""
+
+_SHUFFLE_MAX = (1 << 31) - 1
+_MAX_BUCKET_PROBES = 200
+
+
+class PuzzleError(Exception):
+    pass
+
+
+class Puzzle:
+    """A puzzle ready to play: the board after the setup move, and the solution line."""
+    def __init__(self, puzzle_id, source_id, fen, setup_move, solution, rating, themes):
+        self.puzzle_id = puzzle_id
+        self.source_id = source_id
+        self.rating = rating
+        self.themes = themes.split() if themes else []
+        board = chess.Board(fen)
+        try:
+            if setup_move:
+                board.push_uci(setup_move)
+            self.start_fen = board.fen()
+            self.solver_color = board.turn
+            self.solution = []
+            self.solution_san = []
+            for uci in solution.split():
+                move = chess.Move.from_uci(uci)
+                if not board.is_legal(move):
+                    raise ValueError(f"illegal move {uci}")
+                self.solution_san.append(board.san(move))
+                board.push(move)
+                self.solution.append(move)
+        except ValueError as e:
+            raise PuzzleError(f"Puzzle {source_id or puzzle_id} is invalid: {e}")
+        if not self.solution:
+            raise PuzzleError(f"Puzzle {source_id or puzzle_id} has no solution.")
+
+    def is_correct(self, ply, move, board_after):
+        """Checks the solver's move at `ply`; like most puzzle sites, any mating move is accepted."""
+        return (ply < len(self.solution) and move == self.solution[ply]) or board_after.is_checkmate()
+
+
+class PuzzleStore:
+    """
+    SQLite puzzle collection indexed by rating bucket and theme.
+    sample() does a couple of index seeks on a random key, so it costs O(log n)
+    however many puzzles are stored.
+    """
+    def __init__(self, path=PUZZLE_DATABASE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._buckets = None
+
+    @classmethod
+    def open_if_exists(cls, path=PUZZLE_DATABASE_PATH):
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            store = cls(path)
+            if not store.bucket_range():
+                store.close()
+                return None
+            return store
+        except sqlite3.Error as e:
+            print(f"Could not open puzzle database {path}: {e}")
+            return None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def count(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM puzzles").fetchone()[0]
+
+    def bucket_range(self):
+        """(lowest, highest) non-empty rating bucket, or None for an empty store."""
+        if self._buckets is None:
+            with self._lock:
+                low = self._connection.execute("SELECT MIN(bucket) FROM puzzles").fetchone()[0]
+                high = self._connection.execute("SELECT MAX(bucket) FROM puzzles").fetchone()[0]
+            self._buckets = None if low is None else (low, high)
+        return self._buckets
+
+    # --- Importing ---
+    def import_rows(self, rows):
+        """Inserts (source_id, fen, setup_move, solution, rating, themes) rows in batched transactions."""
+        imported = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= PUZZLE_IMPORT_BATCH_SIZE:
+                imported += self._insert_batch(batch)
+                batch = []
+        if batch:
+            imported += self._insert_batch(batch)
+        self._buckets = None
+        return imported
+
+    def _insert_batch(self, batch):
+        inserted = 0
+        with self._lock, self._connection:
+            for source_id, fen, setup_move, solution, rating, themes in batch:
+                bucket = rating // PUZZLE_RATING_BUCKET
+                shuffle = random.randint(0, _SHUFFLE_MAX)
+                cursor = self._connection.execute(
+                    "INSERT OR IGNORE INTO puzzles (source_id, fen, setup_move, solution, rating, themes, bucket, shuffle) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (source_id, fen, setup_move, solution, rating, themes, bucket, shuffle))
+                if not cursor.rowcount:
+                    continue
+                inserted += 1
+                self._connection.executemany(
+                    "INSERT INTO puzzle_themes (theme, bucket, shuffle, puzzle_id) VALUES (?, ?, ?, ?)",
+                    [(theme, bucket, shuffle, cursor.lastrowid) for theme in themes.split()])
+        return inserted
+
+    def import_file(self, path):
+        started = time.perf_counter()
+        rows = iter_epd_rows(path) if path.lower().endswith(".epd") else iter_csv_rows(path)
+        imported = self.import_rows(rows)
+        print(f"Imported {imported} puzzles from {path} in {time.perf_counter() - started:.1f}s.")
+        return imported
+
+    # --- Sampling ---
+    def _first_in_bucket(self, bucket, shuffle, theme):
+        if theme is None:
+            sql = "SELECT id FROM puzzles WHERE bucket = ? AND shuffle >= ? ORDER BY shuffle LIMIT 1"
+            parameters = (bucket, shuffle)
+        else:
+            sql = ("SELECT puzzle_id FROM puzzle_themes WHERE theme = ? AND bucket = ? AND shuffle >= ? "
+                   "ORDER BY shuffle LIMIT 1")
+            parameters = (theme, bucket, shuffle)
+        row = self._connection.execute(sql, parameters).fetchone()
+        return row[0] if row else None
+
+    def sample(self, rating=PUZZLE_DEFAULT_RATING, window=PUZZLE_RATING_WINDOW, theme=None, rng=random):
+        """
+        A random puzzle rated about `rating` (+- window), optionally with a theme.
+        Picks a random bucket in the window and a random key inside it; if that bucket is
+        empty, the nearest non-empty buckets are tried instead. Returns None if nothing matches.
+        """
+        buckets = self.bucket_range()
+        if buckets is None:
+            return None
+        target = rng.randint(max(0, rating - window), rating + window) // PUZZLE_RATING_BUCKET
+        target = min(max(target, buckets[0]), buckets[1])
+        shuffle = rng.randint(0, _SHUFFLE_MAX)
+        with self._lock:
+            for distance in range(_MAX_BUCKET_PROBES):
+                for bucket in ((target,) if distance == 0 else (target - distance, target + distance)):
+                    if not buckets[0] <= bucket <= buckets[1]:
+                        continue
+                    puzzle_id = self._first_in_bucket(bucket, shuffle, theme)
+                    if puzzle_id is None:
+                        puzzle_id = self._first_in_bucket(bucket, 0, theme) # Wrap around
+                    if puzzle_id is not None:
+                        return self._load(puzzle_id)
+        return None
+
+    def get(self, puzzle_id):
+        with self._lock:
+            return self._load(puzzle_id)
+
+    def _load(self, puzzle_id):
+        row = self._connection.execute(
+            "SELECT id, source_id, fen, setup_move, solution, rating, themes FROM puzzles WHERE id = ?",
+            (puzzle_id,)).fetchone()
+        return Puzzle(*row) if row else None
+
+
+def iter_csv_rows(path):
+    """Rows from a Lichess puzzle CSV (PuzzleId,FEN,Moves,Rating,...,Themes,...)."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        for fields in reader:
+            if not fields or fields[0] == "PuzzleId":
+                continue
+            try:
+                moves = fields[2].split()
+                rating = int(fields[3])
+            except (IndexError, ValueError):
+                continue
+            themes = fields[7] if len(fields) > 7 else ""
+            if len(moves) >= 2:
+                yield fields[0], fields[1], moves[0], " ".join(moves[1:]), rating, themes
+
+
+def iter_epd_rows(path):
+    """Rows from an EPD file with a "bm" (best move) operation; the solution is that single move."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                board, operations = chess.Board.from_epd(line)
+            except ValueError:
+                continue
+            best_moves = operations.get("bm")
+            if not best_moves:
+                continue
+            source_id = operations.get("id") or f"{os.path.basename(path)}:{line_number}"
+            try:
+                rating = int(operations.get("rating", PUZZLE_DEFAULT_RATING))
+            except (TypeError, ValueError):
+                rating = PUZZLE_DEFAULT_RATING
+            yield str(source_id), board.fen(), None, best_moves[0].uci(), rating, "epd"
+
+
+class PuzzleTrainer:
+    """Serves puzzles while the next one is already being fetched and validated in the background."""
+    def __init__(self, store, rating=PUZZLE_DEFAULT_RATING, theme=None):
+        self.store = store
+        self.rating = rating
+        self.theme = theme
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="PuzzlePrefetch")
+        self._prefetched = None
+        self._prefetch_key = None
+
+    def _fetch(self, rating, theme):
+        for _ in range(10): # Skip the odd invalid puzzle
+            try:
+                return self.store.sample(rating, theme=theme)
+            except PuzzleError as e:
+                print(e)
+        return None
+
+    def prefetch(self):
+        key = (self.rating, self.theme)
+        if self._prefetched is None or self._prefetch_key != key:
+            if self._prefetched is not None:
+                self._prefetched.cancel()
+            self._prefetched = self._executor.submit(self._fetch, *key)
+            self._prefetch_key = key
+
+    def set_rating(self, rating):
+        self.rating = rating
+        self.prefetch()
+
+    def next_puzzle(self):
+        """Returns the prefetched puzzle (waiting only if it is not ready yet) and starts fetching another."""
+        self.prefetch()
+        future = self._prefetched
+        self._prefetched = None
+        try:
+            puzzle = future.result()
+        except (sqlite3.Error, concurrent.futures.CancelledError) as e:
+            print(f"Could not load a puzzle: {e}")
+            puzzle = None
+        self.prefetch()
+        return puzzle
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the puzzle database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    importer = subparsers.add_parser("import", help="import Lichess CSV or EPD puzzle files")
+    importer.add_argument("files", nargs="+")
+    importer.add_argument("--db", default=PUZZLE_DATABASE_PATH)
+    sampler = subparsers.add_parser("sample", help="print random puzzles near a rating")
+    sampler.add_argument("--rating", type=int, default=PUZZLE_DEFAULT_RATING)
+    sampler.add_argument("--theme")
+    sampler.add_argument("--count", type=int, default=5)
+    sampler.add_argument("--db", default=PUZZLE_DATABASE_PATH)
+    args = parser.parse_args(argv)
+
+    store = PuzzleStore(args.db)
+    if args.command == "import":
+        for path in args.files:
+            store.import_file(path)
+        print(f"{store.count()} puzzles in {args.db}")
+    else:
+        for _ in range(args.count):
+            started = time.perf_counter()
+            puzzle = store.sample(args.rating, theme=args.theme)
+            elapsed_us = (time.perf_counter() - started) * 1e6
+            if puzzle is None:
+                print("No matching puzzle.")
+                break
+            print(f"{puzzle.source_id} ({puzzle.rating}) {puzzle.start_fen}  {' '.join(puzzle.solution_san)}"
+                  f"  [{elapsed_us:.0f} us]")
+    store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
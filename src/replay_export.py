@@ -0,0 +1,244 @@
+# src/replay_export.py
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import time
+import pygame
+import chess
+import chess.pgn
+from src.constants import (COLS, SQUARE_SIZE, ANIMATION_SPEED, CHECK_HIGHLIGHT_COLOR, LAST_MOVE_HIGHLIGHT_COLOR,
+                           REPLAY_EXPORT_PATH, REPLAY_DEFAULT_SIZE, REPLAY_FPS, REPLAY_HOLD_SECONDS,
+                           REPLAY_FINAL_HOLD_SECONDS, REPLAY_PLIES_PER_TASK, REPLAY_FRAME_FORMAT)
+from src.assets_manager import get_piece_images
+from src.board_render import (piece_notation, visual_board_from, square_coords, square_center, board_layer,
+                              draw_square_overlay, draw_pieces, advance_animation)
+
+_to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+# Frame image formats; PNG is compact, TGA and BMP are uncompressed and much quicker to write.
+FRAME_FORMATS = ("png", "tga", "bmp")
+
+
+class ReplayExportError(Exception):
+    pass
+
+
+def load_game_moves(pgn_path=None, game_index=0, moves=None, fen=None):
+    """
+    Returns (start FEN, moves) for the game_index-th game of a PGN file, or for a list
+    of SAN or UCI moves played from `fen` (the standard start by default).
+    """
+    if pgn_path:
+        with open(pgn_path, "r", encoding="utf-8", errors="replace") as f:
+            for _ in range(game_index):
+                if not chess.pgn.skip_game(f):
+                    raise ReplayExportError(f"{pgn_path} has fewer than {game_index + 1} games.")
+            game = chess.pgn.read_game(f)
+        if game is None:
+            raise ReplayExportError(f"No game found in {pgn_path}.")
+        return game.board().fen(), list(game.mainline_moves())
+
+    board = chess.Board(fen or chess.STARTING_FEN)
+    start_fen = board.fen()
+    parsed = []
+    for token in moves or []:
+        try:
+            move = board.parse_uci(token) if len(token) in (4, 5) and token[1].isdigit() else board.parse_san(token)
+        except ValueError as e:
+            raise ReplayExportError(f"Illegal or unreadable move {token!r} after {len(parsed)} plies: {e}")
+        board.push(move)
+        parsed.append(move)
+    return start_fen, parsed
+
+
+def slide_positions(move, square_size, flipped=False):
+    """
+    Piece centres for every animation frame of a move, stepped exactly like
+    Board._update_animation (with the speed scaled to the square size).
+    """
+    end = square_center(square_coords(move.to_square), square_size, flipped=flipped)
+    current = list(square_center(square_coords(move.from_square), square_size, flipped=flipped))
+    speed = ANIMATION_SPEED * square_size / SQUARE_SIZE
+    positions = []
+    while True:
+        current, finished = advance_animation(current, end, speed)
+        if finished:
+            return positions
+        positions.append(current)
+
+
+def build_segments(start_fen, moves, fps=REPLAY_FPS, hold_seconds=REPLAY_HOLD_SECONDS,
+                   final_hold_seconds=REPLAY_FINAL_HOLD_SECONDS):
+    """One segment per ply (plus the opening position): (FEN before, move, previous move, hold frames)."""
+    hold = max(1, round(hold_seconds * fps))
+    board = chess.Board(start_fen)
+    segments = [(board.fen(), None, None, hold)]
+    previous = None
+    for ply, move in enumerate(moves, start=1):
+        final = ply == len(moves)
+        segments.append((board.fen(), move.uci(), previous, max(1, round(final_hold_seconds * fps)) if final else hold))
+        board.push(move)
+        previous = move.uci()
+    return segments
+
+
+def segment_frame_count(segment, square_size, flipped=False):
+    _, move_uci, _, hold = segment
+    return hold + (len(slide_positions(chess.Move.from_uci(move_uci), square_size, flipped)) if move_uci else 0)
+
+
+def _position_layer(board, square_size, flipped, last_move_uci, skip=()):
+    """The still picture of a position: the cached empty board plus highlights and pieces."""
+    layer = board_layer(square_size).copy()
+    if last_move_uci:
+        last_move = chess.Move.from_uci(last_move_uci)
+        for square in (last_move.from_square, last_move.to_square):
+            draw_square_overlay(layer, square_coords(square), LAST_MOVE_HIGHLIGHT_COLOR, square_size, flipped=flipped)
+    king = board.king(board.turn)
+    if king is not None and board.is_check():
+        draw_square_overlay(layer, square_coords(king), CHECK_HIGHLIGHT_COLOR, square_size, flipped=flipped)
+    draw_pieces(layer, visual_board_from(board), get_piece_images(square_size).get, square_size, flipped=flipped,
+                skip=skip)
+    return layer
+
+
+def render_segment(segment, square_size, flipped=False):
+    """
+    Frames of one ply as (surface, repeat count): the moving piece slides over a layer
+    drawn once for the ply, then the new position is held.
+    """
+    fen_before, move_uci, previous_uci, hold = segment
+    board = chess.Board(fen_before)
+    frames = []
+    if move_uci:
+        move = chess.Move.from_uci(move_uci)
+        layer = _position_layer(board, square_size, flipped, previous_uci, skip=(square_coords(move.from_square),))
+        piece = get_piece_images(square_size)[piece_notation(board.piece_at(move.from_square))]
+        for x, y in slide_positions(move, square_size, flipped):
+            frame = layer.copy()
+            if piece:
+                frame.blit(piece, piece.get_rect(center=(round(x), round(y))))
+            frames.append((frame, 1))
+        board.push(move)
+    frames.append((_position_layer(board, square_size, flipped, move_uci), hold))
+    return frames
+
+
+def _render_frames_task(task):
+    """Writes a run of segments as numbered images; held frames are file copies rather than re-encodes."""
+    segments, first_frame, square_size, flipped, (directory, extension) = task
+    number = first_frame
+    for segment in segments:
+        for frame, repeat in render_segment(segment, square_size, flipped):
+            path = os.path.join(directory, f"frame_{number:06d}.{extension}")
+            pygame.image.save(frame, path)
+            for extra in range(1, repeat):
+                shutil.copyfile(path, os.path.join(directory, f"frame_{number + extra:06d}.{extension}"))
+            number += repeat
+    return number - first_frame
+
+
+def _render_raw_task(task):
+    segments, _, square_size, flipped, _ = task
+    return [(_to_bytes(frame, "RGB"), repeat)
+            for segment in segments for frame, repeat in render_segment(segment, square_size, flipped)]
+
+
+def _open_video_pipe(path, width, height, fps):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise ReplayExportError("ffmpeg was not found on PATH; export --frames or --raw instead.")
+    return subprocess.Popen([ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                             "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                             "-pix_fmt", "yuv420p", path], stdin=subprocess.PIPE)
+
+
+def export_replay(start_fen, moves, frames_dir=None, raw_path=None, video_path=None, size=REPLAY_DEFAULT_SIZE,
+                  flipped=False, fps=REPLAY_FPS, hold_seconds=REPLAY_HOLD_SECONDS, workers=None,
+                  frame_format=REPLAY_FRAME_FORMAT):
+    """
+    Renders every ply at a fixed timestep in parallel chunks of plies. Frames go to a
+    directory of images, a raw RGB24 stream (file or FIFO), or ffmpeg. Returns the frame count.
+    """
+    if frame_format not in FRAME_FORMATS:
+        raise ReplayExportError(f"Unknown frame format {frame_format!r}; use one of {', '.join(FRAME_FORMATS)}.")
+    square_size = max(1, size // COLS)
+    segments = build_segments(start_fen, moves, fps, hold_seconds)
+    tasks = []
+    first_frame = 0
+    for start in range(0, len(segments), REPLAY_PLIES_PER_TASK):
+        chunk = segments[start:start + REPLAY_PLIES_PER_TASK]
+        tasks.append((chunk, first_frame, square_size, flipped, (frames_dir, frame_format)))
+        first_frame += sum(segment_frame_count(segment, square_size, flipped) for segment in chunk)
+    total_frames = first_frame
+    workers = workers or min(os.cpu_count() or 1, len(tasks))
+
+    started = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        if frames_dir:
+            os.makedirs(frames_dir, exist_ok=True)
+            written = sum(pool.imap_unordered(_render_frames_task, tasks))
+        else:
+            width = height = square_size * COLS
+            video = _open_video_pipe(video_path, width, height, fps) if video_path else None
+            sink = video.stdin if video else open(raw_path, "wb")
+            written = 0
+            try:
+                for frames in pool.imap(_render_raw_task, tasks): # In order, as the stream needs
+                    for data, repeat in frames:
+                        for _ in range(repeat):
+                            sink.write(data)
+                        written += repeat
+            finally:
+                sink.close()
+                if video and video.wait() != 0:
+                    raise ReplayExportError(f"ffmpeg exited with status {video.returncode}.")
+    elapsed = time.perf_counter() - started
+    print(f"Exported {len(moves)} plies as {written} frames ({written / fps:.1f}s of replay at {fps} fps) "
+          f"in {elapsed:.1f}s with {workers} worker(s).")
+    if written != total_frames:
+        raise ReplayExportError(f"Expected {total_frames} frames but wrote {written}.")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a game replay as frames or video")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pgn", help="PGN file to replay")
+    source.add_argument("--moves", nargs="+", help="moves in SAN or UCI")
+    parser.add_argument("--game", type=int, default=0, help="index of the game in the PGN file (0 = first)")
+    parser.add_argument("--fen", help="start position for --moves")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--frames", metavar="DIR", help="write numbered image frames (default)")
+    output.add_argument("--raw", metavar="PATH", help="write raw RGB24 frames to a file or FIFO")
+    output.add_argument("--video", metavar="PATH", help="encode with ffmpeg (e.g. recap.mp4)")
+    parser.add_argument("--format", choices=FRAME_FORMATS, default=REPLAY_FRAME_FORMAT, help="image format for --frames")
+    parser.add_argument("--size", type=int, default=REPLAY_DEFAULT_SIZE, help="board edge in pixels")
+    parser.add_argument("--flip", action="store_true", help="show the board from Black's side")
+    parser.add_argument("--fps", type=int, default=REPLAY_FPS)
+    parser.add_argument("--hold", type=float, default=REPLAY_HOLD_SECONDS, help="seconds to pause after each move")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        start_fen, moves = load_game_moves(args.pgn, args.game, args.moves, args.fen)
+        frames_dir = args.frames
+        if not (frames_dir or args.raw or args.video):
+            name = os.path.splitext(os.path.basename(args.pgn))[0] if args.pgn else "moves"
+            frames_dir = os.path.join(REPLAY_EXPORT_PATH, f"{name}_{args.game}" if args.pgn else name)
+        export_replay(start_fen, moves, frames_dir, args.raw, args.video, args.size, args.flip, args.fps, args.hold,
+                      args.workers, args.format)
+    except (ReplayExportError, OSError) as e:
+        print(f"Replay export failed: {e}")
+        return 1
+    if frames_dir:
+        print(f"Frames written to {frames_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
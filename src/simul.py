@@ -0,0 +1,329 @@
+# src/simul.py
+
+import argparse
+import concurrent.futures
+import math
+import os
+import sys
+import pygame
+import chess
+from src.constants import (ROWS, COLS, AI_DIFFICULTIES, EVALUATOR_DIFFICULTIES, STOCKFISH_PATH, FONT_NAME,
+                           MOVE_LIST_FONT_SIZE, STATUS_FONT_SIZE, TEXT_COLOR, SIDE_PANEL_BG_COLOR,
+                           SELECTED_SQUARE_HIGHLIGHT_COLOR, VALID_MOVE_DOT_COLOR, CHECK_HIGHLIGHT_COLOR,
+                           LAST_MOVE_HIGHLIGHT_COLOR, SIMUL_DEFAULT_BOARDS, SIMUL_HEADER_HEIGHT, SIMUL_LABEL_HEIGHT,
+                           SIMUL_MARGIN)
+from src.assets_manager import get_piece_images
+from src.audio import pre_init_mixer, load_sounds, play_sound
+from src.board_render import board_layer, visual_board_from, square_coords, square_center, draw_square_overlay, draw_pieces
+from src.engine_service import EngineScheduler, EngineServiceError, EngineQueueFull, PRIORITY_HIGH
+from src.game_logic import TerminationTracker
+from src.window import enable_dpi_awareness, initial_window_size
+from src import evaluator
+
+
+class SimulBoard:
+    """One game of the exhibition: the position, the player's selection and the pending AI reply."""
+    def __init__(self, number, player_color):
+        self.number = number
+        self.player_color = player_color
+        self.chess_board = chess.Board()
+        self.termination = TerminationTracker(self.chess_board)
+        self.selected_square = None
+        self.targets = {}        # to_square -> move for the selected piece (promotions are to a queen)
+        self.reply = None        # Future for the AI's move
+        self.awaiting_reply = False
+        self.version = 0         # Bumped on every visible change
+        self.rendered_version = None
+        self.surface = None      # The board and its status line as last drawn
+
+    @property
+    def flipped(self):
+        return self.player_color == chess.BLACK
+
+    def is_finished(self):
+        return self.termination.outcome() is not None
+
+    def player_to_move(self):
+        return not self.awaiting_reply and not self.is_finished() and self.chess_board.turn == self.player_color
+
+    def status(self):
+        outcome = self.termination.outcome()
+        if outcome is not None:
+            return f"{outcome.result()} ({outcome.termination.name.replace('_', ' ').lower()})"
+        return "Thinking..." if self.awaiting_reply else "Your move"
+
+    def push(self, move):
+        self.termination.push(move)
+        self.selected_square = None
+        self.targets = {}
+        self.version += 1
+
+    def click(self, square):
+        """Selects a piece or plays the selected one to `square`; returns the move played, if any."""
+        if not self.player_to_move():
+            return None
+        if square in self.targets:
+            move = self.targets[square]
+            self.push(move)
+            return move
+        piece = self.chess_board.piece_at(square)
+        if piece and piece.color == self.player_color and square != self.selected_square:
+            self.selected_square = square
+            self.targets = {move.to_square: move for move in self.termination.legal_moves
+                            if move.from_square == square and move.promotion in (None, chess.QUEEN)}
+            play_sound('piece_select')
+        elif self.selected_square is not None:
+            self.selected_square = None
+            self.targets = {}
+            play_sound('piece_deselect')
+        self.version += 1
+        return None
+
+
+class SimulExhibition:
+    """
+    N boards against the AI in one window. All boards share one square size, so they
+    share the cached piece sprites and empty-board layer for that size; each board keeps
+    its own rendered surface, redrawn only when its version changes. AI replies go to a
+    shared engine pool (or, without Stockfish, the evaluator in a process pool).
+    """
+    def __init__(self, board_count, difficulty, player_color=chess.WHITE, engine_service=None, workers=None):
+        self.boards = [SimulBoard(number, player_color) for number in range(1, board_count + 1)]
+        self.difficulty = difficulty
+        self.engine_service = engine_service
+        self.executor = None if engine_service else concurrent.futures.ProcessPoolExecutor(workers)
+        self.retry_boards = [] # Boards whose request met a full engine queue
+        try:
+            self.label_font = pygame.font.SysFont(FONT_NAME, MOVE_LIST_FONT_SIZE)
+            self.header_font = pygame.font.SysFont(FONT_NAME, STATUS_FONT_SIZE, bold=True)
+        except Exception as e:
+            print(f"Error initializing fonts: {e}. Using default font.")
+            self.label_font = pygame.font.Font(None, MOVE_LIST_FONT_SIZE)
+            self.header_font = pygame.font.Font(None, STATUS_FONT_SIZE)
+        self.header_text = None
+        self.needs_full_redraw = True
+        self.square_size = 1
+        self.cell_rects = []
+        surface = pygame.display.get_surface()
+        self.set_window_size(*(surface.get_size() if surface else initial_window_size()))
+        if player_color == chess.BLACK:
+            for board in self.boards:
+                self._request_reply(board)
+
+    def set_window_size(self, width, height):
+        """Picks the column count that gives the largest boards, and lays the grid out."""
+        count = len(self.boards)
+        def board_size_for(columns):
+            rows = math.ceil(count / columns)
+            cell_width = (width - SIMUL_MARGIN) // columns - SIMUL_MARGIN
+            cell_height = (height - SIMUL_HEADER_HEIGHT) // rows - SIMUL_LABEL_HEIGHT - SIMUL_MARGIN
+            return min(cell_width, cell_height)
+        columns = max(range(1, count + 1), key=board_size_for)
+        self.square_size = max(1, board_size_for(columns) // COLS)
+        board_size = self.square_size * COLS
+        self.cell_rects = []
+        for index in range(count):
+            row, column = divmod(index, columns)
+            self.cell_rects.append(pygame.Rect(SIMUL_MARGIN + column * (board_size + SIMUL_MARGIN),
+                                               SIMUL_HEADER_HEIGHT + row * (board_size + SIMUL_LABEL_HEIGHT + SIMUL_MARGIN),
+                                               board_size, board_size + SIMUL_LABEL_HEIGHT))
+        for board in self.boards:
+            board.rendered_version = None
+        self.needs_full_redraw = True
+
+    # --- AI replies ---
+    def _request_reply(self, board):
+        board.awaiting_reply = True
+        board.version += 1
+        try:
+            if self.engine_service:
+                board.reply = self.engine_service.submit(board.number, board.chess_board, self.difficulty,
+                                                         priority=PRIORITY_HIGH)
+            else:
+                board.reply = self.executor.submit(evaluator.choose_move, board.chess_board.copy(stack=False))
+        except EngineQueueFull:
+            self.retry_boards.append(board)
+        except EngineServiceError as e:
+            print(f"Board {board.number}: engine service unavailable: {e}")
+            board.awaiting_reply = False
+
+    def update(self):
+        retry, self.retry_boards = self.retry_boards, []
+        for board in retry:
+            self._request_reply(board)
+        for board in self.boards:
+            if board.reply is None or not board.reply.done():
+                continue
+            future, board.reply = board.reply, None
+            board.awaiting_reply = False
+            try:
+                move = future.result()
+            except Exception as e:
+                print(f"Board {board.number}: error during AI move processing: {e}")
+                board.version += 1
+                continue
+            if move is not None and board.termination.is_legal(move):
+                board.push(move)
+                play_sound('piece_move')
+
+    # --- Input ---
+    def handle_event(self, event):
+        if event.type == pygame.VIDEORESIZE:
+            self.set_window_size(event.w, event.h)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            for board, rect in zip(self.boards, self.cell_rects):
+                if rect.collidepoint(event.pos):
+                    self._click_board(board, event.pos[0] - rect.left, event.pos[1] - rect.top)
+                    return
+
+    def _click_board(self, board, x, y):
+        if y >= self.square_size * ROWS:
+            return
+        row, col = y // self.square_size, x // self.square_size
+        if board.flipped:
+            row, col = ROWS - 1 - row, COLS - 1 - col
+        if board.click(chess.square(col, ROWS - 1 - row)):
+            play_sound('piece_move')
+            if not board.is_finished():
+                self._request_reply(board)
+
+    # --- Drawing ---
+    def _render_board(self, board):
+        size = self.square_size * COLS
+        if board.surface is None or board.surface.get_size() != (size, size + SIMUL_LABEL_HEIGHT):
+            board.surface = pygame.Surface((size, size + SIMUL_LABEL_HEIGHT))
+        surface = board.surface
+        surface.fill(SIDE_PANEL_BG_COLOR)
+        surface.blit(board_layer(self.square_size), (0, 0))
+        flipped = board.flipped
+        if board.chess_board.move_stack:
+            last_move = board.chess_board.peek()
+            for square in (last_move.from_square, last_move.to_square):
+                draw_square_overlay(surface, square_coords(square), LAST_MOVE_HIGHLIGHT_COLOR, self.square_size, flipped=flipped)
+        king = board.chess_board.king(board.chess_board.turn)
+        if king is not None and board.termination.is_check():
+            draw_square_overlay(surface, square_coords(king), CHECK_HIGHLIGHT_COLOR, self.square_size, flipped=flipped)
+        if board.selected_square is not None:
+            draw_square_overlay(surface, square_coords(board.selected_square), SELECTED_SQUARE_HIGHLIGHT_COLOR,
+                                self.square_size, flipped=flipped)
+        draw_pieces(surface, visual_board_from(board.chess_board), get_piece_images(self.square_size).get,
+                    self.square_size, flipped=flipped)
+        for square in board.targets:
+            pygame.draw.circle(surface, VALID_MOVE_DOT_COLOR, square_center(square_coords(square), self.square_size,
+                                                                            flipped=flipped), self.square_size // 6)
+        label = self.label_font.render(f"{board.number}. {board.status()}", True, TEXT_COLOR)
+        surface.blit(label, (2, size + (SIMUL_LABEL_HEIGHT - label.get_height()) // 2))
+        board.rendered_version = board.version
+
+    def _summary(self):
+        results = [board.termination.outcome() for board in self.boards]
+        player_wins = sum(1 for outcome in results if outcome and outcome.winner == self.boards[0].player_color)
+        draws = sum(1 for outcome in results if outcome and outcome.winner is None)
+        losses = sum(1 for outcome in results if outcome) - player_wins - draws
+        to_move = sum(1 for board in self.boards if board.player_to_move())
+        return (f"Simul vs AI ({self.difficulty}): {to_move} of {len(self.boards)} boards waiting for you   "
+                f"+{player_wins} ={draws} -{losses}")
+
+    def draw(self, screen):
+        """Redraws only boards whose version changed; returns the changed rects, or None after a full redraw."""
+        full = self.needs_full_redraw
+        dirty_rects = []
+        if full:
+            screen.fill(SIDE_PANEL_BG_COLOR)
+            self.header_text = None
+        header_text = self._summary()
+        if header_text != self.header_text:
+            header_rect = pygame.Rect(0, 0, screen.get_width(), SIMUL_HEADER_HEIGHT)
+            screen.fill(SIDE_PANEL_BG_COLOR, header_rect)
+            header = self.header_font.render(header_text, True, TEXT_COLOR)
+            screen.blit(header, header.get_rect(midleft=(SIMUL_MARGIN, SIMUL_HEADER_HEIGHT // 2)))
+            self.header_text = header_text
+            dirty_rects.append(header_rect)
+        for board, rect in zip(self.boards, self.cell_rects):
+            if board.rendered_version != board.version:
+                self._render_board(board)
+            elif not full:
+                continue
+            screen.blit(board.surface, rect.topleft)
+            dirty_rects.append(rect)
+        self.needs_full_redraw = False
+        return None if full else dirty_rects
+
+    def close(self):
+        for board in self.boards:
+            if board.reply is not None:
+                board.reply.cancel()
+        if self.engine_service:
+            for board in self.boards:
+                self.engine_service.cancel_session(board.number)
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _start_engine_service(difficulty, engines):
+    """The shared Stockfish pool, or None when the evaluator plays this difficulty (or Stockfish is missing)."""
+    if difficulty in EVALUATOR_DIFFICULTIES or not (STOCKFISH_PATH and os.path.exists(STOCKFISH_PATH)):
+        return None
+    try:
+        return EngineScheduler(pool_size=engines).start()
+    except EngineServiceError as e:
+        print(f"Engine service unavailable ({e}); using the evaluator.")
+        return None
+
+
+def run_simul(board_count=SIMUL_DEFAULT_BOARDS, difficulty=AI_DIFFICULTIES[0], player_white=True, engines=None):
+    engine_service = _start_engine_service(difficulty, engines)
+    if engine_service is None and not evaluator.NUMPY_AVAILABLE:
+        print("A simul needs Stockfish or numpy (for the evaluator); neither is available.")
+        return 1
+
+    enable_dpi_awareness()
+    pre_init_mixer()
+    pygame.init()
+    screen = pygame.display.set_mode(initial_window_size(), pygame.RESIZABLE)
+    pygame.display.set_caption(f"The Unbeatable Chess - Simul ({board_count} boards)")
+    load_sounds()
+
+    simul = SimulExhibition(board_count, difficulty, chess.WHITE if player_white else chess.BLACK,
+                            engine_service, engines)
+    clock = pygame.time.Clock()
+    running = True
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.VIDEORESIZE:
+                    screen = pygame.display.get_surface()
+                simul.handle_event(event)
+            simul.update()
+            dirty_rects = simul.draw(screen)
+            if dirty_rects is None:
+                pygame.display.flip()
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
+            clock.tick(60)
+    finally:
+        simul.close()
+        if engine_service:
+            print(f"Engine service metrics: {engine_service.metrics()}")
+            engine_service.shutdown()
+        pygame.quit()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a simultaneous exhibition against the AI")
+    parser.add_argument("--boards", type=int, default=SIMUL_DEFAULT_BOARDS)
+    parser.add_argument("--difficulty", choices=AI_DIFFICULTIES, default=AI_DIFFICULTIES[0])
+    parser.add_argument("--black", action="store_true", help="play Black on every board")
+    parser.add_argument("--engines", type=int, default=None,
+                        help="engine processes (or evaluator workers) shared by the boards (default: one per CPU)")
+    args = parser.parse_args(argv)
+    if args.boards < 1:
+        parser.error("--boards must be at least 1")
+    return run_simul(args.boards, args.difficulty, not args.black, args.engines)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,166 @@
+# src/thumbnails.py
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
+import time
+import pygame
+import chess
+from src.constants import (COLS, CHECK_HIGHLIGHT_COLOR, LAST_MOVE_HIGHLIGHT_COLOR, MARKED_SQUARE_HIGHLIGHT_COLOR,
+                           THUMBNAIL_CACHE_PATH, THUMBNAIL_DEFAULT_SIZE, THUMBNAIL_RENDER_VERSION)
+from src.assets_manager import get_piece_images
+from src.board_render import visual_board_from, square_coords, board_layer, draw_square_overlay, draw_pieces
+
+def make_job(fen, size=THUMBNAIL_DEFAULT_SIZE, flipped=False, highlights=(), last_move=None):
+    """
+    Normalises a render request into a hashable tuple. Only what changes the picture is
+    kept (piece placement and side to move, not castling rights or clocks), so the same
+    position reached in different games shares one cached image.
+    """
+    board = chess.Board(fen)
+    squares = tuple(sorted({chess.parse_square(square) if isinstance(square, str) else square
+                            for square in highlights}))
+    if isinstance(last_move, str):
+        last_move = chess.Move.from_uci(last_move)
+    return (f"{board.board_fen()} {'w' if board.turn == chess.WHITE else 'b'}", int(size), bool(flipped), squares,
+            last_move.uci() if last_move else None)
+
+
+def cache_key(job):
+    return hashlib.sha256(repr((THUMBNAIL_RENDER_VERSION,) + job).encode("utf-8")).hexdigest()
+
+
+def cache_path(job, cache_dir=THUMBNAIL_CACHE_PATH):
+    key = cache_key(job)
+    return os.path.join(cache_dir, key[:2], key + ".png")
+
+
+def render_surface(job):
+    """Draws the job's position onto a new surface with the same routines as Board.draw_board_area."""
+    position, size, flipped, highlights, last_move = job
+    board = chess.Board(position)
+    square_size = max(1, size // COLS)
+    surface = board_layer(square_size).copy()
+    if last_move:
+        move = chess.Move.from_uci(last_move)
+        for square in (move.from_square, move.to_square):
+            draw_square_overlay(surface, square_coords(square), LAST_MOVE_HIGHLIGHT_COLOR, square_size, flipped=flipped)
+    for square in highlights:
+        draw_square_overlay(surface, square_coords(square), MARKED_SQUARE_HIGHLIGHT_COLOR, square_size, flipped=flipped)
+    king = board.king(board.turn)
+    if king is not None and board.is_check():
+        draw_square_overlay(surface, square_coords(king), CHECK_HIGHLIGHT_COLOR, square_size, flipped=flipped)
+    draw_pieces(surface, visual_board_from(board), get_piece_images(square_size).get, square_size, flipped=flipped)
+    return surface
+
+
+def _render_to_cache(task):
+    """Renders one job unless another process already has; writes through a temp file so readers never see half a PNG."""
+    path, job = task
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp.png"
+    pygame.image.save(render_surface(job), temp_path)
+    os.replace(temp_path, path)
+    return True
+
+
+def render_batch(jobs, cache_dir=THUMBNAIL_CACHE_PATH, workers=None):
+    """
+    Returns the PNG path of every job (in order), rendering only positions missing from
+    the cache. Misses are deduplicated and spread over a process pool.
+    """
+    paths = [cache_path(job, cache_dir) for job in jobs]
+    pending = {path: job for path, job in zip(paths, jobs) if not os.path.exists(path)}
+    if not pending:
+        return paths
+    workers = workers or min(os.cpu_count() or 1, len(pending))
+    if workers <= 1:
+        for task in pending.items():
+            _render_to_cache(task)
+    else:
+        chunksize = max(1, len(pending) // (workers * 4))
+        with multiprocessing.Pool(workers) as pool:
+            for _ in pool.imap_unordered(_render_to_cache, pending.items(), chunksize=chunksize):
+                pass
+    return paths
+
+
+def render_position(fen, size=THUMBNAIL_DEFAULT_SIZE, flipped=False, highlights=(), last_move=None,
+                    cache_dir=THUMBNAIL_CACHE_PATH):
+    """Renders (or finds in the cache) a single position in this process; returns the PNG path."""
+    job = make_job(fen, size, flipped, highlights, last_move)
+    path = cache_path(job, cache_dir)
+    _render_to_cache((path, job))
+    return path
+
+
+def _read_fens(path):
+    """FENs or EPD lines, one per line (only the first four fields are used)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [" ".join(line.split()[:4]) for line in f if line.strip() and not line.startswith("#")]
+
+
+def _recent_game_positions(count):
+    """Final positions and last moves of the most recently stored games."""
+    from src.game_database import GameDatabase
+    database = GameDatabase.open_default()
+    if database is None:
+        return []
+    try:
+        positions = []
+        for game in database.games_by(limit=count):
+            record = database.load_record(game["id"])
+            board = chess.Board(record.start_fen)
+            for move in record.moves:
+                board.push(move)
+            positions.append((board.fen(), record.moves[-1] if record.moves else None))
+        return positions
+    finally:
+        database.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render board positions to cached PNG thumbnails")
+    parser.add_argument("fens", nargs="*", help="positions to render")
+    parser.add_argument("--file", help="file with one FEN or EPD line per position")
+    parser.add_argument("--recent-games", type=int, metavar="N", help="render the final positions of the last N stored games")
+    parser.add_argument("--size", type=int, default=THUMBNAIL_DEFAULT_SIZE, help="board edge in pixels")
+    parser.add_argument("--flip", action="store_true", help="draw the board from Black's side")
+    parser.add_argument("--highlight", action="append", default=[], metavar="SQUARE", help="mark a square (repeatable)")
+    parser.add_argument("--last-move", metavar="UCI", help="highlight this move's squares")
+    parser.add_argument("--out", default=THUMBNAIL_CACHE_PATH, help="cache directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--list", action="store_true", help="print the image path of every position")
+    args = parser.parse_args(argv)
+
+    positions = [(fen, args.last_move) for fen in args.fens]
+    if args.file:
+        positions.extend((fen, None) for fen in _read_fens(args.file))
+    if args.recent_games:
+        positions.extend(_recent_game_positions(args.recent_games))
+    if not positions:
+        parser.error("no positions given")
+
+    try:
+        jobs = [make_job(fen, args.size, args.flip, args.highlight, last_move) for fen, last_move in positions]
+    except ValueError as e:
+        parser.error(str(e))
+    started = time.perf_counter()
+    unique_paths = {cache_path(job, args.out) for job in jobs}
+    cached = sum(1 for path in unique_paths if os.path.exists(path))
+    paths = render_batch(jobs, args.out, args.workers)
+    elapsed = time.perf_counter() - started
+    if args.list:
+        for (fen, _), path in zip(positions, paths):
+            print(f"{fen}\t{path}")
+    print(f"{len(jobs)} position(s), {len(unique_paths)} unique: {cached} cached, "
+          f"{len(unique_paths) - cached} rendered in {elapsed:.2f}s -> {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# src/window.py
+
+import sys
+import pygame
+from src.constants import (BOARD_HEIGHT, SIDE_PANEL_WIDTH, COLS, MIN_BOARD_SIZE, MIN_WINDOW_HEIGHT,
+                           WINDOW_DESKTOP_FRACTION)
+
+
+def enable_dpi_awareness():
+    """
+    Tells Windows the game draws at the real pixel size, so a scaled display does not
+    bitmap-stretch (and blur) the window. Call before the window is created.
+    """
+    if sys.platform != "win32":
+        return
+    try:
+        import ctypes
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(2) # Per-monitor aware (Windows 8.1+)
+        except (AttributeError, OSError):
+            ctypes.windll.user32.SetProcessDPIAware()
+    except (AttributeError, OSError) as e:
+        print(f"Could not enable DPI awareness: {e}")
+
+
+def system_dpi_scale():
+    """The display scale factor (1.0 at 96 DPI); only Windows reports one, elsewhere SDL sizes are already right."""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            return ctypes.windll.user32.GetDpiForSystem() / 96.0
+        except (AttributeError, OSError):
+            pass
+    return 1.0
+
+
+def clamp_window_size(width, height):
+    """The window size raised to the smallest one the layout supports."""
+    return max(width, MIN_BOARD_SIZE + SIDE_PANEL_WIDTH), max(height, MIN_WINDOW_HEIGHT)
+
+
+def board_layout(width, height):
+    """
+    (board size, square size) for a window: the largest board that fits beside the
+    side panel, a whole number of pixels per square and never below MIN_BOARD_SIZE.
+    """
+    board_size = max(MIN_BOARD_SIZE, min(height, width - SIDE_PANEL_WIDTH))
+    square_size = board_size // COLS
+    return square_size * COLS, square_size
+
+
+def initial_window_size():
+    """The default 800 px board scaled for the display's DPI, shrunk to fit the desktop."""
+    board_size = BOARD_HEIGHT * system_dpi_scale()
+    try:
+        desktop_width, desktop_height = pygame.display.get_desktop_sizes()[0]
+        board_size = min(board_size, desktop_height * WINDOW_DESKTOP_FRACTION,
+                         desktop_width * WINDOW_DESKTOP_FRACTION - SIDE_PANEL_WIDTH)
+    except (pygame.error, IndexError, AttributeError):
+        pass # Older pygame or no display information; keep the default
+    board_size, _ = board_layout(int(board_size) + SIDE_PANEL_WIDTH, int(board_size))
+    return clamp_window_size(board_size + SIDE_PANEL_WIDTH, board_size)
@@ -0,0 +1,67 @@
+# tests/test_asset_bundle.py
+
+import os
+import pytest
+from src import asset_bundle
+from src.asset_bundle import AssetBundle, AssetBundleError, build_bundle, read_asset, read_text_asset
+from src.constants import ASSET_PATH
+
+
+def asset_files(asset_dir):
+    files = {}
+    for directory, _, filenames in os.walk(asset_dir):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, asset_dir).replace(os.sep, "/")] = f.read()
+    return files
+
+
+def test_bundle_round_trips_the_asset_folder(tmp_path):
+    path = str(tmp_path / "assets.bundle")
+    files = asset_files(ASSET_PATH)
+    assert build_bundle(ASSET_PATH, path) == len(files) - 1 # screenshot.png is left out
+    bundle = AssetBundle(path)
+    try:
+        assert bundle.names() == sorted(name for name in files if name != "screenshot.png")
+        assert "screenshot.png" not in bundle and "sounds/move.wav" in bundle
+        for name in bundle.names():
+            data = bundle.read(name)
+            assert bytes(data) == files[name]
+            data.release() # The mapping cannot close while views into it are alive
+    finally:
+        bundle.close()
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_other_files_are_rejected(tmp_path):
+    not_a_bundle = tmp_path / "rules.txt"
+    not_a_bundle.write_bytes(b"Chess is played on a board of 64 squares." * 4)
+    with pytest.raises(AssetBundleError):
+        AssetBundle(str(not_a_bundle))
+    path = tmp_path / "assets.bundle"
+    build_bundle(ASSET_PATH, str(path))
+    path.write_bytes(path.read_bytes()[:-10]) # Truncated index
+    with pytest.raises(AssetBundleError):
+        AssetBundle(str(path))
+    empty = tmp_path / "empty.bundle"
+    empty.write_bytes(b"")
+    with pytest.raises(AssetBundleError):
+        AssetBundle(str(empty))
+
+
+def test_assets_are_read_from_the_bundle_first(tmp_path, monkeypatch):
+    asset_dir = tmp_path / "assets"
+    asset_dir.mkdir()
+    (asset_dir / "rules.txt").write_text("Bundled rules", encoding="utf-8")
+    path = str(tmp_path / "assets.bundle")
+    build_bundle(str(asset_dir), path)
+    bundle = AssetBundle(path)
+    monkeypatch.setattr(asset_bundle, "_default_bundle", bundle)
+    monkeypatch.setattr(asset_bundle, "_text_cache", {})
+    assert read_text_asset("rules.txt") == "Bundled rules"
+    with open(os.path.join(ASSET_PATH, "about.txt"), "rb") as f:
+        assert read_asset("about.txt") == f.read() # Not in the bundle: read from the file
+    with pytest.raises(FileNotFoundError):
+        read_asset("missing.txt")
+    bundle.close()
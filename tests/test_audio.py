@@ -0,0 +1,61 @@
+# tests/test_audio.py
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import pygame
+import pytest
+from src import audio
+from src.constants import AUDIO_CATEGORY_CHANNELS, SOUND_FILES
+
+
+class BusyChannel:
+    def __init__(self, name):
+        self.name = name
+
+    def get_busy(self):
+        return True
+
+
+@pytest.fixture
+def mixer():
+    audio.pre_init_mixer()
+    pygame.init()
+    if not pygame.mixer.get_init():
+        pytest.skip("No audio device, not even SDL's dummy driver")
+    audio.LATENCY_SAMPLES.clear()
+    yield
+    audio.LATENCY_SAMPLES.clear()
+    audio.end_input()
+
+
+def test_sounds_load_onto_reserved_channels(mixer):
+    loader = audio.load_sounds()
+    if loader is not None:
+        loader.join()
+    assert set(audio.LOADED_SOUNDS) == set(SOUND_FILES) and all(audio.LOADED_SOUNDS.values())
+    assert {category: len(channels) for category, channels in audio._category_channels.items()} == AUDIO_CATEGORY_CHANNELS
+    assert pygame.mixer.get_num_channels() > sum(AUDIO_CATEGORY_CHANNELS.values())
+
+
+def test_busy_categories_reuse_their_oldest_channel(mixer, monkeypatch):
+    audio.load_sounds(background=False)
+    monkeypatch.setitem(audio._category_channels, "move", [BusyChannel("a"), BusyChannel("b")])
+    monkeypatch.setitem(audio._next_channel, "move", 0)
+    assert [audio._channel_for("move").name for _ in range(3)] == ["a", "b", "a"]
+    assert audio._channel_for("unknown") is None
+
+
+def test_click_to_sound_latency_is_measured(mixer):
+    audio.load_sounds(background=False)
+    audio.play_sound("piece_move") # Not started by an input event: not timed
+    assert audio.latency_summary() is None
+    for _ in range(3):
+        audio.mark_input()
+        audio.play_sound("piece_select")
+    audio.mark_input()
+    audio.end_input()
+    audio.play_sound("button_click")
+    summary = audio.latency_summary()
+    assert summary["sounds"] == 3 and 0 <= summary["p50"] <= summary["max"]
+    assert summary["buffer"] == pytest.approx(audio.buffer_latency_ms(), abs=1e-3)
@@ -0,0 +1,40 @@
+# tests/test_benchmark.py
+
+import chess
+import pytest
+from src import evaluator
+from src.benchmark import PERFT_POSITIONS, load_epd, perft, perft_divide, run_epd, run_perft
+from src.game_logic import TerminationTracker
+
+EPD = """# Mate in one; the EPD id is optional
+6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - bm Ra8#; id "back rank";
+6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - am Ra2;
+6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - c0 "no bm or am";
+not an epd line
+"""
+
+
+def test_perft_counts_match_for_every_generator():
+    results = run_perft(depth=3)
+    assert len(results) == 2 * len(PERFT_POSITIONS)
+    assert all(result["ok"] and result["expected"] == result["nodes"] for result in results)
+
+
+def test_tracker_divide_matches_python_chess():
+    fen = PERFT_POSITIONS[1][1] # Kiwipete: castling, en passant and promotions
+    divide = perft_divide(TerminationTracker(chess.Board(fen)), 2)
+    assert divide == perft_divide(chess.Board(fen), 2)
+    assert sum(divide.values()) == perft(chess.Board(fen), 2) == 2039
+
+
+def test_epd_suites_are_loaded_and_solved(tmp_path):
+    path = tmp_path / "suite.epd"
+    path.write_text(EPD, encoding="utf-8")
+    positions = load_epd(str(path))
+    assert [(position_id, operations) for position_id, _, operations in positions] == [
+        ("back rank", {"bm": ["a1a8"]}), ("suite.epd:3", {"am": ["a1a2"]})]
+    if not evaluator.NUMPY_AVAILABLE:
+        pytest.skip("Without Stockfish the EPD runner needs numpy")
+    summary = run_epd([str(path)], difficulties=["Easiest"], workers=1, engine_path=None)
+    assert summary["Easiest"]["solved"] == 2 and summary["Easiest"]["solve_rate"] == 1.0
+    assert summary["Easiest"]["results"][0]["move"] == "a1a8"
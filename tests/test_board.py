@@ -0,0 +1,101 @@
+# tests/test_board.py
+
+import os
+import random
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import chess
+import pygame
+import pytest
+from src.board import Board
+from src.constants import DRAG_START_DISTANCE, MOVE_LIST_SCROLL_ROWS
+
+
+@pytest.fixture
+def board():
+    pygame.init()
+    board = Board()
+    yield board
+    board.close_engine()
+
+
+def square_pos(board, square):
+    """Window position of the centre of a square (White at the bottom)."""
+    return (chess.square_file(square) * board.square_size + board.square_size // 2,
+            (7 - chess.square_rank(square)) * board.square_size + board.square_size // 2)
+
+
+def mouse(event_type, pos, **attributes):
+    return pygame.event.Event(event_type, dict(pos=pos, **attributes))
+
+
+def settle(board):
+    for _ in range(200):
+        if not board.is_animating:
+            return
+        board.update()
+
+
+def test_drag_and_drop_plays_the_move(board):
+    screen = pygame.Surface(board.window_size)
+    start, target = square_pos(board, chess.E2), square_pos(board, chess.E4)
+    board.handle_event(mouse(pygame.MOUSEBUTTONDOWN, start, button=1))
+    assert not board.is_dragging
+    board.handle_event(mouse(pygame.MOUSEMOTION, (start[0], start[1] - DRAG_START_DISTANCE), rel=(0, 0),
+                             buttons=(1, 0, 0)))
+    assert board.is_dragging
+    assert board.draw(screen) is None # The first drag frame snapshots the whole scene
+    board.handle_event(mouse(pygame.MOUSEMOTION, target, rel=(0, 0), buttons=(1, 0, 0)))
+    dirty_rects = board.draw(screen)
+    assert len(dirty_rects) == 2 and dirty_rects[1].collidepoint(target) # Old and new sprite rects only
+    board.handle_event(mouse(pygame.MOUSEBUTTONUP, target, button=1))
+    settle(board)
+    assert board.chess_board.move_stack == [chess.Move.from_uci("e2e4")]
+    assert not board.is_dragging and board.draw(screen) is None
+
+
+def test_dropping_on_an_illegal_square_keeps_the_piece(board):
+    start, target = square_pos(board, chess.G1), square_pos(board, chess.G3)
+    board.handle_event(mouse(pygame.MOUSEBUTTONDOWN, start, button=1))
+    board.handle_event(mouse(pygame.MOUSEMOTION, target, rel=(0, 0), buttons=(1, 0, 0)))
+    board.handle_event(mouse(pygame.MOUSEBUTTONUP, target, button=1))
+    settle(board)
+    assert board.chess_board.move_stack == [] and not board.is_dragging
+
+
+def test_click_to_move_still_works(board):
+    for square in (chess.G1, chess.F3):
+        pos = square_pos(board, square)
+        board.handle_event(mouse(pygame.MOUSEBUTTONDOWN, pos, button=1))
+        board.handle_event(mouse(pygame.MOUSEBUTTONUP, pos, button=1))
+    settle(board)
+    assert board.chess_board.move_stack == [chess.Move.from_uci("g1f3")]
+
+
+def visible_plies(board, screen):
+    board.draw(screen)
+    return [ply for _, ply in board.move_list_click_targets]
+
+
+def test_move_list_scrolls_and_follows_the_game(board):
+    rng = random.Random(4)
+    while len(board.history) < 120 and board.history.current.outcome is None:
+        board.history.push(rng.choice(board.history.current.legal_moves()))
+    board.jump_to_ply(len(board.history))
+    screen = pygame.Surface(board.window_size)
+    following = visible_plies(board, screen)
+    assert following[-1] == len(board.history) and len(following) % 2 == 0
+
+    board.handle_event(pygame.event.Event(pygame.MOUSEMOTION, pos=board.move_list_rect.center, rel=(0, 0),
+                                          buttons=(0, 0, 0)))
+    board.handle_event(pygame.event.Event(pygame.MOUSEWHEEL, x=0, y=1))
+    scrolled = visible_plies(board, screen)
+    assert scrolled[0] == following[0] - 2 * MOVE_LIST_SCROLL_ROWS
+    assert visible_plies(board, screen) == scrolled # Drawing again keeps the scrolled view
+
+    # Clicking a move keeps the view; any other change of ply follows the game again
+    cell, ply = board.move_list_click_targets[0]
+    board.handle_event(mouse(pygame.MOUSEBUTTONDOWN, cell.center, button=1))
+    assert board.history.cursor == ply and visible_plies(board, screen) == scrolled
+    board.jump_to_ply(len(board.history))
+    assert visible_plies(board, screen) == following
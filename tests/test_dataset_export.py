@@ -0,0 +1,90 @@
+# tests/test_dataset_export.py
+
+import chess
+import pytest
+
+np = pytest.importorskip("numpy") # Dataset export is an optional, numpy-only feature
+from src import evaluator
+from src.dataset_export import (EVAL_CLIP, EVAL_UNKNOWN, ShardWriter, _pgn_chunk_records, export_pgn,
+                                open_dataset, positions_to_records, unpack_planes)
+from src.game_logic import position_hash
+
+PGN = """[Result "0-1"]
+
+1. e4 { [%eval 0.3] } e5 { [%eval #-2] } 2. Qh5 0-1
+
+[Result "*"]
+
+1. d4 d5 *
+
+[Result "1/2-1/2"]
+
+1. c4 c5 2. Nc3 1/2-1/2
+"""
+
+
+def boards_after(ucis):
+    board = chess.Board()
+    boards = [board.copy()]
+    for uci in ucis:
+        board.push_uci(uci)
+        boards.append(board.copy())
+    return boards
+
+
+def records_for(boards, result=0):
+    return positions_to_records(boards, [position_hash(board) for board in boards],
+                                [EVAL_UNKNOWN] * len(boards), result)
+
+
+def test_records_hold_the_position():
+    boards = boards_after(["e2e4", "e7e5", "e1e2"])
+    records = positions_to_records(boards, [position_hash(board) for board in boards],
+                                   [EVAL_UNKNOWN, 25, EVAL_UNKNOWN, -40], -1)
+    assert np.array_equal(unpack_planes(records), evaluator.boards_to_planes(boards))
+    assert list(records["turn"]) == [1, 0, 1, 0]
+    assert list(records["castling"]) == [15, 15, 15, 12] # Ke2 gives up White's castling rights
+    assert records["eval"][1] == 25 and records["eval"][3] == -40
+    assert records["eval"][0] == evaluator.evaluate_boards(boards[:1])[0]
+    assert set(records["result"]) == {-1}
+    assert int(records["hash"][2]) == position_hash(boards[2])
+
+
+def test_pgn_evals_and_results(tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN, encoding="utf-8")
+    records = _pgn_chunk_records((str(path), 0, path.stat().st_size))
+    assert len(records) == 3 + 3 # The unfinished game is skipped
+    assert list(records["result"]) == [-1, -1, -1, 0, 0, 0]
+    assert records["eval"][1] == 30 and records["eval"][2] == -(EVAL_CLIP - 2) # Mated in 2
+
+
+def test_shards_fill_up_and_duplicates_are_dropped(tmp_path):
+    boards = []
+    for ucis in (["e2e4", "e7e5", "g1f3", "b8c6", "f1b5"], ["d2d4", "d7d5", "c2c4", "e7e6", "b1c3"]):
+        boards.extend(boards_after(ucis))
+    records = records_for(boards) # Both lines start from the initial position
+    writer = ShardWriter(str(tmp_path), shard_rows=4, dedup_bits=1 << 16)
+    writer.write(records[:7])
+    writer.write(records[7:])
+    writer.close()
+    assert (writer.written, writer.duplicates) == (11, 1)
+    shards = open_dataset(str(tmp_path))
+    assert [len(shard) for shard in shards] == [4, 4, 3]
+    assert len({int(key) for shard in shards for key in shard["hash"]}) == 11
+
+    appender = ShardWriter(str(tmp_path), shard_rows=4, dedup_bits=1 << 16) # Earlier shards count as seen
+    appender.write(records)
+    appender.write(records_for(boards_after(["g2g3"])[1:]))
+    appender.close()
+    assert (appender.written, appender.duplicates) == (1, 12)
+    assert [len(shard) for shard in open_dataset(str(tmp_path))] == [4, 4, 3, 1]
+
+
+def test_export_pgn(tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text(PGN, encoding="utf-8")
+    out = tmp_path / "dataset"
+    export_pgn([str(path)], str(out), workers=2, chunk_bytes=32)
+    shards = open_dataset(str(out))
+    assert sum(len(shard) for shard in shards) == 5 # The starting position is written once
@@ -0,0 +1,122 @@
+# tests/test_engine_service.py
+
+import threading
+import chess
+import chess.engine
+import pytest
+from src.engine_service import EngineScheduler, EngineQueueFull, PRIORITY_HIGH
+
+
+class FakeEngine:
+    """Plays the first legal move; each search waits until `release` is set."""
+    def __init__(self):
+        self.options = {"Skill Level": None, "Threads": None, "Hash": None}
+        self.searched = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def configure(self, options):
+        pass
+
+    def play(self, board, limit, game=None):
+        self.searched.append(board.fen())
+        self.started.set()
+        self.release.wait(5.0)
+        return chess.engine.PlayResult(next(iter(board.legal_moves)), None)
+
+    def quit(self):
+        pass
+
+
+def start_scheduler(max_queue=8):
+    """A scheduler running one worker thread on a FakeEngine instead of Stockfish processes."""
+    scheduler = EngineScheduler(engine_path=None, pool_size=1, max_queue=max_queue)
+    engine = FakeEngine()
+    scheduler._engines = [engine]
+    scheduler.calibration = {"threads": 1, "hash_mb": 16}
+    scheduler._running = True
+    worker = threading.Thread(target=scheduler._worker_loop, args=(engine,), daemon=True)
+    worker.start()
+    scheduler._workers = [worker]
+    return scheduler, engine
+
+
+def positions(count):
+    board = chess.Board()
+    boards = []
+    for move in list(board.legal_moves)[:count]:
+        board.push(move)
+        boards.append(board.copy())
+        board.pop()
+    return boards
+
+
+def test_identical_requests_share_one_search():
+    scheduler, engine = start_scheduler()
+    try:
+        busy, board = positions(2)
+        scheduler.submit("busy", busy, "Medium")
+        assert engine.started.wait(5.0)
+        futures = [scheduler.submit(session, board, "Medium") for session in ("a", "b", "c")]
+        engine.release.set()
+        moves = {future.result(timeout=5.0) for future in futures}
+        assert moves == {next(iter(board.legal_moves))}
+        assert engine.searched.count(board.fen()) == 1
+        metrics = scheduler.metrics()
+        assert metrics["coalesced"] == 2 and metrics["submitted"] == 2
+    finally:
+        engine.release.set()
+        scheduler.shutdown()
+
+
+def test_running_search_is_shared_too():
+    scheduler, engine = start_scheduler()
+    try:
+        board = chess.Board()
+        first = scheduler.submit("a", board, "Medium")
+        assert engine.started.wait(5.0)
+        second = scheduler.submit("b", board, "Medium")
+        engine.release.set()
+        assert first.result(timeout=5.0) == second.result(timeout=5.0)
+        assert engine.searched == [board.fen()]
+    finally:
+        engine.release.set()
+        scheduler.shutdown()
+
+
+def test_full_queue_pushes_back():
+    scheduler, engine = start_scheduler(max_queue=2)
+    try:
+        busy, *waiting, extra = positions(4)
+        scheduler.submit("busy", busy, "Medium")
+        assert engine.started.wait(5.0)
+        futures = [scheduler.submit("a", board, "Medium") for board in waiting]
+        with pytest.raises(EngineQueueFull):
+            scheduler.submit("b", extra, "Medium")
+        futures.append(scheduler.submit("b", waiting[0], "Medium", priority=PRIORITY_HIGH)) # Coalesced, so accepted
+        assert scheduler.metrics()["rejected"] == 1
+        engine.release.set()
+        for future in futures:
+            future.result(timeout=5.0)
+        scheduler.submit("b", extra, "Medium").result(timeout=5.0)
+        assert scheduler.metrics()["queue_depth"] == 0
+    finally:
+        engine.release.set()
+        scheduler.shutdown()
+
+
+def test_cancel_session_keeps_shared_search_for_others():
+    scheduler, engine = start_scheduler()
+    try:
+        busy, board = positions(2)
+        scheduler.submit("busy", busy, "Medium")
+        assert engine.started.wait(5.0)
+        mine = scheduler.submit("a", board, "Medium")
+        theirs = scheduler.submit("b", board, "Medium")
+        assert scheduler.cancel_session("a") == 1
+        assert mine.cancelled()
+        engine.release.set()
+        assert theirs.result(timeout=5.0) in board.legal_moves
+    finally:
+        engine.release.set()
+        scheduler.shutdown()
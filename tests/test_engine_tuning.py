@@ -0,0 +1,104 @@
+# tests/test_engine_tuning.py
+
+import json
+import os
+import random
+import chess
+import chess.engine
+from src import engine_tuning
+from src.constants import ENGINE_MIN_HASH_MB, STOCKFISH_SKILL_LEVELS
+from src.engine_tuning import apply_profile, choose_move, host_budget, pick_candidate, resolve_profile
+
+CALIBRATION = {"threads": 8, "hash_mb": 1024}
+
+
+class FakeEngine:
+    """Records configure/play/analyse calls instead of running a UCI engine."""
+    def __init__(self, options=("Skill Level", "Threads", "Hash")):
+        self.options = {name: None for name in options}
+        self.configured = []
+        self.calls = []
+
+    def configure(self, options):
+        self.configured.append(dict(options))
+
+    def play(self, board, limit, game=None):
+        self.calls.append(("play", limit))
+        return chess.engine.PlayResult(next(iter(board.legal_moves)), None)
+
+    def analyse(self, board, limit, multipv=None, game=None):
+        self.calls.append(("analyse", multipv))
+        moves = sorted(board.legal_moves, key=lambda move: move.uci())[:multipv]
+        return [{"pv": [move]} for move in moves]
+
+
+def test_host_budget_is_within_limits():
+    budget = host_budget(max_hash_mb=512)
+    assert 1 <= budget["threads"] <= budget["cores"]
+    assert ENGINE_MIN_HASH_MB <= budget["hash_mb"] <= 512
+    assert budget["hash_mb"] & (budget["hash_mb"] - 1) == 0 # Power of two
+
+
+def test_profiles_scale_with_the_calibration():
+    hard = resolve_profile("Hard", CALIBRATION)
+    assert hard["options"] == {"Skill Level": STOCKFISH_SKILL_LEVELS["Hard"], "Threads": 8, "Hash": 512}
+    medium = resolve_profile("Medium", CALIBRATION)
+    assert medium["options"]["Threads"] == 4 and medium["options"]["Hash"] == 256
+    easiest = resolve_profile("Easiest", CALIBRATION)
+    assert easiest["options"]["Threads"] == 1 and easiest["options"]["Hash"] == ENGINE_MIN_HASH_MB
+    assert resolve_profile("Unbeatable", CALIBRATION, threads_cap=2)["options"]["Threads"] == 2
+    assert resolve_profile("Unknown")["options"] == resolve_profile("Medium")["options"]
+
+
+def test_apply_profile_only_sends_changed_options():
+    engine = FakeEngine(options=("Threads", "Hash")) # No "Skill Level" option
+    applied = {}
+    profile = resolve_profile("Hard", CALIBRATION)
+    assert apply_profile(engine, profile, applied) == {"Threads": 8, "Hash": 512}
+    assert apply_profile(engine, profile, applied) == {}
+    assert apply_profile(engine, resolve_profile("Medium", CALIBRATION), applied) == {"Threads": 4, "Hash": 256}
+    assert engine.configured == [{"Threads": 8, "Hash": 512}, {"Threads": 4, "Hash": 256}]
+
+
+def test_pick_candidate_prefers_the_best_move():
+    rng = random.Random(3)
+    counts = {"a": 0, "b": 0, "c": 0}
+    for _ in range(3000):
+        counts[pick_candidate(["a", "b", "c"], rng)] += 1
+    assert counts["a"] > counts["b"] > counts["c"] > 0
+    assert pick_candidate(["only"], rng) == "only"
+
+
+def test_choose_move_uses_multipv_only_when_asked():
+    board = chess.Board()
+    engine = FakeEngine()
+    move = choose_move(engine, board, resolve_profile("Hard", CALIBRATION))
+    assert move in board.legal_moves and engine.calls[-1][0] == "play"
+    move = choose_move(engine, board, resolve_profile("Easiest", CALIBRATION), rng=random.Random(1))
+    assert move in board.legal_moves and engine.calls[-1] == ("analyse", 3)
+
+
+def test_cached_calibration_is_reused_and_capped(tmp_path, monkeypatch):
+    engine_path = tmp_path / "stockfish"
+    engine_path.write_bytes(b"")
+    cache_path = tmp_path / "calibration.json"
+    budget = host_budget()
+    cached = {"engine_path": os.path.abspath(str(engine_path)), "engine_mtime": os.path.getmtime(str(engine_path)),
+              "cores": budget["cores"], "threads": 10 ** 6, "hash_mb": 10 ** 9}
+    cache_path.write_text(json.dumps(cached), encoding="utf-8")
+    calibrated = []
+
+    def fake_calibrate(path, budget):
+        calibrated.append(path)
+        return dict(cached, threads=1, hash_mb=16, nps_by_threads={})
+
+    monkeypatch.setattr(engine_tuning, "calibrate_engine", fake_calibrate)
+
+    result = engine_tuning.load_or_calibrate(str(engine_path), str(cache_path))
+    assert not calibrated
+    assert result["threads"] == budget["threads"] and result["hash_mb"] == budget["hash_mb"]
+
+    os.utime(str(engine_path), (0, 0)) # A new engine binary invalidates the cache
+    result = engine_tuning.load_or_calibrate(str(engine_path), str(cache_path))
+    assert calibrated == [str(engine_path)] and result["threads"] == 1
+    assert json.loads(cache_path.read_text(encoding="utf-8"))["threads"] == 1
@@ -0,0 +1,72 @@
+# tests/test_evaluator.py
+
+import random
+import chess
+import pytest
+
+np = pytest.importorskip("numpy") # The evaluator is an optional, numpy-only feature
+from src.evaluator import MATE_SCORE, boards_to_planes, choose_move, evaluate_boards, score_moves
+
+
+def random_boards(count, seed):
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(rng.randint(0, 80)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        boards.append(board)
+    return boards
+
+
+def test_planes_match_the_board():
+    boards = random_boards(20, 1)
+    planes = boards_to_planes(boards)
+    assert planes.shape == (20, 12, 64)
+    for board, board_planes in zip(boards, planes):
+        for square in chess.SQUARES:
+            piece = board.piece_at(square)
+            occupied = [plane for plane in range(12) if board_planes[plane, square]]
+            if piece is None:
+                assert occupied == []
+            else:
+                assert occupied == [piece.piece_type - 1 + (0 if piece.color == chess.WHITE else 6)]
+
+
+def test_scores_are_colour_symmetric():
+    boards = random_boards(50, 2)
+    scores = evaluate_boards(boards)
+    mirrored = evaluate_boards([board.mirror() for board in boards])
+    assert scores.shape == (50,)
+    assert np.array_equal(scores, -mirrored)
+    assert evaluate_boards([chess.Board()])[0] == 0
+    assert evaluate_boards([]).shape == (0,)
+
+
+def test_material_is_counted():
+    queen_up = chess.Board("4k3/8/8/8/8/8/8/3QK3 w - - 0 1")
+    assert evaluate_boards([queen_up])[0] > 700
+    assert evaluate_boards([queen_up.mirror()])[0] < -700
+
+
+def test_finds_mate_in_one_for_both_sides():
+    white = chess.Board("6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1")
+    assert choose_move(white, noise_cp=0) == chess.Move.from_uci("a1a8")
+    black = white.mirror()
+    assert choose_move(black, noise_cp=0) == chess.Move.from_uci("a8a1")
+    moves, values = score_moves(white)
+    assert values[moves.index(chess.Move.from_uci("a1a8"))] == MATE_SCORE
+
+
+def test_prefers_winning_material():
+    board = chess.Board("4k3/8/8/3p4/8/8/8/3QK3 w - - 0 1") # Qxd5 wins a pawn that nothing defends
+    moves, values = score_moves(board)
+    assert dict(zip(moves, values))[chess.Move.from_uci("d1d5")] == max(values)
+
+
+def test_no_move_without_legal_moves():
+    assert choose_move(chess.Board("4k3/8/8/8/8/8/8/4K3 w - - 0 1"), rng=random.Random(0)) is not None
+    assert choose_move(chess.Board("k7/1Q6/1K6/8/8/8/8/8 b - - 0 1")) is None # Black is mated
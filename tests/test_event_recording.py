@@ -0,0 +1,74 @@
+# tests/test_event_recording.py
+
+import json
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import chess
+import pygame
+import pytest
+from src.constants import HEIGHT, SQUARE_SIZE, WIDTH
+from src.event_recording import (RECORDING_VERSION, RecordingError, compare_reports, decode_event, encode_event,
+                                 load_recording, replay_recording)
+
+
+def click(square):
+    """Mouse down/up events on a square of the unflipped board."""
+    position = [chess.square_file(square) * SQUARE_SIZE + SQUARE_SIZE // 2,
+                (7 - chess.square_rank(square)) * SQUARE_SIZE + SQUARE_SIZE // 2]
+    return [[pygame.MOUSEBUTTONDOWN, {"pos": position, "button": 1}],
+            [pygame.MOUSEBUTTONUP, {"pos": position, "button": 1}]]
+
+
+def write_recording(path, moves, state, frames_per_move=60):
+    lines = [{"version": RECORDING_VERSION, "seed": 1, "size": [WIDTH, HEIGHT], "online": False}]
+    frame = 5
+    for uci in moves:
+        move = chess.Move.from_uci(uci)
+        for square in (move.from_square, move.to_square):
+            for event in click(square):
+                lines.append({"frame": frame, "t": frame * 16.7, "events": [event]})
+                frame += 1
+        frame += frames_per_move # Let the move animation finish
+    lines.append({"end": True, "frames": frame, "state": state})
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line) + "\n")
+
+
+def test_events_round_trip():
+    event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, {"pos": (12, 34), "button": 1, "window": None,
+                                                        "touch": False, "surface": pygame.Surface((1, 1))})
+    encoded = json.loads(json.dumps(encode_event(event)))
+    assert encoded == [pygame.MOUSEBUTTONDOWN, {"pos": [12, 34], "button": 1, "window": None, "touch": False}]
+    decoded = decode_event(encoded)
+    assert decoded.type == pygame.MOUSEBUTTONDOWN and decoded.pos == (12, 34) and decoded.button == 1
+
+
+def test_incomplete_recordings_are_rejected(tmp_path):
+    path = tmp_path / "recording.jsonl"
+    path.write_text(json.dumps({"version": RECORDING_VERSION, "seed": 1}) + "\n", encoding="utf-8")
+    with pytest.raises(RecordingError):
+        load_recording(str(path))
+    path.write_text(json.dumps({"version": RECORDING_VERSION + 1}) + "\n", encoding="utf-8")
+    with pytest.raises(RecordingError):
+        load_recording(str(path))
+
+
+def test_replay_reproduces_the_game(tmp_path):
+    moves = ["e2e4", "e7e5", "g1f3"]
+    board = chess.Board()
+    for uci in moves:
+        board.push_uci(uci)
+    path = str(tmp_path / "recording.jsonl")
+    write_recording(path, moves, {"fen": board.fen(), "moves": moves, "game_over": False})
+    report = replay_recording(path)
+    assert report["state"]["moves"] == moves and report["state"]["fen"] == board.fen()
+    assert report["frames"] == load_recording(path)[3]["frames"]
+    assert report["timing_ms"]["max"] >= report["timing_ms"]["p50"] > 0
+
+    assert compare_reports(report, report) == []
+    slower = dict(report, timing_ms=dict(report["timing_ms"], mean=report["timing_ms"]["mean"] * 2))
+    assert len(compare_reports(slower, report)) == 1
+    changed = dict(report, state=dict(report["state"], fen=chess.STARTING_FEN))
+    assert compare_reports(changed, report)[0].startswith("final state differs")
@@ -0,0 +1,76 @@
+# tests/test_game_database.py
+
+import chess
+from src.game_database import GameDatabase, pack_material_signature
+from src.game_logic import material_signature
+from src.game_record import GameRecord, RESULT_BLACK, RESULT_DRAW
+
+FOOLS_MATE = ("f2f3", "e7e5", "g2g4", "d8h4")
+SCANDINAVIAN = ("e2e4", "d7d5", "e4d5", "d8d5", "b1c3")
+
+
+def play(ucis, fen=chess.STARTING_FEN):
+    board = chess.Board(fen)
+    for uci in ucis:
+        board.push_uci(uci)
+    return board
+
+
+def open_database(tmp_path):
+    return GameDatabase(str(tmp_path / "games.sqlite3"), batch_size=4, batch_seconds=0.01)
+
+
+def test_games_are_stored_and_loaded(tmp_path):
+    database = open_database(tmp_path)
+    try:
+        database.record_game(play(FOOLS_MATE), {"Mode": "PvA", "AIDifficulty": "Hard", "PlayerColor": "White"})
+        database.record_game(play(SCANDINAVIAN), {"Mode": "PvP"}, result=RESULT_DRAW)
+        database.flush()
+        assert database.count_games() == 2
+
+        record = database.load_record(1)
+        assert record.moves == [chess.Move.from_uci(uci) for uci in FOOLS_MATE]
+        assert record.result == RESULT_BLACK # Taken from the board's outcome
+        assert record.metadata["AIDifficulty"] == "Hard"
+        assert database.load_record(3) is None
+
+        assert [game["id"] for game in database.games_by(difficulty="Hard", result="0-1")] == [1]
+        assert [game["id"] for game in database.games_by(mode="PvP")] == [2]
+        assert [game["id"] for game in database.games_by()] == [2, 1]
+    finally:
+        database.close()
+
+
+def test_position_and_material_queries(tmp_path):
+    database = open_database(tmp_path)
+    try:
+        database.record_game(play(FOOLS_MATE))
+        database.record_game(play(SCANDINAVIAN))
+        start_fen = "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1"
+        database.record(GameRecord(start_fen, [chess.Move.from_uci("e2e4")], RESULT_DRAW, {}))
+        database.flush()
+
+        reached = database.games_reaching(chess.Board())
+        assert sorted((game["id"], game["ply"]) for game in reached) == [(1, 0), (2, 0)]
+        assert [game["ply"] for game in database.games_reaching(play(SCANDINAVIAN[:3]).fen())] == [3]
+        assert [game["id"] for game in database.games_reaching(play(["e2e4"], start_fen))] == [3]
+
+        # Material is indexed after captures: one pawn each traded off in the Scandinavian
+        after_trade = play(SCANDINAVIAN[:3])
+        assert [(game["id"], game["ply"]) for game in database.games_with_material(after_trade)] == [(2, 3)]
+        full_set = material_signature(chess.Board())
+        assert sorted(game["id"] for game in database.games_with_material(full_set)) == [1, 2]
+        assert pack_material_signature(full_set) != pack_material_signature(material_signature(after_trade))
+    finally:
+        database.close()
+
+
+def test_invalid_games_are_skipped(tmp_path):
+    database = open_database(tmp_path)
+    try:
+        database.record(GameRecord("8/8/8/8 w - - 0 1", [], RESULT_DRAW, {})) # Unreadable start position
+        database.record_game(play(FOOLS_MATE))
+        database.flush()
+        assert database.count_games() == 1
+    finally:
+        database.close()
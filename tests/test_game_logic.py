@@ -0,0 +1,85 @@
+# tests/test_game_logic.py
+
+import random
+import chess
+from src.game_logic import TerminationTracker, material_signature
+
+
+def assert_matches_board(tracker):
+    board = tracker.chess_board
+    assert tracker.outcome() == board.outcome()
+    assert tracker.is_check() == board.is_check()
+    assert set(tracker.legal_moves) == set(board.legal_moves)
+    assert tracker.is_insufficient_material() == board.is_insufficient_material()
+    assert tracker.material_signature == material_signature(board)
+
+
+def test_random_games_with_takebacks_match_board():
+    rng = random.Random(2024)
+    for _ in range(30):
+        tracker = TerminationTracker(chess.Board())
+        for _ in range(400):
+            if tracker.chess_board.move_stack and rng.random() < 0.2:
+                tracker.pop()
+            elif tracker.outcome() is None:
+                tracker.push(rng.choice(tracker.legal_moves))
+            else:
+                break
+            assert_matches_board(tracker)
+
+
+def test_fivefold_repetition():
+    tracker = TerminationTracker(chess.Board())
+    shuffle = [chess.Move.from_uci(uci) for uci in ("g1f3", "g8f6", "f3g1", "f6g8")]
+    for move in shuffle * 4:
+        assert tracker.outcome() is None
+        tracker.push(move)
+        assert_matches_board(tracker)
+    assert tracker.repetition_count() == 5
+    assert tracker.outcome().termination == chess.Termination.FIVEFOLD_REPETITION
+    tracker.pop()
+    assert_matches_board(tracker)
+    assert tracker.outcome() is None
+
+
+def test_seventyfive_move_rule():
+    tracker = TerminationTracker(chess.Board("4k3/8/8/8/8/8/8/R3K3 w - - 149 100"))
+    assert tracker.outcome() is None
+    tracker.push(chess.Move.from_uci("a1a2"))
+    assert_matches_board(tracker)
+    assert tracker.outcome().termination == chess.Termination.SEVENTYFIVE_MOVES
+
+
+def test_checkmate_stalemate_and_insufficient_material():
+    positions = {
+        "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3": chess.Termination.CHECKMATE,
+        "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1": chess.Termination.STALEMATE,
+        "4k3/8/8/2b5/8/8/3B4/4K3 w - - 0 1": chess.Termination.INSUFFICIENT_MATERIAL,
+    }
+    for fen, termination in positions.items():
+        tracker = TerminationTracker(chess.Board(fen))
+        assert_matches_board(tracker)
+        assert tracker.outcome().termination == termination
+
+
+def test_reset_from_board_replays_move_stack():
+    board = chess.Board()
+    for uci in ("g1f3", "g8f6", "f3g1", "f6g8", "g1f3", "g8f6", "f3g1", "f6g8"):
+        board.push_uci(uci)
+    tracker = TerminationTracker(board)
+    assert tracker.repetition_count() == 3
+    assert tracker.can_claim_threefold_repetition() == board.can_claim_threefold_repetition()
+    assert_matches_board(tracker)
+
+
+def test_en_passant_and_promotion_update_signature():
+    tracker = TerminationTracker(chess.Board("4k3/1P6/8/3pP3/8/8/8/4K3 w - d6 0 1"))
+    tracker.push(chess.Move.from_uci("e5d6"))
+    assert_matches_board(tracker)
+    tracker.push(chess.Move.from_uci("e8d7"))
+    tracker.push(chess.Move.from_uci("b7b8n"))
+    assert_matches_board(tracker)
+    tracker.pop()
+    tracker.pop()
+    tracker.pop()
+    assert_matches_board(tracker)
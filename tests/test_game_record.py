@@ -0,0 +1,79 @@
+# tests/test_game_record.py
+
+import random
+import chess
+import pytest
+from src.game_record import (GameRecord, GameArchive, RESULT_WHITE, RESULT_UNKNOWN,
+                             encode_move, decode_move, save_game, load_game, append_to_archive,
+                             record_to_pgn, record_from_pgn)
+
+
+def random_game(seed, plies=120, fen=chess.STARTING_FEN):
+    rng = random.Random(seed)
+    board = chess.Board(fen)
+    for _ in range(plies):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        board.push(rng.choice(moves))
+    return board
+
+
+def test_encode_decode_every_move_shape():
+    moves = [chess.Move.from_uci(uci) for uci in ("e2e4", "a7a8q", "h2h1n", "e1g1", "b7c8r", "g2f1b")]
+    for move in moves:
+        assert decode_move(encode_move(move)) == move
+    assert decode_move(encode_move(chess.Move.null())) == chess.Move.null()
+
+
+def test_bytes_round_trip():
+    board = random_game(1)
+    record = GameRecord.from_board(board, result=RESULT_WHITE, metadata={"White": "Ann", "Round": 3})
+    data = record.to_bytes()
+    assert len(data) == record.size_in_bytes
+    loaded = GameRecord.from_bytes(data)
+    assert loaded.moves == board.move_stack
+    assert loaded.result == RESULT_WHITE
+    assert loaded.metadata == {"White": "Ann", "Round": 3}
+    assert loaded.start_fen == chess.STARTING_FEN
+    assert [loaded.move_at(i) for i in range(len(loaded))] == board.move_stack
+
+
+def test_board_at_matches_replay_from_checkpoints():
+    start_fen = "r3k2r/pppq1ppp/2n2n2/3pp3/3PP3/2N2N2/PPPQ1PPP/R3K2R w KQkq - 4 8"
+    board = random_game(7, plies=90, fen=start_fen)
+    record = GameRecord.from_bytes(GameRecord.from_board(board).to_bytes())
+    replay = chess.Board(start_fen)
+    for ply in range(len(board.move_stack) + 1):
+        position = record.board_at(ply)
+        assert position.fen() == replay.fen()
+        assert len(position.move_stack) < record.checkpoint_interval
+        if ply < len(board.move_stack):
+            replay.push(board.move_stack[ply])
+    with pytest.raises(IndexError):
+        record.board_at(len(board.move_stack) + 1)
+
+
+def test_save_load_and_archive(tmp_path):
+    boards = [random_game(seed, plies=40) for seed in range(5)]
+    path = str(tmp_path / "game.ucg")
+    save_game(path, GameRecord.from_board(boards[0]))
+    assert load_game(path).to_board().move_stack == boards[0].move_stack
+
+    archive_path = str(tmp_path / "games.uca")
+    append_to_archive(archive_path, [GameRecord.from_board(board) for board in boards[:3]])
+    assert append_to_archive(archive_path, [GameRecord.from_board(board) for board in boards[3:]]) == 5
+    with GameArchive(archive_path) as archive:
+        assert [record.detach().moves for record in archive] == [board.move_stack for board in boards]
+
+
+def test_pgn_round_trip():
+    start_fen = "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1"
+    for board in (random_game(3), random_game(4, fen=start_fen)):
+        record = GameRecord.from_board(board, metadata={"Event": "Test"})
+        loaded = record_from_pgn(record_to_pgn(record))
+        assert loaded.start_fen == board.root().fen()
+        assert loaded.moves == board.move_stack
+        assert loaded.result == record.result
+        assert loaded.metadata["Event"] == "Test"
+    assert record_from_pgn('[Result "*"]\n\n*').result == RESULT_UNKNOWN
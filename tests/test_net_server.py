@@ -0,0 +1,95 @@
+# tests/test_net_server.py
+
+import json
+from src.net_server import GameServer, ClientConnection
+
+
+class FakeWriter:
+    def __init__(self):
+        self.data = bytearray()
+
+    def is_closing(self):
+        return False
+
+    def write(self, data):
+        self.data += data
+
+    def get_extra_info(self, name):
+        return ("127.0.0.1", 0)
+
+
+def connect():
+    return ClientConnection(FakeWriter())
+
+
+def received(connection):
+    messages = [json.loads(line) for line in connection.writer.data.splitlines()]
+    connection.writer.data.clear()
+    return messages
+
+
+def start_game():
+    server = GameServer()
+    white, black, spectator = connect(), connect(), connect()
+    server.handle_message(white, {"op": "create"})
+    game_id = received(white)[0]["game"]
+    server.handle_message(black, {"op": "join", "game": game_id})
+    server.handle_message(spectator, {"op": "watch", "game": game_id})
+    for connection in (white, black, spectator):
+        received(connection)
+    return server, game_id, white, black, spectator
+
+
+def move(server, connection, game_id, uci, **extra):
+    server.handle_message(connection, dict({"op": "move", "game": game_id, "uci": uci}, **extra))
+
+
+def test_legal_move_is_broadcast():
+    server, game_id, white, black, spectator = start_game()
+    move(server, white, game_id, "e2e4", ply=0)
+    for connection in (white, black, spectator):
+        assert received(connection) == [{"op": "moved", "game": game_id, "uci": "e2e4", "san": "e4", "ply": 1,
+                                         "check": False, "outcome": None}]
+    assert server.moves_applied == 1
+
+
+def test_rejected_moves_leave_the_game_unchanged():
+    server, game_id, white, black, spectator = start_game()
+    cases = [(black, "e7e5", {}, "not your turn"),
+             (spectator, "e2e4", {}, "not a player in this game"),
+             (white, "e2e4", {"ply": 3}, "stale ply"),
+             (white, "e2", {}, "bad move syntax"),
+             (white, "e2e5", {}, "illegal move"),
+             (white, "e1e2", {}, "illegal move")]
+    for connection, uci, extra, reason in cases:
+        move(server, connection, game_id, uci, **extra)
+        (error,) = received(connection)
+        assert error["op"] == "error" and error["reason"] == reason
+        assert received(white if connection is not white else black) == []
+    assert server.games[game_id].ply == 0
+    assert server.moves_applied == 0
+    server.handle_message(white, {"op": "move", "game": "missing", "uci": "e2e4"})
+    assert received(white)[0]["reason"] == "no such game"
+
+
+def test_checkmate_ends_the_game():
+    server, game_id, white, black, spectator = start_game()
+    for connection, uci in ((white, "f2f3"), (black, "e7e5"), (white, "g2g4"), (black, "d8h4")):
+        move(server, connection, game_id, uci)
+    last = received(spectator)[-1]
+    assert last["check"] is True
+    assert last["outcome"] == {"termination": "CHECKMATE", "winner": "black", "result": "0-1"}
+    received(white)
+    move(server, white, game_id, "a2a3")
+    assert received(white)[0]["reason"] == "game is over"
+
+
+def test_resign_and_leave():
+    server, game_id, white, black, spectator = start_game()
+    server.handle_message(black, {"op": "resign", "game": game_id})
+    assert received(white)[0]["outcome"]["winner"] == "white"
+    server.handle_message(black, {"op": "resign", "game": game_id})
+    assert received(black)[-1]["reason"] == "cannot resign"
+    for connection in (white, black, spectator):
+        server.handle_message(connection, {"op": "leave", "game": game_id})
+    assert game_id not in server.games
@@ -0,0 +1,73 @@
+# tests/test_opening_explorer.py
+
+import chess
+from src.opening_explorer import OpeningExplorer, build_index
+
+GAMES = [
+    ("1-0", 2000, 2200, "e4 e5 Nf3 Nc6 Bb5"),
+    ("1-0", None, None, "e4 e5 Nf3 Nc6 Bc4"),
+    ("1/2-1/2", 1800, 1800, "e4 c5 Nf3"),
+    ("0-1", 2400, 2600, "d4 d5 c4"),
+    ("0-1", 1500, None, "e4 e5 Nf3 Nf6"),
+    ("*", 3000, 3000, "e4 e5"), # Unfinished games are skipped
+]
+
+
+def write_pgn(path):
+    with open(path, "w", encoding="utf-8") as f:
+        for index, (result, white_elo, black_elo, moves) in enumerate(GAMES):
+            f.write(f'[Event "Game {index}"]\n[Result "{result}"]\n')
+            if white_elo is not None:
+                f.write(f'[WhiteElo "{white_elo}"]\n')
+            if black_elo is not None:
+                f.write(f'[BlackElo "{black_elo}"]\n')
+            f.write(f"\n{moves} {result}\n\n")
+
+
+def board_after(*sans):
+    board = chess.Board()
+    for san in sans:
+        board.push_san(san)
+    return board
+
+
+def build(tmp_path, **kwargs):
+    pgn_path = str(tmp_path / "games.pgn")
+    write_pgn(pgn_path)
+    index_path = str(tmp_path / "explorer.idx")
+    # Tiny chunks and runs so the games are split across workers and merged from many runs
+    summary = build_index([pgn_path], index_path, workers=2, chunk_bytes=64, run_max_entries=3, **kwargs)
+    return summary, OpeningExplorer(index_path)
+
+
+def test_counts_results_and_ratings(tmp_path):
+    summary, explorer = build(tmp_path)
+    try:
+        assert summary["games"] == 5 and summary["runs"] > 1
+        first = explorer.lookup(chess.Board())
+        assert [stats.move.uci() for stats in first] == ["e2e4", "d2d4"]
+        e4 = first[0]
+        assert (e4.games, e4.white_wins, e4.draws, e4.black_wins) == (4, 2, 1, 1)
+        assert e4.rated_games == 3 and e4.average_rating == (2100 + 1800 + 1500) // 3
+        assert e4.white_score == 2.5 / 4
+
+        replies = {stats.move.uci(): stats for stats in explorer.lookup(board_after("e4", "e5", "Nf3", "Nc6"))}
+        assert set(replies) == {"f1b5", "f1c4"}
+        assert replies["f1c4"].average_rating is None
+        assert explorer.lookup(board_after("e4", "e5", "Nf3", "Nc6", "Bb5")) == []
+    finally:
+        explorer.close()
+
+
+def test_min_games_drops_rare_moves(tmp_path):
+    summary, explorer = build(tmp_path, min_games=2)
+    try:
+        assert [stats.move.uci() for stats in explorer.lookup(chess.Board())] == ["e2e4"]
+        assert explorer.lookup(board_after("d4")) == []
+        assert [stats.games for stats in explorer.lookup(board_after("e4", "e5"))] == [3]
+    finally:
+        explorer.close()
+
+
+def test_missing_index_is_not_an_error(tmp_path):
+    assert OpeningExplorer.open_if_exists(str(tmp_path / "missing.idx")) is None
@@ -0,0 +1,98 @@
+# tests/test_puzzles.py
+
+import random
+import chess
+import pytest
+from src.puzzles import Puzzle, PuzzleError, PuzzleStore, PuzzleTrainer, iter_csv_rows, iter_epd_rows
+
+BACK_RANK = "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1"
+
+CSV = """PuzzleId,FEN,Moves,Rating,RatingDeviation,Popularity,NbPlays,Themes,GameUrl,OpeningTags
+aaaaa,6k1/5ppp/8/8/8/8/5PPP/R6K b - - 0 1,g8h8 a1a8,1210,80,90,100,mateIn1 backRankMate,,
+bbbbb,rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1,e2e4 e7e5 g1f3,1820,80,90,100,opening,,
+ccccc,6k1/5ppp/8/8/8/8/5PPP/R6K b - - 0 1,g8h8,1500,80,90,100,short,,
+ddddd,6k1/5ppp/8/8/8/8/5PPP/R6K b - - 0 1,g8h8 a1a8,not-a-rating,80,90,100,mateIn1,,
+"""
+
+EPD = f"""# Comment lines are skipped
+{BACK_RANK[:-4]} bm Ra8#; id "back rank"; rating "1350";
+{BACK_RANK[:-4]} id "no best move";
+"""
+
+
+def make_store(tmp_path):
+    csv_path = tmp_path / "puzzles.csv"
+    csv_path.write_text(CSV, encoding="utf-8")
+    epd_path = tmp_path / "puzzles.epd"
+    epd_path.write_text(EPD, encoding="utf-8")
+    store = PuzzleStore(str(tmp_path / "puzzles.sqlite3"))
+    store.import_file(str(csv_path))
+    store.import_file(str(epd_path))
+    return store
+
+
+def test_importers_read_lichess_csv_and_epd(tmp_path):
+    csv_path = tmp_path / "puzzles.csv"
+    csv_path.write_text(CSV, encoding="utf-8")
+    rows = list(iter_csv_rows(str(csv_path)))
+    assert [row[0] for row in rows] == ["aaaaa", "bbbbb"] # Too short / unrated rows are skipped
+    assert rows[1][2:] == ("e2e4", "e7e5 g1f3", 1820, "opening")
+
+    epd_path = tmp_path / "puzzles.epd"
+    epd_path.write_text(EPD, encoding="utf-8")
+    assert list(iter_epd_rows(str(epd_path))) == [("back rank", BACK_RANK, None, "a1a8", 1350, "epd")]
+
+
+def test_puzzles_start_after_the_setup_move():
+    puzzle = Puzzle(1, "aaaaa", "6k1/5ppp/8/8/8/8/5PPP/R6K b - - 0 1", "g8h8", "a1a8", 1210, "mateIn1 backRankMate")
+    assert puzzle.solver_color == chess.WHITE
+    assert puzzle.solution_san == ["Ra8#"] and puzzle.themes == ["mateIn1", "backRankMate"]
+    board = chess.Board(puzzle.start_fen)
+    board.push(puzzle.solution[0])
+    assert puzzle.is_correct(0, puzzle.solution[0], board)
+    with pytest.raises(PuzzleError):
+        Puzzle(2, "bad", BACK_RANK, None, "a1a9", 1500, "")
+    with pytest.raises(PuzzleError):
+        Puzzle(3, "illegal", BACK_RANK, None, "a1h8", 1500, "")
+    with pytest.raises(PuzzleError):
+        Puzzle(4, "empty", BACK_RANK, None, "", 1500, "")
+
+
+def test_sampling_by_rating_and_theme(tmp_path):
+    store = make_store(tmp_path)
+    try:
+        assert store.count() == 3
+        assert store.import_rows([("aaaaa", BACK_RANK, None, "a1a8", 1210, "")]) == 0 # Already imported
+        assert store.bucket_range() == (1210 // 50, 1820 // 50)
+        rng = random.Random(7)
+        for _ in range(20):
+            assert store.sample(1800, window=50, rng=rng).source_id == "bbbbb"
+            assert store.sample(1200, window=0, rng=rng).source_id == "aaaaa"
+            assert store.sample(1500, theme="epd", rng=rng).source_id == "back rank" # Nearest bucket
+            assert store.sample(1500, theme="backRankMate", rng=rng).source_id == "aaaaa"
+        assert store.sample(1500, theme="endgame", rng=rng) is None
+        seen = {store.sample(1500, window=1000, rng=rng).source_id for _ in range(200)}
+        assert seen == {"aaaaa", "bbbbb", "back rank"}
+    finally:
+        store.close()
+
+
+def test_trainer_serves_prefetched_puzzles(tmp_path):
+    store = make_store(tmp_path)
+    trainer = PuzzleTrainer(store, rating=1820)
+    try:
+        trainer.prefetch()
+        assert trainer.next_puzzle().rating in (1820, 1350, 1210)
+        trainer.set_rating(1210)
+        trainer.theme = "opening"
+        assert trainer.next_puzzle().source_id == "bbbbb"
+    finally:
+        trainer.close()
+        store.close()
+
+
+def test_empty_store_is_not_opened(tmp_path):
+    path = str(tmp_path / "empty.sqlite3")
+    assert PuzzleStore.open_if_exists(path) is None
+    PuzzleStore(path).close()
+    assert PuzzleStore.open_if_exists(path) is None
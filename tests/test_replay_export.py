@@ -0,0 +1,54 @@
+# tests/test_replay_export.py
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import chess
+import pytest
+from src.constants import COLS
+from src.replay_export import (ReplayExportError, build_segments, export_replay, load_game_moves,
+                               render_segment, segment_frame_count)
+
+SIZE = 16 * COLS
+
+
+def test_moves_are_read_as_san_or_uci():
+    start_fen, moves = load_game_moves(moves=["e4", "e7e5", "Nf3", "b8c6"])
+    assert start_fen == chess.STARTING_FEN
+    assert [move.uci() for move in moves] == ["e2e4", "e7e5", "g1f3", "b8c6"]
+    with pytest.raises(ReplayExportError):
+        load_game_moves(moves=["e4", "e4"])
+
+
+def test_pgn_games_are_selected_by_index(tmp_path):
+    path = tmp_path / "games.pgn"
+    path.write_text('[Result "*"]\n\n1. d4 *\n\n[Result "*"]\n\n1. c4 e5 *\n', encoding="utf-8")
+    assert load_game_moves(str(path), game_index=1)[1] == [chess.Move.from_uci("c2c4"), chess.Move.from_uci("e7e5")]
+    with pytest.raises(ReplayExportError):
+        load_game_moves(str(path), game_index=5)
+
+
+def test_segments_hold_and_slide():
+    start_fen, moves = load_game_moves(moves=["e4", "e5"])
+    segments = build_segments(start_fen, moves, fps=10, hold_seconds=0.5, final_hold_seconds=2)
+    assert [(move, previous, hold) for _, move, previous, hold in segments] == [
+        (None, None, 5), ("e2e4", None, 5), ("e7e5", "e2e4", 20)]
+    for segment in segments:
+        frames = render_segment(segment, SIZE // COLS)
+        assert sum(repeat for _, repeat in frames) == segment_frame_count(segment, SIZE // COLS)
+        assert all(frame.get_size() == (SIZE, SIZE) for frame, _ in frames)
+    assert segment_frame_count(segments[1], SIZE // COLS) > segments[1][3] # The pawn slides first
+
+
+def test_export_frames_and_raw_stream(tmp_path):
+    start_fen, moves = load_game_moves(moves=["e4", "e5", "Qh5"])
+    frames_dir = tmp_path / "frames"
+    count = export_replay(start_fen, moves, frames_dir=str(frames_dir), size=SIZE, fps=10, workers=2,
+                          frame_format="bmp")
+    names = sorted(os.listdir(str(frames_dir)))
+    assert len(names) == count and names[-1] == f"frame_{count - 1:06d}.bmp"
+
+    raw_path = tmp_path / "replay.rgb"
+    assert export_replay(start_fen, moves, raw_path=str(raw_path), size=SIZE, fps=10, workers=2) == count
+    assert raw_path.stat().st_size == count * SIZE * SIZE * 3
+    with pytest.raises(ReplayExportError):
+        export_replay(start_fen, moves, frames_dir=str(frames_dir), frame_format="gif")
@@ -0,0 +1,96 @@
+# tests/test_simul.py
+
+import concurrent.futures
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import chess
+import pygame
+from src.constants import COLS, ROWS
+from src.engine_service import EngineQueueFull
+from src.simul import SimulBoard, SimulExhibition
+
+
+class FakeEngineService:
+    """Hands out futures that the test resolves; can pretend its queue is full."""
+    def __init__(self):
+        self.requests = []
+        self.cancelled = []
+        self.full = False
+
+    def submit(self, session_id, board, difficulty, priority=None):
+        if self.full:
+            raise EngineQueueFull("queue full")
+        future = concurrent.futures.Future()
+        self.requests.append((session_id, board.fen(), future))
+        return future
+
+    def cancel_session(self, session_id):
+        self.cancelled.append(session_id)
+
+
+def click(simul, number, square):
+    """Clicks a square of board `number`, drawn with the player's pieces at the bottom."""
+    rect = simul.cell_rects[number - 1]
+    size = simul.square_size
+    col, row = chess.square_file(square), ROWS - 1 - chess.square_rank(square)
+    if simul.boards[number - 1].flipped:
+        col, row = COLS - 1 - col, ROWS - 1 - row
+    simul.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN,
+                                          pos=(rect.left + col * size + size // 2, rect.top + row * size + size // 2),
+                                          button=1))
+
+
+def test_board_selects_and_moves():
+    board = SimulBoard(1, chess.WHITE)
+    assert board.click(chess.E7) is None and board.selected_square is None # Not the player's piece
+    assert board.click(chess.E2) is None and set(board.targets) == {chess.E3, chess.E4}
+    assert board.click(chess.E4) == chess.Move.from_uci("e2e4")
+    assert not board.player_to_move() and board.status() == "Your move"
+
+
+def test_replies_come_back_to_their_board():
+    pygame.init()
+    service = FakeEngineService()
+    simul = SimulExhibition(4, "Hard", engine_service=service)
+    screen = pygame.Surface((1200, 900))
+    try:
+        assert simul.draw(screen) is None # The first frame draws everything
+        click(simul, 2, chess.D2)
+        click(simul, 2, chess.D4)
+        assert [(session, fen) for session, fen, _ in service.requests] == [
+            (2, "rnbqkbnr/pppppppp/8/8/3P4/8/PPP1PPPP/RNBQKBNR b KQkq - 0 1")]
+        assert simul.boards[1].status() == "Thinking..."
+        dirty_rects = simul.draw(screen)
+        assert simul.cell_rects[1] in dirty_rects and simul.cell_rects[0] not in dirty_rects
+
+        service.requests[0][2].set_result(chess.Move.from_uci("d7d5"))
+        simul.update()
+        assert simul.boards[1].chess_board.peek() == chess.Move.from_uci("d7d5")
+        assert simul.boards[1].player_to_move() and simul.boards[0].chess_board.move_stack == []
+    finally:
+        simul.close()
+    assert service.cancelled == [1, 2, 3, 4]
+
+
+def test_full_queue_is_retried():
+    pygame.init()
+    service = FakeEngineService()
+    simul = SimulExhibition(2, "Hard", player_color=chess.BLACK, engine_service=service)
+    try:
+        assert [session for session, _, _ in service.requests] == [1, 2] # The AI opens every board
+        service.requests[0][2].set_result(chess.Move.from_uci("e2e4"))
+        simul.update()
+        service.full = True
+        click(simul, 1, chess.E7)
+        click(simul, 1, chess.E5)
+        assert simul.boards[0].chess_board.peek() == chess.Move.from_uci("e7e5")
+        assert simul.retry_boards == [simul.boards[0]] and len(service.requests) == 2
+        simul.update() # Still full: the board stays in line
+        assert simul.retry_boards == [simul.boards[0]]
+        service.full = False
+        simul.update()
+        assert simul.retry_boards == [] and service.requests[-1][0] == 1
+        assert simul.boards[0].status() == "Thinking..."
+    finally:
+        simul.close()
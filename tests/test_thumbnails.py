@@ -0,0 +1,46 @@
+# tests/test_thumbnails.py
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import chess
+import pygame
+from src.constants import COLS
+from src.thumbnails import cache_path, make_job, render_batch, render_position, render_surface
+
+ITALIAN = "r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3"
+
+
+def test_jobs_ignore_what_is_not_drawn():
+    job = make_job(ITALIAN, 160, highlights=["e4", chess.E4, "c4"], last_move="f1c4")
+    assert job == ("r1bqkbnr/pppp1ppp/2n5/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b", 160, False,
+                   (chess.C4, chess.E4), "f1c4")
+    assert make_job(ITALIAN.replace("KQkq - 3 3", "- - 0 9"), 160, highlights=["c4", "e4"],
+                    last_move=chess.Move.from_uci("f1c4")) == job
+    assert cache_path(job) != cache_path(make_job(ITALIAN, 160, flipped=True))
+
+
+def test_render_surface_draws_the_check():
+    size = 8 * COLS
+    checked = chess.Board("4k3/8/8/8/8/8/8/4RK2 b - - 0 1")
+    surface = render_surface(make_job(checked.fen(), size))
+    assert surface.get_size() == (size, size)
+    square = size // COLS
+    king_x, king_y = chess.square_file(chess.E8) * square, (7 - chess.square_rank(chess.E8)) * square
+    corner = surface.get_at((king_x, king_y))[:3]
+    plain = render_surface(make_job(checked.fen().replace(" b ", " w "), size)).get_at((king_x, king_y))[:3]
+    assert corner != plain # Only the side to move is highlighted when in check
+
+
+def test_batch_renders_each_position_once(tmp_path):
+    fens = [chess.STARTING_FEN, ITALIAN, chess.STARTING_FEN.replace("KQkq", "-")]
+    jobs = [make_job(fen, 64) for fen in fens]
+    paths = render_batch(jobs, str(tmp_path), workers=2)
+    assert paths[0] == paths[2] and len(set(paths)) == 2
+    assert all(os.path.exists(path) for path in paths)
+    assert pygame.image.load(paths[1]).get_size() == (64, 64)
+    assert not [name for root, _, names in os.walk(str(tmp_path)) for name in names if name.endswith(".tmp.png")]
+
+    modified = os.path.getmtime(paths[1])
+    assert render_batch(jobs[1:2], str(tmp_path)) == paths[1:2] # Cached: nothing is rendered again
+    assert os.path.getmtime(paths[1]) == modified
+    assert render_position(ITALIAN, 64, cache_dir=str(tmp_path)) == paths[1]
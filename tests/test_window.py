@@ -0,0 +1,50 @@
+# tests/test_window.py
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import pygame
+from src.assets_manager import get_piece_images
+from src.board_render import board_layer
+from src.constants import ASSET_CACHE_SIZES, COLS, MIN_BOARD_SIZE, MIN_WINDOW_HEIGHT, SIDE_PANEL_WIDTH
+from src.window import board_layout, clamp_window_size
+
+
+def test_layout_fits_the_window():
+    assert board_layout(1050, 800) == (800, 100)
+    assert board_layout(1050 + 500, 805) == (800, 100) # Whole pixels per square
+    assert board_layout(SIDE_PANEL_WIDTH + 500, 900) == (496, 62)
+    assert board_layout(100, 100) == (MIN_BOARD_SIZE, MIN_BOARD_SIZE // COLS)
+    assert clamp_window_size(200, 200) == (MIN_BOARD_SIZE + SIDE_PANEL_WIDTH, MIN_WINDOW_HEIGHT)
+    assert clamp_window_size(1600, 1000) == (1600, 1000)
+
+
+def test_sprites_and_board_layers_are_cached_per_size():
+    sizes = [31, 32, 33, 34, 35][:ASSET_CACHE_SIZES + 1]
+    first_images, first_layer = get_piece_images(sizes[0]), board_layer(sizes[0])
+    assert get_piece_images(sizes[0]) is first_images and board_layer(sizes[0]) is first_layer
+    assert first_images["wK"].get_size() == (sizes[0], sizes[0])
+    assert first_layer.get_size() == (sizes[0] * COLS, sizes[0] * COLS)
+    for size in sizes[1:]: # One size too many evicts the least recently used one
+        get_piece_images(size)
+        board_layer(size)
+    assert get_piece_images(sizes[-1]) is get_piece_images(sizes[-1])
+    assert get_piece_images(sizes[0]) is not first_images and board_layer(sizes[0]) is not first_layer
+
+
+def test_board_follows_the_window_size():
+    from src.board import Board
+    pygame.init()
+    board = Board()
+    try:
+        board.set_window_size(SIDE_PANEL_WIDTH + 500, 900)
+        assert (board.board_size, board.square_size, board.piece_sprite_size) == (496, 62, 62)
+        board.set_window_size(1050, 800, rebuild_delay_ms=60000) # Live resize: sprites are rescaled later
+        assert board.square_size == 100 and board.piece_sprite_size == 62 and board.pending_sprite_size == 100
+        board.sprite_rebuild_at = 0
+        board.update()
+        assert board.piece_sprite_size == 100 and board.pending_sprite_size is None
+        screen = pygame.Surface(board.window_size)
+        board.draw(screen)
+    finally:
+        board.close_engine()